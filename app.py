@@ -1,14 +1,21 @@
 import streamlit as st
 import pandas as pd
 
-from core.calculations import calculate_financing_scenario, get_restschuld_nach_jahren, sum_sondertilgung_for_year
+from core.profiling import starte
+from core.vergleich import GespeichertesSzenario
 from ui.sidebar import render_sidebar
-from ui.layout import render_comparison_tab, render_analysis_tab
+from ui.layout import (
+    app_pipeline, render_comparison_tab, render_analysis_tab, render_montecarlo_tab, render_performance_panel,
+    render_sensitivity_tab, speichere_szenario,
+)
 
 st.set_page_config(layout="wide", page_title="loan_dolphin")
 
 st.title("🐬 Loan Dolphin")
 
+# --- Optional: Zeitmessung dieses Reruns (Schalter in der Sidebar, Zustand vom letzten Klick)
+messung = starte(st.session_state.get("perf_debug", False))
+
 # --- Sidebar: read all inputs & dataframes
 cfg = render_sidebar()
 
@@ -21,37 +28,64 @@ params = [
     cfg["Kredit_KfW_297_pro_WE"], cfg["Kredit_KfW_124_max"],
 ]
 
-st_params_fam = [cfg["st_modus_fam"], cfg["st_df_fam"]]
-st_params_sie = [cfg["st_modus_sie"], cfg["st_df_sie"]]
+# Sondertilgung: compiled per-year plans (built in the sidebar when a table is edited)
+st_params_fam = cfg["st_plan_fam"]
+st_params_sie = cfg["st_plan_sie"]
+
+# --- Current scenario (B): memoized stages of this session (allocation, rates, plans, aggregates, KPIs, figures);
+# only stages whose inputs changed are recomputed, plans resume from the previous plans after Sondertilgung edits
+lauf = app_pipeline().lauf(cfg)
+szenario_b = lauf["tilgung"]
 
-# --- Save current settings as Scenario A
+# --- Save current settings (compact: inputs only, Kennzahlen are recomputed for the comparison)
+aktuell = GespeichertesSzenario(params, st_params_fam, st_params_sie, cfg["monatlich"], lauf["reihenfolge"])
 st.header("⚖️ Szenario-Vergleich")
-if st.button("Aktuelle Konfiguration als 'Szenario A' speichern", use_container_width=True):
-    st.session_state.scenario_a = calculate_financing_scenario(params, st_params_fam, st_params_sie)
-    st.success("Szenario A gespeichert!")
+name_col, button_col = st.columns([2, 1])
+szenario_name = name_col.text_input("Name", placeholder="z. B. Variante mit Sondertilgung", label_visibility="collapsed")
+name_col.checkbox("Auch auf Festplatte speichern (bleibt über die Session hinaus erhalten)", key="ablage_dauerhaft")
+if button_col.button("Aktuelle Konfiguration speichern", use_container_width=True):
+    speichere_szenario(aktuell, szenario_name)
 
-# --- Current scenario (B)
-szenario_b = calculate_financing_scenario(params, st_params_fam, st_params_sie)
 if "error" in szenario_b:
     st.success(f"🎉 {szenario_b['error']}")
+    render_performance_panel(messung)
     st.stop()
 
 # --- Tabs
-restschuld_b = get_restschuld_nach_jahren(szenario_b, cfg["Zinsbindung_Jahre"])  # precompute once
-sonder_j1_b = sum_sondertilgung_for_year(szenario_b["sondertilgungen"], 1)
-
-tab1, tab2 = st.tabs(["⚖️ Szenario-Vergleich", "📊 Detailanalyse (Aktuelles Szenario)"])
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["⚖️ Szenario-Vergleich", "📊 Detailanalyse (Aktuelles Szenario)", "🌡️ Sensitivität", "🎲 Anschlussfinanzierung"]
+)
 
 with tab1:
     render_comparison_tab(
-        szenario_b=szenario_b,
+        aktuell=aktuell,
         zinsbindung_jahre=cfg["Zinsbindung_Jahre"],
-        precomputed_restschuld=restschuld_b,
-        precomputed_sonder_j1=sonder_j1_b,
     )
 
 with tab2:
     render_analysis_tab(
-        szenario_b=szenario_b,
+        lauf=lauf,
+        zinsbindung_jahre=cfg["Zinsbindung_Jahre"],
+    )
+
+with tab3:
+    render_sensitivity_tab(
+        params=params,
+        st_params_fam=st_params_fam,
+        st_params_sie=st_params_sie,
         zinsbindung_jahre=cfg["Zinsbindung_Jahre"],
-    )
\ No newline at end of file
+        monatlich=cfg["monatlich"],
+        reihenfolge=lauf["reihenfolge"],
+    )
+
+with tab4:
+    render_montecarlo_tab(
+        params=params,
+        st_params_fam=st_params_fam,
+        st_params_sie=st_params_sie,
+        zinsbindung_jahre=cfg["Zinsbindung_Jahre"],
+        monatlich=cfg["monatlich"],
+        reihenfolge=lauf["reihenfolge"],
+    )
+
+render_performance_panel(messung)
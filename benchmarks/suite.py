@@ -0,0 +1,240 @@
+"""
+Benchmark suite for the hot paths of a Streamlit rerun.
+
+    python -m benchmarks run -o benchmarks/baseline.json         # Baseline speichern
+    python -m benchmarks run --vergleiche                         # gegen die eingecheckte Baseline
+    python -m benchmarks compare benchmarks/baseline.json neu.json --schwelle 0.2
+
+`benchmarks/baseline.json` is the committed reference (machine in its "meta"); refresh it
+on the machine that runs the check. A missing baseline or one without any benchmark in
+common with the run is an error, not a silent pass.
+
+Timings use `timeit` (best of several repeats, each long enough to dominate timer noise),
+run offline and need nothing beyond the app's own dependencies. Chart benchmarks are
+skipped when plotly is not installed.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+from core.calculations import calculate_financing_scenario, get_restschuld_nach_jahren, sum_sondertilgung_for_year
+from core.helpers import GROUPS, LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, PRODUCT_LABELS, loans_by_prefix
+from core.result import ScenarioResult
+from core.sondertilgung import SondertilgungPlan
+
+FORMAT_VERSION = 1
+BASELINE = Path(__file__).with_name("baseline.json")  # eingecheckte Referenz
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+PARAMS_LANG = PARAMS[:9] + [0.005, 0.005] + PARAMS[11:]  # 0,5 % Tilgung -> voller Horizont
+
+
+def _plaene(modus: str, kurz: bool) -> tuple:
+    """Sondertilgung plans for both parties: high yearly amounts (short run) or none after year 5."""
+    plaene = []
+    for loan_keys in (LOAN_KEYS_FAM, LOAN_KEYS_SIE):
+        jahre = MAX_JAHRE if kurz else 5
+        if modus == "Automatische Verteilung":
+            werte = np.zeros(MAX_JAHRE)
+            werte[:jahre] = 40_000.0 if kurz else 5_000.0
+        else:
+            werte = np.zeros((MAX_JAHRE, len(loan_keys)))
+            werte[:jahre, -1] = 30_000.0 if kurz else 5_000.0
+            werte[:jahre, 0] = 10_000.0 if kurz else 0.0
+        plaene.append(SondertilgungPlan(modus, loan_keys, werte))
+    return tuple(plaene)
+
+
+def _engine(params, modus: str, kurz: bool):
+    st_fam, st_sie = _plaene(modus, kurz)
+    return lambda: calculate_financing_scenario(params, st_fam, st_sie)
+
+
+def _frisch(szenario: ScenarioResult) -> ScenarioResult:
+    """Copy without memoized curves / sums, so every call measures the cold path."""
+    return ScenarioResult(szenario.loan_keys, szenario.plan, szenario.laufzeit, szenario.sondertilgung, szenario.kennzahlen)
+
+
+def _szenario() -> ScenarioResult:
+    return calculate_financing_scenario(PARAMS_LANG, *_plaene("Automatische Verteilung", False))
+
+
+def _restschuld():
+    szenario = _szenario()
+    return lambda: get_restschuld_nach_jahren(_frisch(szenario), 15)
+
+
+def _aggregation():
+    szenario = _szenario()
+
+    def lauf():
+        # Was die Detailanalyse pro Rerun aggregiert (ohne Streamlit-Ausgabe)
+        s = _frisch(szenario)
+        plaene = dict(s["tilgungsplaene"])
+        serien = {p: loans_by_prefix(plaene, f"{p}_") for p in GROUPS}
+        tabellen = [s.jahresuebersicht(p) for p in GROUPS] + [s.jahresuebersicht()]
+        return serien, tabellen, sum_sondertilgung_for_year(s["sondertilgungen"], 1)
+    return lauf
+
+
+def _stacked_area():
+    from charts.areas import make_stacked_area
+
+    plaene = dict(_szenario()["tilgungsplaene"])
+    serien = loans_by_prefix(plaene, "fam_")
+    return lambda: make_stacked_area(serien, "Restschuld", "Restschuld Ende", "Restschuld in €")
+
+
+def _coverage_pie():
+    from charts.pies import make_cost_coverage_pie
+
+    s = _szenario()
+    segmente = {"Eigenkapital": 150_000, "Zuschüsse": 10_000}
+    segmente.update({label: s["darlehen"][f"fam_{p}"] for p, label in PRODUCT_LABELS.items()})
+    return lambda: make_cost_coverage_pie(segmente, "Kosten & Deckung", cluster_mode="adjacent")
+
+
+# Name -> Aufbau (liefert die zu messende Funktion ohne Argumente)
+BENCHMARKS = {
+    "engine_auto_kurz": lambda: _engine(PARAMS, "Automatische Verteilung", True),
+    "engine_auto_50j": lambda: _engine(PARAMS_LANG, "Automatische Verteilung", False),
+    "engine_manuell_kurz": lambda: _engine(PARAMS, "Manuelle Eingabe", True),
+    "engine_manuell_50j": lambda: _engine(PARAMS_LANG, "Manuelle Eingabe", False),
+    "restschuld_nach_jahren": _restschuld,
+    "layout_aggregation": _aggregation,
+    "chart_stacked_area": _stacked_area,
+    "chart_coverage_pie": _coverage_pie,
+}
+
+
+def miss(funktion, wiederholungen: int = 5, mindestdauer: float = 0.2) -> dict:
+    """Seconds per call (min / median over `wiederholungen`, each batch >= mindestdauer)."""
+    timer = timeit.Timer(funktion)
+    anzahl = 1
+    while anzahl < 1_000_000 and timer.timeit(anzahl) < mindestdauer:
+        anzahl *= 2
+    zeiten = [t / anzahl for t in timer.repeat(wiederholungen, anzahl)]
+    return {"min": min(zeiten), "median": statistics.median(zeiten), "aufrufe": anzahl, "wiederholungen": wiederholungen}
+
+
+def run(auswahl=None, wiederholungen: int = 5, mindestdauer: float = 0.2, ausgabe=print) -> dict:
+    """Run the (optionally filtered) suite; returns the JSON-serializable report."""
+    ergebnisse, uebersprungen = {}, {}
+    for name, aufbau in BENCHMARKS.items():
+        if auswahl and not any(a in name for a in auswahl):
+            continue
+        try:
+            funktion = aufbau()
+        except ImportError as e:  # z. B. plotly nicht installiert
+            uebersprungen[name] = str(e)
+            ausgabe(f"{name:<26} übersprungen ({e})")
+            continue
+        ergebnisse[name] = miss(funktion, wiederholungen, mindestdauer)
+        ausgabe(f"{name:<26} {ergebnisse[name]['min'] * 1e3:10.3f} ms")
+    return {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "zeitpunkt": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plattform": platform.platform(),
+            "prozessor": platform.processor() or platform.machine(),
+        },
+        "benchmarks": ergebnisse,
+        "uebersprungen": uebersprungen,
+    }
+
+
+def vergleiche(basis: dict, neu: dict, schwelle: float = 0.2) -> list:
+    """
+    Compare two reports by best time per call.
+
+    Returns rows (name, basis_s, neu_s, verhaeltnis, status) with status "regression"
+    (slower by more than `schwelle`), "schneller", "ok", "neu" or "fehlt".
+    """
+    alt, jetzt = basis["benchmarks"], neu["benchmarks"]
+    zeilen = []
+    for name in list(alt) + [n for n in jetzt if n not in alt]:
+        if name not in jetzt:
+            zeilen.append((name, alt[name]["min"], None, None, "fehlt"))
+            continue
+        if name not in alt:
+            zeilen.append((name, None, jetzt[name]["min"], None, "neu"))
+            continue
+        verhaeltnis = jetzt[name]["min"] / alt[name]["min"]
+        if verhaeltnis > 1 + schwelle:
+            status = "regression"
+        elif verhaeltnis < 1 / (1 + schwelle):
+            status = "schneller"
+        else:
+            status = "ok"
+        zeilen.append((name, alt[name]["min"], jetzt[name]["min"], verhaeltnis, status))
+    return zeilen
+
+
+def _drucke_vergleich(zeilen: list) -> None:
+    ms = lambda s: "-" if s is None else f"{s * 1e3:.3f} ms"
+    print(f"{'Benchmark':<26} {'Basis':>12} {'Neu':>12} {'Faktor':>8}  Status")
+    for name, alt, neu, verhaeltnis, status in zeilen:
+        faktor = "-" if verhaeltnis is None else f"{verhaeltnis:.2f}x"
+        print(f"{name:<26} {ms(alt):>12} {ms(neu):>12} {faktor:>8}  {status}")
+
+
+def _lade(pfad: str) -> dict:
+    if not Path(pfad).is_file():
+        raise ValueError(f"{pfad}: Baseline fehlt (anlegen mit: python -m benchmarks run -o {pfad})")
+    bericht = json.loads(Path(pfad).read_text(encoding="utf-8"))
+    if bericht.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{pfad}: unbekanntes Format (version={bericht.get('version')!r})")
+    return bericht
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks der Rechen- und Darstellungspfade.")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+
+    p_run = befehle.add_parser("run", help="Benchmarks ausführen und als JSON speichern")
+    p_run.add_argument("-o", "--ausgabe", help="JSON-Datei für die Ergebnisse (z. B. benchmarks/baseline.json)")
+    p_run.add_argument("-k", "--auswahl", action="append", help="Nur Benchmarks, deren Name dies enthält (mehrfach möglich)")
+    p_run.add_argument("--wiederholungen", type=int, default=5)
+    p_run.add_argument("--mindestdauer", type=float, default=0.2, help="Sekunden pro Wiederholung (Standard: 0.2)")
+    p_run.add_argument("--vergleiche", nargs="?", const=str(BASELINE),
+                       help=f"Baseline-JSON, mit der direkt verglichen wird (ohne Pfad: {BASELINE.name})")
+    p_run.add_argument("--schwelle", type=float, default=0.2, help="Erlaubte Verlangsamung (0.2 = +20 %%)")
+
+    p_cmp = befehle.add_parser("compare", help="Zwei Ergebnis-JSONs vergleichen")
+    p_cmp.add_argument("basis")
+    p_cmp.add_argument("neu")
+    p_cmp.add_argument("--schwelle", type=float, default=0.2, help="Erlaubte Verlangsamung (0.2 = +20 %%)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.befehl == "run":
+            basis = _lade(args.vergleiche) if args.vergleiche else None
+            neu = run(args.auswahl, args.wiederholungen, args.mindestdauer)
+            if args.ausgabe:
+                Path(args.ausgabe).write_text(json.dumps(neu, indent=2) + "\n", encoding="utf-8")
+            if basis is None:
+                return 0
+        else:
+            basis, neu = _lade(args.basis), _lade(args.neu)
+    except (OSError, ValueError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 2
+
+    zeilen = vergleiche(basis, neu, args.schwelle)
+    _drucke_vergleich(zeilen)
+    if not any(z[1] is not None and z[2] is not None for z in zeilen):
+        print("\nFehler: keine gemeinsamen Benchmarks – nichts verglichen.", file=sys.stderr)
+        return 2
+    regressionen = [z[0] for z in zeilen if z[4] == "regression"]
+    if regressionen:
+        print(f"\n{len(regressionen)} Regression(en) über {args.schwelle:.0%}: {', '.join(regressionen)}", file=sys.stderr)
+        return 1
+    return 0
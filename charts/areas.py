@@ -2,15 +2,17 @@ import plotly.graph_objects as go
 from charts.colors import COLOR_MAP
 from core.helpers import PRODUCT_LABELS
 
-def make_stacked_area(series_dict: dict, title: str, y_col: str, y_title: str, percent: bool = False):
+def make_stacked_area(series_dict: dict, title: str, y_col: str, y_title: str, percent: bool = False, labels: dict | None = None):
     """
     series_dict: {name -> DataFrame(Jahr, <y_col>)} where 'name' is typically 'kfw297'/'kfw124'/'hausbank'
+    labels: optional {name -> display label} (defaults to PRODUCT_LABELS)
     If percent=True, uses 100% normalized area.
     """
+    labels = PRODUCT_LABELS if labels is None else labels
     fig = go.Figure()
     for name in sorted(series_dict.keys()):  # stable stacking order
         df = series_dict[name]
-        pretty = PRODUCT_LABELS.get(name, name.replace("_", " ").title())
+        pretty = labels.get(name, name.replace("_", " ").title())
         color = COLOR_MAP.get(pretty, None)
 
         fig.add_trace(
@@ -0,0 +1,26 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+def make_rate_fan(zinspfade: np.ndarray, title: str, zinsbindung_jahre: int | None = None):
+    """P5/P50/P95 band of simulated rate paths (shape (pfade, jahre + 1)), in percent."""
+    jahre = np.arange(zinspfade.shape[1])
+    p5, p50, p95 = (np.percentile(zinspfade, q, axis=0) * 100 for q in (5, 50, 95))
+    fig = go.Figure([
+        go.Scatter(x=jahre, y=p95, mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"),
+        go.Scatter(x=jahre, y=p5, mode="lines", line=dict(width=0), fill="tonexty",
+                   fillcolor="rgba(52, 152, 219, 0.25)", name="P5–P95"),
+        go.Scatter(x=jahre, y=p50, mode="lines", line=dict(color="#2980b9"), name="Median"),
+    ])
+    if zinsbindung_jahre:
+        fig.add_vline(x=zinsbindung_jahre, line_dash="dash", annotation_text="Ende Zinsbindung")
+    fig.update_layout(title=title, xaxis_title="Jahr", yaxis_title="Zins (%)")
+    return fig
+
+
+def make_histogram(werte: dict, title: str, x_title: str):
+    """Overlaid histograms, one per label in `werte` (label -> 1-D array)."""
+    fig = go.Figure([go.Histogram(x=v, name=label, opacity=0.6) for label, v in werte.items()])
+    fig.update_layout(title=title, barmode="overlay", xaxis_title=x_title, yaxis_title="Pfade",
+                      xaxis_tickprefix="€ ", xaxis_separatethousands=True)
+    return fig
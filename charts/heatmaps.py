@@ -0,0 +1,34 @@
+import plotly.graph_objects as go
+
+
+def make_sensitivity_heatmap(matrix, title: str, x_title: str, y_title: str, z_title: str,
+                             kontur: bool = False, punkt: tuple | None = None):
+    """
+    matrix: DataFrame (index = y values, columns = x values) as from core.sweep.sweep_matrix.
+    Axis values are rates (0.01 = 1 %) and shown in percent.
+    kontur=True draws a contour plot instead of a heatmap; punkt=(x, y) marks the current config.
+    """
+    x = [v * 100 for v in matrix.columns]
+    y = [v * 100 for v in matrix.index]
+    trace = go.Contour if kontur else go.Heatmap
+    fig = go.Figure(trace(
+        x=x,
+        y=y,
+        z=matrix.to_numpy(),
+        colorscale="Viridis",
+        colorbar=dict(title=z_title, tickprefix="€ "),
+        hovertemplate=f"{x_title}: %{{x:.1f}} %<br>{y_title}: %{{y:.1f}} %<br>{z_title}: € %{{z:,.0f}}<extra></extra>",
+    ))
+    if punkt is not None:
+        fig.add_trace(go.Scatter(
+            x=[punkt[0] * 100], y=[punkt[1] * 100], mode="markers",
+            marker=dict(symbol="x", size=12, color="white", line=dict(width=2, color="black")),
+            name="Aktuelle Konfiguration",
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=f"{x_title} (%)",
+        yaxis_title=f"{y_title} (%)",
+        showlegend=False,
+    )
+    return fig
@@ -20,7 +20,7 @@ COLOR_MAP = {
 def make_cost_coverage_pie(segments: dict, title: str, cluster_mode: str = "merged"):
     """
     segments: mapping label -> value
-      expected keys: "Eigenkapital", "Zuschüsse", "KfW 297", "KfW 124", "Hausbank"
+      "Eigenkapital", "Zuschüsse", then one entry per loan product (e.g. "KfW 297", "KfW 124", "Hausbank")
 
     cluster_mode:
       - "merged": combine EK+Zuschüsse into a single wedge labeled "Eigenmittel" (default)
@@ -30,12 +30,12 @@ def make_cost_coverage_pie(segments: dict, title: str, cluster_mode: str = "merg
 
     if cluster_mode == "merged":
         eigenmittel = seg.get("Eigenkapital", 0.0) + seg.get("Zuschüsse", 0.0)
-        order = ["Eigenmittel", "KfW 297", "KfW 124", "Hausbank"]
+        order = ["Eigenmittel"] + [lbl for lbl in seg if lbl not in ("Eigenkapital", "Zuschüsse")]
         labels = [lbl for lbl in order if (lbl == "Eigenmittel" and eigenmittel > 0) or (lbl in seg and seg[lbl] > 0)]
         values = [eigenmittel if lbl == "Eigenmittel" else seg.get(lbl, 0.0) for lbl in labels]
     else:  # "adjacent"
         # Put the two green wedges next to each other, then loans
-        order = ["Eigenkapital", "Zuschüsse", "KfW 297", "KfW 124", "Hausbank"]
+        order = ["Eigenkapital", "Zuschüsse"] + [lbl for lbl in seg if lbl not in ("Eigenkapital", "Zuschüsse")]
         labels = [lbl for lbl in order if seg.get(lbl, 0.0) > 0]
         values = [seg[lbl] for lbl in labels]
 
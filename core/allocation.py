@@ -0,0 +1,88 @@
+import numpy as np
+
+# Ab dieser Restschuld nimmt ein Darlehen keine Sondertilgung mehr an
+EPS = 0.01
+
+
+def zins_stufen(zinsen) -> list:
+    """
+    Group loan indices into tiers of equal rate, highest rate first.
+
+    Rates are fixed for a run, so the order is computed once (O(k log k)) and reused every year.
+    """
+    stufen = {}
+    for i, z in sorted(enumerate(zinsen), key=lambda iz: -iz[1]):
+        stufen.setdefault(z, []).append(i)
+    return list(stufen.values())
+
+
+def verteile_sondertilgung(betrag: float, restschulden: list, stufen: list, obergrenzen: list | None = None) -> list:
+    """
+    Split a yearly Sondertilgung over loans: most expensive tier first, pro rata to the
+    Restschuld within a tier, each loan capped at min(Restschuld, Obergrenze).
+
+    One pass over the pre-sorted tiers; inside a tier the caps are resolved by water-filling
+    in order of cap/Restschuld, so ties cost O(t log t). Returns amounts aligned with `restschulden`.
+    Money that no loan can take (all paid off or capped) is left unallocated.
+    """
+    gezahlt = [0.0] * len(restschulden)
+    st_left = betrag
+    for stufe in stufen:
+        if not st_left > EPS:
+            break
+        offen = [i for i in stufe if restschulden[i] > EPS]
+        if not offen:
+            continue
+        grenze = {i: restschulden[i] if obergrenzen is None else min(restschulden[i], obergrenzen[i]) for i in offen}
+        pool, gewicht = st_left, sum(restschulden[i] for i in offen)
+        # Kappung zuerst für die Kredite, deren Grenze relativ zur Restschuld am kleinsten ist
+        reihenfolge = sorted(offen, key=lambda i: grenze[i] / restschulden[i])
+        for n, i in enumerate(reihenfolge):
+            if pool * (restschulden[i] / gewicht) < grenze[i]:
+                # Alle weiteren liegen unter ihrer Grenze: proportional verteilen, Stufe fertig
+                for j in reihenfolge[n:]:
+                    b = pool * (restschulden[j] / gewicht)
+                    gezahlt[j] += b
+                    st_left -= b
+                break
+            gezahlt[i] += grenze[i]
+            st_left -= grenze[i]
+            pool -= grenze[i]
+            gewicht -= restschulden[i]
+    return gezahlt
+
+
+def verteile_sondertilgung_batch(betrag: np.ndarray, restschulden: np.ndarray, zinsen: np.ndarray,
+                                 obergrenzen: np.ndarray | None = None) -> np.ndarray:
+    """
+    Vectorized `verteile_sondertilgung` for n scenarios: betrag (n,), restschulden / zinsen /
+    obergrenzen (n, k). Returns the paid amounts (n, k).
+
+    Tiers are processed from the highest rate down; within a tier the capped set is found
+    by a fixpoint iteration (at most k rounds) instead of a per-scenario sort.
+    """
+    rs = np.asarray(restschulden, dtype=float)
+    grenze = rs if obergrenzen is None else np.minimum(rs, obergrenzen)
+    st_left = np.asarray(betrag, dtype=float).copy()
+    offen = rs > EPS
+    gezahlt = np.zeros_like(rs)
+    for _ in range(rs.shape[1]):
+        laufend = (st_left > EPS) & offen.any(axis=1)
+        if not laufend.any():
+            break
+        z = np.where(offen, zinsen, -np.inf)
+        top = offen & (z == z.max(axis=1, keepdims=True)) & laufend[:, None]
+        gekappt = np.zeros_like(top)
+        for _ in range(rs.shape[1]):
+            pool = st_left - np.where(gekappt, grenze, 0.0).sum(axis=1)
+            gewicht = np.where(top & ~gekappt, rs, 0.0).sum(axis=1)
+            anteil = pool[:, None] * np.divide(rs, gewicht[:, None], out=np.zeros_like(rs), where=gewicht[:, None] > 0)
+            neu = top & ~gekappt & (anteil >= grenze)
+            if not neu.any():
+                break
+            gekappt |= neu
+        b = np.where(gekappt, grenze, np.where(top, anteil, 0.0))
+        gezahlt += b
+        st_left -= b.sum(axis=1)
+        offen &= ~top
+    return gezahlt
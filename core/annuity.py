@@ -0,0 +1,130 @@
+import numpy as np
+
+# Ab dieser Restschuld gilt ein Darlehen als getilgt (wie in der Jahresschleife der Engine)
+EPS = 0.01
+
+
+def _rs_offen(summe, zins, jahresrate, n):
+    """Closed-form balance after n regular annual payments, without the payoff cap (may go negative)."""
+    q_n = np.power(1.0 + zins, n)
+    mit_zins = summe * q_n - jahresrate * np.divide(q_n - 1.0, zins, out=np.zeros_like(q_n), where=zins != 0)
+    ohne_zins = summe - jahresrate * n
+    rs = np.where(zins != 0, mit_zins, ohne_zins)
+    # Rate deckt die Zinsen nicht: Tilgung ist 0, die Restschuld bleibt stehen
+    return np.where(jahresrate <= summe * zins, summe, rs)
+
+
+def _arrays(*werte):
+    return np.broadcast_arrays(*[np.asarray(w, dtype=float) for w in werte])
+
+
+def annuitaet_tilgungsjahr(summe, zins, jahresrate):
+    """
+    Year in which a loan without Sondertilgung is paid off (last year with a plan row), O(1).
+
+    Returns 0 for loans that never run (summe <= EPS) and inf if the rate never covers the interest.
+    Broadcasts over array inputs.
+    """
+    summe, zins, jahresrate = _arrays(summe, zins, jahresrate)
+    stagniert = jahresrate <= summe * zins
+    with np.errstate(divide="ignore", invalid="ignore"):
+        verhaeltnis = (jahresrate - EPS * zins) / (jahresrate - summe * zins)
+        n = np.where(
+            zins != 0,
+            np.ceil(np.log(verhaeltnis) / np.log1p(zins)),
+            np.ceil((summe - EPS) / jahresrate),
+        )
+    n = np.where(stagniert | ~np.isfinite(n), 1.0, np.maximum(n, 1.0))
+    # Rundungsfehler des Logarithmus an ganzzahligen Grenzen korrigieren
+    n = np.where((n > 1) & (_rs_offen(summe, zins, jahresrate, n - 1) <= EPS), n - 1, n)
+    n = np.where(_rs_offen(summe, zins, jahresrate, n) > EPS, n + 1, n)
+    n = np.where(stagniert, np.inf, n)
+    return np.where(summe <= EPS, 0.0, n)
+
+
+def annuitaet_jahreswerte(summe, zins, jahresrate, jahr):
+    """
+    Plan row of year `jahr` (1-based) for a loan without Sondertilgung, computed in O(1).
+
+    Returns (Restschuld Start, Zinsen p.a., Tilgung p.a., Restschuld Ende) with the same
+    arithmetic as the engine's year loop. Only meaningful up to `annuitaet_tilgungsjahr`.
+    """
+    summe, zins, jahresrate, jahr = _arrays(summe, zins, jahresrate, jahr)
+    start = np.maximum(_rs_offen(summe, zins, jahresrate, jahr - 1.0), 0.0)
+    zinsen = start * zins
+    tilgung = np.minimum(np.maximum(jahresrate - zinsen, 0.0), start)
+    return start, zinsen, tilgung, start - tilgung
+
+
+def annuitaet_restschuld(summe, zins, jahresrate, jahre):
+    """Restschuld at the end of year `jahre` (0 once the loan is paid off), O(1) per loan."""
+    summe, zins, jahresrate, jahre = _arrays(summe, zins, jahresrate, jahre)
+    ende = annuitaet_jahreswerte(summe, zins, jahresrate, np.maximum(jahre, 1.0))[3]
+    ende = np.where(jahre > annuitaet_tilgungsjahr(summe, zins, jahresrate), 0.0, ende)
+    return np.where(jahre < 1, summe, ende)
+
+
+def annuitaet_zinskosten(summe, zins, jahresrate, jahre=None):
+    """
+    Cumulative interest paid up to the end of year `jahre` (default: until payoff), O(1) per loan.
+
+    Uses Z_m = (m - 1) * A - summe + (1 + zins) * RS_{m-1}, which follows from summing
+    Zinsen = Tilgung - A over the regular years; the payoff year only pays interest on RS_{m-1}.
+    """
+    summe, zins, jahresrate = _arrays(summe, zins, jahresrate)
+    ende = annuitaet_tilgungsjahr(summe, zins, jahresrate)
+    m = ende if jahre is None else np.minimum(np.asarray(jahre, dtype=float), ende)
+    m = np.maximum(m, 0.0)
+    with np.errstate(invalid="ignore"):
+        m_endlich = np.where(np.isfinite(m), m, 1.0)
+        rs_vor = _rs_offen(summe, zins, jahresrate, np.maximum(m_endlich - 1.0, 0.0))
+        z = (m_endlich - 1.0) * jahresrate - summe + (1.0 + zins) * rs_vor
+        z = np.where(jahresrate <= summe * zins, m_endlich * summe * zins, z)
+    z = np.where(np.isfinite(m), z, np.inf)
+    return np.where(m <= 0, 0.0, z)
+
+
+def annuitaet_plan(summe: float, zins: float, jahresrate: float, max_jahre: int) -> dict:
+    """Full yearly plan columns (same keys as the engine's plan rows) up to payoff or `max_jahre`."""
+    ende = annuitaet_tilgungsjahr(summe, zins, jahresrate)
+    jahre = np.arange(1, int(min(ende, max_jahre)) + 1)
+    start, zinsen, tilgung, rs_ende = annuitaet_jahreswerte(summe, zins, jahresrate, jahre)
+    return {
+        "Jahr": jahre,
+        "Restschuld Start": start,
+        "Zinsen p.a.": zinsen,
+        "Tilgung p.a.": tilgung,
+        "Sondertilgung": np.zeros(len(jahre)),
+        "Restschuld Ende": rs_ende,
+    }
+
+
+def annuitaet_monatsjahr(restschuld, zins, monatsrate, monate: int = 12):
+    """
+    One year of monthly annuity payments (interest zins / 12 per month) from the balances
+    at the start of the year, in closed form and broadcast over loans.
+
+    A month is paid while its starting balance exceeds EPS; the last payment is capped at
+    the balance. Returns the yearly sums (Zinsen, Tilgung) and the Restschuld at year end.
+    """
+    rs, zins, rate = _arrays(restschuld, zins, monatsrate)
+    r = zins / 12.0
+    offen = rs > EPS
+    ende = _rs_offen(rs, r, rate, monate)
+    # Rate deckt die Zinsen nicht: keine Tilgung, Zinsen laufen auf die stehende Restschuld
+    zinsen = np.where(rate <= rs * r, monate * rs * r, monate * rate - (rs - ende))
+    zinsen = np.where(offen, zinsen, 0.0)
+    ende = np.where(offen, ende, rs)
+
+    # Darlehen, die in diesem Jahr getilgt werden: Monatsverlauf bis zur letzten Rate
+    getilgt = offen & (ende <= EPS)
+    if getilgt.any():
+        rs_t, r_t, rate_t = rs[getilgt], r[getilgt], rate[getilgt]
+        verlauf = _rs_offen(rs_t[:, None], r_t[:, None], rate_t[:, None], np.arange(monate + 1))
+        m = (verlauf[:, :-1] > EPS).sum(axis=1)  # bezahlte Monate (Verlauf fällt monoton)
+        vor = verlauf[np.arange(len(m)), m - 1]
+        nach = verlauf[np.arange(len(m)), m]
+        zahlungen = np.where(nach < 0, (m - 1) * rate_t + vor * (1.0 + r_t), m * rate_t)
+        ende[getilgt] = np.maximum(nach, 0.0)
+        zinsen[getilgt] = zahlungen - (rs_t - ende[getilgt])
+    return zinsen, rs - ende, ende
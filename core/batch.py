@@ -0,0 +1,196 @@
+import numpy as np
+
+from .allocation import verteile_sondertilgung_batch
+from .annuity import annuitaet_monatsjahr
+from .helpers import MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from .profiling import span
+from .registry import Kreditregister, standard_register
+from .sondertilgung import SondertilgungPlan
+
+# Reihenfolge der Felder in `params` (identisch zu calculate_financing_scenario)
+PARAM_FIELDS = (
+    "kosten_fam", "ek_fam", "zus_fam",
+    "kosten_sie", "ek_sie", "zus_sie",
+    "z_kfw297", "z_kfw124", "z_hausbank",
+    "tilgung_fam", "tilgung_sie",
+    "max_kfw297", "max_kfw124",
+)
+
+# Jahreswerte je Kredit bei details=True (n, MAX_JAHRE, loans), in der Reihenfolge von PLAN_FELDER
+DETAIL_FELDER = ("restschuld_start_kredit", "zinsen_kredit", "tilgung_kredit", "sondertilgung_kredit", "restschuld_kredit")
+
+
+def _st_eingabe(st_params, n: int, k: int):
+    """
+    Normalize a plan or (modus, werte[, max_quote]) of a party with k loans to broadcast arrays.
+
+    Returns (modus, werte, max_quote); None / unknown modes mean no Sondertilgung, a
+    max_quote of None means no yearly cap.
+    """
+    if st_params is None:
+        return None, None, None
+    if isinstance(st_params, SondertilgungPlan):
+        modus, werte, quote = st_params.modus, st_params.werte, st_params.max_quote
+    else:
+        modus, werte, quote = (*st_params, None)[:3]
+    if quote is not None:
+        quote = np.broadcast_to(np.asarray(quote, dtype=float), (n,))
+        quote = np.where(quote > 0, quote, np.inf)  # 0 = unbegrenzt
+    if modus == ST_MODUS_AUTO:
+        return modus, np.broadcast_to(np.asarray(werte, dtype=float), (n, MAX_JAHRE)), quote
+    if modus == ST_MODUS_MANUELL:
+        return modus, np.broadcast_to(np.asarray(werte, dtype=float), (n, MAX_JAHRE, k)), quote
+    return None, None, None
+
+
+def amortisiere(summen: np.ndarray, zins: np.ndarray, jahresraten: np.ndarray, laufend: np.ndarray,
+                sonder_params: list, details: bool = False, monatlich: bool = False, jahre: int = MAX_JAHRE) -> dict:
+    """
+    Vectorized amortization kernel over scenarios x loans, one step per year.
+
+    summen / zins / jahresraten: (n, L). laufend: (n,) scenarios to amortize.
+    sonder_params: per party (loan indices, modus, werte, obergrenzen (n, k) or None).
+    monatlich: monthly interest, the 12 months of a year rolled up in closed form.
+    jahre: stop after this many years (later columns stay 0, Zinskosten cover these years only).
+    Cost is O(n * L * MAX_JAHRE) regardless of how the loans are grouped into parties.
+    """
+    n, n_kredite = summen.shape
+    rs = summen.copy()
+    laufend = laufend.copy()
+    zinskosten = np.zeros((n, n_kredite))
+    restschuld = np.zeros((n, MAX_JAHRE))
+    sondertilgung = np.zeros((n, MAX_JAHRE))
+    if details:
+        kredit = {feld: np.zeros((n, MAX_JAHRE, n_kredite)) for feld in DETAIL_FELDER}
+
+    for j in range(min(jahre, MAX_JAHRE)):
+        laufend &= ~(rs < 0.01).all(axis=1)
+        if not laufend.any():
+            break
+        aktiv = (rs > 0.01) & laufend[:, None]
+        if details:
+            kredit["restschuld_start_kredit"][:, j] = np.where(aktiv, rs, 0.0)
+
+        # Reguläre Zahlungen p.a.
+        if monatlich:
+            zinsen, tilg, _ = annuitaet_monatsjahr(rs, zins, jahresraten / 12.0)
+            zinsen = np.where(aktiv, zinsen, 0.0)
+            tilg = np.where(aktiv, tilg, 0.0)
+        else:
+            zinsen = np.where(aktiv, rs * zins, 0.0)
+            tilg = np.where(aktiv, np.minimum(np.maximum(jahresraten - zinsen, 0.0), rs), 0.0)
+        rs -= tilg
+        zinskosten += zinsen
+
+        # Sondertilgung pro Partei
+        st_jahr = np.zeros((n, n_kredite))
+        for idx, modus, st_werte, grenzen in sonder_params:
+            if modus == ST_MODUS_AUTO:
+                betrag = np.where(laufend, np.nan_to_num(st_werte[:, j]), 0.0)
+                st_jahr[:, idx] = verteile_sondertilgung_batch(betrag, rs[:, idx], zins[:, idx], grenzen)
+            elif modus == ST_MODUS_MANUELL:
+                w = np.nan_to_num(st_werte[:, j, :])
+                obergrenze = rs[:, idx] if grenzen is None else np.minimum(rs[:, idx], grenzen)
+                st_jahr[:, idx] = np.where((w > 0) & laufend[:, None], np.minimum(w, obergrenze), 0.0)
+        rs -= st_jahr
+
+        rs_ende = np.where(aktiv, rs, 0.0)
+        restschuld[:, j] = rs_ende.sum(axis=1)
+        sondertilgung[:, j] = st_jahr.sum(axis=1)
+        if details:
+            kredit["zinsen_kredit"][:, j] = zinsen
+            kredit["tilgung_kredit"][:, j] = tilg
+            kredit["sondertilgung_kredit"][:, j] = st_jahr
+            kredit["restschuld_kredit"][:, j] = rs_ende
+
+    ergebnis = {"zinskosten": zinskosten, "restschuld": restschuld, "sondertilgung": sondertilgung}
+    if details:
+        ergebnis.update(kredit)
+    return ergebnis
+
+
+def calculate_scenarios_batch(register: Kreditregister, st_params: dict | None = None, details: bool = False,
+                              monatlich: bool = False, jahre: int = MAX_JAHRE, summen: np.ndarray | None = None) -> dict:
+    """
+    Evaluate many scenarios of a register whose numeric fields are scalars or (n,) arrays.
+
+    st_params: {party key -> None, a `SondertilgungPlan` shared by all scenarios, or
+        (modus, werte[, max_quote]) with per-scenario werte of shape (n, MAX_JAHRE) for
+        "Automatische Verteilung" and (n, MAX_JAHRE, products) for "Manuelle Eingabe"}.
+
+    Returns columnar arrays; row i matches `calculate_scenario` for scenario i. Column j of
+    "restschuld" / "sondertilgung" belongs to Jahr j + 1. Scenarios without financing need
+    are flagged in "keine_finanzierung" (the scalar engine returns an error).
+    With details=True the per-loan arrays (n, MAX_JAHRE, loans) of DETAIL_FELDER are included
+    as well, i.e. the PLAN_FELDER of every loan's yearly schedule (0 outside its Laufzeit).
+    monatlich: monthly interest as in `calculate_scenario`.
+    jahre: amortize only the first `jahre` years (e.g. up to the Zinsbindung; see `amortisiere`).
+    summen: loan amounts (n, loans) to use instead of the register's allocation, e.g. candidate
+        splits of one scenario (the register's fields then stay scalar).
+    """
+    st_params = st_params or {}
+    summen = np.atleast_2d(register.aufteilung() if summen is None else np.asarray(summen, dtype=float))
+    n = summen.shape[0]
+    bedarf = np.broadcast_to(np.atleast_2d(register.bedarf()), (n, len(register.parteien)))
+    zins = np.broadcast_to(register.zinsen(), summen.shape)
+    monatsraten = np.atleast_2d(register.monatsraten(summen))
+    keine_finanzierung = (bedarf <= 0.0).all(axis=1)
+
+    sonder_params = []
+    for partei in register.parteien:
+        idx = register.indizes_der_partei(partei.key)
+        modus, st_werte, quote = _st_eingabe(st_params.get(partei.key), n, len(idx))
+        if modus is None:
+            continue
+        grenzen = None
+        if quote is not None:  # unbegrenzt (inf) bleibt inf, auch bei Darlehen von 0 €
+            grenzen = np.full((n, len(idx)), np.inf)
+            np.multiply(quote[:, None], summen[:, idx], out=grenzen, where=np.isfinite(quote)[:, None])
+        sonder_params.append((idx, modus, st_werte, grenzen))
+
+    with span("batch: tilgung"):
+        verlauf = amortisiere(summen, zins, monatsraten * 12, ~keine_finanzierung, sonder_params, details, monatlich, jahre)
+    zinskosten = verlauf.pop("zinskosten")
+
+    ergebnis = {
+        "loan_keys": register.loan_keys,
+        "keine_finanzierung": keine_finanzierung,
+        "gesamtkosten": sum(np.asarray(p.kosten, dtype=float) for p in register.parteien) + np.zeros(n),
+        "finanzierungsbedarf": bedarf.sum(axis=1),
+    }
+    for i, partei in enumerate(register.parteien):
+        ergebnis[f"finanzierungsbedarf_{partei.key}"] = bedarf[:, i]
+    parteien = {p.key: register.indizes_der_partei(p.key) for p in register.parteien}
+    ergebnis.update({
+        "darlehen": summen,
+        "monatsraten": monatsraten,
+        "monatsraten_partei": {p: monatsraten[:, idx].sum(axis=1) for p, idx in parteien.items()},
+        "gesamtrate": monatsraten.sum(axis=1),
+        "gesamte_zinskosten": zinskosten.sum(axis=1),
+        "zinskosten_partei": {p: zinskosten[:, idx].sum(axis=1) for p, idx in parteien.items()},
+        **verlauf,
+    })
+    return ergebnis
+
+
+def calculate_financing_scenarios_batch(params, st_fam=None, st_sie=None, details: bool = False,
+                                        monatlich: bool = False, jahre: int = MAX_JAHRE,
+                                        reihenfolge: dict | None = None) -> dict:
+    """
+    Evaluate many two-party financing scenarios at once.
+
+    params: 13 array-likes (or scalars) in the order of PARAM_FIELDS, broadcast to n scenarios.
+    st_fam / st_sie: see `calculate_scenarios_batch` (three loans per party).
+    reihenfolge: allocation order per party for all scenarios (None = KfW waterfall).
+
+    Returns columnar arrays; row i matches `calculate_financing_scenario` for scenario i.
+    """
+    if len(params) != len(PARAM_FIELDS):
+        raise ValueError(f"Erwartet {len(PARAM_FIELDS)} Parameter, erhalten: {len(params)}")
+    werte = np.broadcast_arrays(*[np.atleast_1d(np.asarray(p, dtype=float)) for p in params])
+    if werte[0].ndim != 1:
+        raise ValueError("Parameter müssen skalar oder eindimensional sein.")
+    return calculate_scenarios_batch(
+        standard_register(werte, reihenfolge), {"fam": st_fam, "sie": st_sie}, details=details, monatlich=monatlich,
+        jahre=jahre,
+    )
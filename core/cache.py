@@ -0,0 +1,164 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .calculations import calculate_financing_scenario
+from .helpers import ist_dataframe
+from .profiling import span
+from .result import ScenarioResult
+from .sondertilgung import SondertilgungPlan
+
+
+def _hash_table(h, df) -> None:
+    if not ist_dataframe(df):
+        h.update(b"<keine Tabelle>")
+        return
+    import pandas as pd
+
+    h.update("\x1f".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+
+def scenario_fingerprint(params, st_params_fam, st_params_sie, monatlich: bool = False,
+                         reihenfolge: dict | None = None) -> str:
+    """
+    Stable content hash of the engine inputs: the 13 params, the interest period, the allocation
+    order (if not the waterfall) and mode and contents of both Sondertilgung inputs.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.asarray([float(p) for p in params], dtype=float).tobytes())
+    if monatlich:
+        h.update(b"monatlich\x1e")
+    for partei, keys in sorted((reihenfolge or {}).items()):
+        h.update(f"reihenfolge\x1e{partei}\x1e".encode() + "\x1f".join(keys).encode() + b"\x1e")
+    for st_params in (st_params_fam, st_params_sie):
+        if isinstance(st_params, SondertilgungPlan):
+            h.update(b"plan\x1e" + str(st_params.modus).encode() + b"\x1e" + "\x1f".join(st_params.loan_keys).encode())
+            h.update(f"\x1e{st_params.max_quote!r}\x1e".encode())
+            h.update(st_params.werte.tobytes())
+            continue
+        modus, st_df = st_params
+        h.update(str(modus).encode() + b"\x1e")
+        _hash_table(h, st_df)
+    return h.hexdigest()
+
+
+def result_nbytes(szenario) -> int:
+    """Approximate memory footprint of an engine result (plan arrays plus checkpoints and their Sondertilgung plans)."""
+    nbytes = 4096  # Kennzahlen-Dicts, Floats
+    if isinstance(szenario, ScenarioResult):
+        nbytes += szenario.nbytes
+        verlauf = szenario.get("_verlauf")
+        if verlauf:
+            nbytes += sum(verlauf[f].nbytes for f in ("restschulden", "zinskosten", "laufzeit"))
+            plaene = {id(p): p for p in verlauf["st"]}  # beide Parteien können denselben Plan nutzen
+            nbytes += sum(p.werte.nbytes for p in plaene.values())
+    return nbytes
+
+
+class ScenarioCache:
+    """
+    LRU cache for engine results, bounded by entry count and byte budget.
+
+    One instance is shared by all Streamlit sessions of the server process, hence the lock.
+    Cached results are shared objects and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._eintraege = OrderedDict()  # fingerprint -> (szenario, nbytes, params)
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
+
+    def get(self, key: str):
+        with self._lock:
+            eintrag = self._eintraege.get(key)
+            if eintrag is None:
+                self.misses += 1
+                return None
+            self._eintraege.move_to_end(key)
+            self.hits += 1
+            return eintrag[0]
+
+    def basis(self, params):
+        """Most recently used result with identical params (checkpoint source for incremental runs)."""
+        params = tuple(float(p) for p in params)
+        with self._lock:
+            for szenario, _, p in reversed(self._eintraege.values()):
+                if p == params:
+                    return szenario
+        return None
+
+    def put(self, key: str, szenario: dict, params=None) -> None:
+        nbytes = result_nbytes(szenario)
+        params = tuple(float(p) for p in params) if params is not None else None
+        with self._lock:
+            if key in self._eintraege:
+                self.nbytes -= self._eintraege.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return  # passt nie ins Budget
+            self._eintraege[key] = (szenario, nbytes, params)
+            self.nbytes += nbytes
+            while len(self._eintraege) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, alt, _) = self._eintraege.popitem(last=False)
+                self.nbytes -= alt
+                self.evictions += 1
+
+    def objekt_ids(self) -> frozenset:
+        """Ids of the cached results (shared by all sessions, e.g. excluded from session memory reports)."""
+        with self._lock:
+            return frozenset(id(e[0]) for e in self._eintraege.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._eintraege.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._eintraege),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def calculate(self, params, st_params_fam, st_params_sie, monatlich: bool = False,
+                  reihenfolge: dict | None = None) -> dict:
+        """
+        `calculate_financing_scenario` with lookup by input fingerprint.
+
+        On a miss, a cached result with the same params serves as checkpoint basis, so
+        edits of later Sondertilgung years only recompute from the first changed year.
+        """
+        with span("cache: fingerprint"):
+            key = scenario_fingerprint(params, st_params_fam, st_params_sie, monatlich, reihenfolge)
+        szenario = self.get(key)
+        if szenario is None:
+            szenario = calculate_financing_scenario(
+                params, st_params_fam, st_params_sie, basis=self.basis(params), monatlich=monatlich,
+                reihenfolge=reihenfolge, checkpoint=True,
+            )
+            self.put(key, szenario, params)
+        return szenario
+
+
+# Prozessweiter Cache (von allen Sessions geteilt)
+DEFAULT_CACHE = ScenarioCache()
+
+
+def cached_financing_scenario(params, st_params_fam, st_params_sie, cache: ScenarioCache | None = None,
+                              monatlich: bool = False, reihenfolge: dict | None = None) -> dict:
+    return (cache if cache is not None else DEFAULT_CACHE).calculate(
+        params, st_params_fam, st_params_sie, monatlich, reihenfolge
+    )
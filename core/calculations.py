@@ -1,239 +1,283 @@
-import pandas as pd
-from .helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE
-
-
-def calculate_financing_scenario(params, st_params_fam, st_params_sie):
-    (
-        kosten_fam,
-        ek_fam,
-        zus_fam,
-        kosten_sie,
-        ek_sie,
-        zus_sie,
-        z_kfw297,
-        z_kfw124,
-        z_hausbank,
-        tilgung_fam,
-        tilgung_sie,
-        max_kfw297,
-        max_kfw124,
-    ) = params
-
-    st_modus_fam, st_df_fam = st_params_fam
-    st_modus_sie, st_df_sie = st_params_sie
-
-    # Parteiweise Finanzierungsbedarf
-    finanzbedarf_fam = max(float(kosten_fam) - float(ek_fam) - float(zus_fam), 0.0)
-    finanzbedarf_sie = max(float(kosten_sie) - float(ek_sie) - float(zus_sie), 0.0)
-    if finanzbedarf_fam <= 0.0 and finanzbedarf_sie <= 0.0:
-        return {"error": "Keine Finanzierung notwendig."}
-
-    # Kreditaufteilung
-    darlehen_details = [
-        {"key": "fam_kfw297", "zins": z_kfw297},
-        {"key": "fam_kfw124", "zins": z_kfw124},
-        {"key": "fam_hausbank", "zins": z_hausbank},
-        {"key": "sie_kfw297", "zins": z_kfw297},
-        {"key": "sie_kfw124", "zins": z_kfw124},
-        {"key": "sie_hausbank", "zins": z_hausbank},
-    ]
-    darlehen = {}
-
-    # Familie
-    darlehen["fam_kfw297"] = min(finanzbedarf_fam, 2 * max_kfw297)
-    rest_fam = finanzbedarf_fam - darlehen["fam_kfw297"]
-    darlehen["fam_kfw124"] = min(rest_fam, max_kfw124)
-    darlehen["fam_hausbank"] = max(0.0, rest_fam - darlehen["fam_kfw124"])
-
-    # Sie
-    darlehen["sie_kfw297"] = min(finanzbedarf_sie, 2 * max_kfw297)
-    rest_sie = finanzbedarf_sie - darlehen["sie_kfw297"]
-    darlehen["sie_kfw124"] = min(rest_sie, max_kfw124)
-    darlehen["sie_hausbank"] = max(0.0, rest_sie - darlehen["sie_kfw124"])
-
-    for d in darlehen_details:
-        d["summe"] = darlehen[d["key"]]
-
-    # Monatsraten (per party Anfangstilgung)
-    monatsraten = {}
-    gesamtrate = 0.0
-    for d in darlehen_details:
-        key, summe, zins = d["key"], d["summe"], d["zins"]
-        if summe > 0:
-            t = tilgung_fam if key.startswith("fam_") else tilgung_sie
-            rate = summe * ((zins + t) / 12.0)
-            monatsraten[key] = rate
-            gesamtrate += rate
+import time
+
+import numpy as np
+
+from .allocation import verteile_sondertilgung, zins_stufen
+from .annuity import annuitaet_monatsjahr, annuitaet_plan, annuitaet_tilgungsjahr, annuitaet_zinskosten
+from .helpers import MAX_JAHRE, ST_MODUS_AUTO, ist_dataframe
+from .profiling import aktuell, span
+from .registry import Kreditregister, standard_register
+from .result import PLAN_FELDER, ScenarioResult
+from .sondertilgung import SondertilgungPlan
+
+# Erhöhen, wenn sich Ergebnisse der Engine für gleiche Eingaben ändern (dauerhaft gespeicherte Ergebnisse)
+ENGINE_VERSION = 1
+
+
+def _erstes_geaendertes_jahr(st_alt: tuple, st_neu: tuple) -> int:
+    """First year whose Sondertilgung plans differ (MAX_JAHRE + 1 if none)."""
+    return min(alt.erstes_abweichendes_jahr(neu) for alt, neu in zip(st_alt, st_neu))
+
+
+def _checkpoint(basis, params: tuple, st_eingaben: tuple, annuitaeten: dict, monatlich: bool = False):
+    """
+    Latest usable start-of-year checkpoint of a previous run with identical params.
+
+    Everything before the first year with changed Sondertilgung inputs is unaffected by
+    the change, so the run can resume there. Returns (jahr, verlauf) or None.
+    """
+    verlauf = basis.get("_verlauf") if isinstance(basis, ScenarioResult) else None
+    if not verlauf or verlauf["params"] != params or verlauf["annuitaeten"] != frozenset(annuitaeten):
+        return None
+    if verlauf.get("monatlich", False) != monatlich:
+        return None
+    jahr = min(_erstes_geaendertes_jahr(verlauf["st"], st_eingaben), verlauf["jahre"])
+    return (jahr, verlauf) if jahr > 1 else None
+
+
+def calculate_scenario(register: Kreditregister, st_params: dict | None = None, basis: ScenarioResult | None = None,
+                       monatlich: bool = False, vorgabe: dict | None = None, checkpoint: bool = False):
+    """
+    Compute allocation, Monatsraten and yearly plans for any parties x products register.
+
+    Returns a `ScenarioResult` (dict-like, plans as arrays) or {"error": ...} if nothing is financed.
+
+    st_params: {party key -> compiled `SondertilgungPlan` or (modus, DataFrame) pair}; parties
+    without an entry make no Sondertilgung.
+    basis: optional earlier result with the same register; the run then resumes from its
+    checkpoint at the first year whose Sondertilgung inputs changed instead of year 1.
+    monatlich: charge interest monthly (zins / 12 on the running balance, 12 Monatsraten p.a.)
+    instead of once per year on the Restschuld at the start of the year. Months are rolled up
+    in closed form between the yearly Sondertilgung dates; the plans keep their yearly rows.
+    vorgabe: precomputed {"darlehen": {loan key -> amount}, "monatsraten": {loan key -> rate}}
+    (e.g. from the app pipeline's allocation and rate stages) used instead of the register's
+    allocation and Monatsraten; the register then only supplies costs, equity and interest rates.
+    checkpoint: keep the start-of-year checkpoints ("_verlauf") in the result, so it can serve as
+    `basis` of a later run (e.g. in the result cache); off by default to keep results small.
+    """
+    st_params = st_params or {}
+    parteien = register.parteien
+    st_plaene = {
+        p.key: SondertilgungPlan.aus_eingabe(st_params.get(p.key), register.loan_keys_der_partei(p.key))
+        for p in parteien
+    }
+
+    with span("engine: zuteilung"):
+        # Parteiweise Finanzierungsbedarf
+        bedarf = dict(zip((p.key for p in parteien), register.bedarf().tolist()))
+        if all(b <= 0.0 for b in bedarf.values()):
+            return {"error": "Keine Finanzierung notwendig."}
+
+        # Kreditaufteilung + Monatsraten (Anfangstilgung der Partei), Reihenfolge laut Register
+        loan_keys = register.loan_keys
+        if vorgabe is None:
+            summen = register.aufteilung()
+            darlehen = dict(zip(loan_keys, summen.tolist()))
+            monatsraten = dict(zip(loan_keys, register.monatsraten(summen).tolist()))
         else:
-            monatsraten[key] = 0.0
+            darlehen = {k: float(vorgabe["darlehen"][k]) for k in loan_keys}
+            monatsraten = {k: float(vorgabe["monatsraten"][k]) for k in loan_keys}
+        zinsen = dict(zip(loan_keys, register.zinsen().tolist()))
+        gesamtrate = 0.0
+        for key in loan_keys:
+            gesamtrate += monatsraten[key]
+        keys_partei = {p.key: register.loan_keys_der_partei(p.key) for p in parteien}
+        monatsraten_partei = {p: sum(monatsraten[k] for k in keys) for p, keys in keys_partei.items()}
 
-    monatsraten_partei = {
-        "fam": sum(monatsraten[k] for k in LOAN_KEYS_FAM),
-        "sie": sum(monatsraten[k] for k in LOAN_KEYS_SIE),
+    # Kredite ohne Sondertilgung: reine Annuität, geschlossen gerechnet statt Jahr für Jahr
+    st_eingaben = tuple(st_plaene.values())
+    mit_sondertilgung = set().union(*(plan.beruehrte_kredite() for plan in st_eingaben))
+    annuitaeten = {
+        k: {"summe": darlehen[k], "zins": zinsen[k], "jahresrate": monatsraten[k] * 12}
+        for k in loan_keys if k not in mit_sondertilgung and not monatlich
     }
+    annuitaet_ende = max(
+        (min(float(annuitaet_tilgungsjahr(a["summe"], a["zins"], a["jahresrate"])), MAX_JAHRE) for a in annuitaeten.values()),
+        default=0,
+    )
+    iterierte = [k for k in loan_keys if k not in annuitaeten]
 
-    # Amortisation + Sondertilgung pro Partei
-    restschulden = {d["key"]: d["summe"] for d in darlehen_details}
-    jahres_daten_pro_kredit = {d["key"]: [] for d in darlehen_details}
-    gesamte_zinskosten = 0.0
-    zinskosten_pro_kredit = {d["key"]: 0.0 for d in darlehen_details}  # NEW
-    sondertilgungen = {d["key"]: {} for d in darlehen_details}
-
-
-    for jahr in range(1, 51):  # max 50 Jahre
-        if all(rs < 0.01 for rs in restschulden.values()):
-            break
-
-        # Reguläre Zahlungen p.a.
-        jahres_daten_dieses_jahr = {}
-        for d in darlehen_details:
-            key = d["key"]
-            if restschulden[key] > 0.01:
-                restschuld_start = restschulden[key]
-                zinsen_jahr = restschuld_start * d["zins"]
-                tilgung_jahr = (monatsraten[key] * 12) - zinsen_jahr
-                if tilgung_jahr < 0:
-                    tilgung_jahr = 0.0
-                tilgung_jahr = min(tilgung_jahr, restschuld_start)
-                restschulden[key] -= tilgung_jahr
-                gesamte_zinskosten += zinsen_jahr
-                zinskosten_pro_kredit[key] += zinsen_jahr  # NEW
-
-
-                jahres_daten_dieses_jahr[key] = {
-                    "Jahr": jahr,
-                    "Restschuld Start": restschuld_start,
-                    "Zinsen p.a.": zinsen_jahr,
-                    "Tilgung p.a.": tilgung_jahr,
-                    "Sondertilgung": 0.0,
-                    "Restschuld Ende": restschulden[key],
-                }
-
-        # Sondertilgung: Familie
-        if st_modus_fam == "Automatische Verteilung":
-            st_fam = 0.0
-            if not st_df_fam.empty and jahr in st_df_fam["Jahr"].values:
-                st_fam = float(st_df_fam.loc[st_df_fam["Jahr"] == jahr, "Betrag"].iloc[0])
-            st_left = st_fam
-            active = {k: next(d["zins"] for d in darlehen_details if d["key"] == k)
-                      for k in LOAN_KEYS_FAM if restschulden[k] > 0.01}
-            while st_left > 0.01 and active:
-                max_z = max(active.values())
-                top = [k for k, z in active.items() if z == max_z]
-                total_rs = sum(restschulden[k] for k in top)
-                if total_rs < 0.01:
-                    for k in top:
-                        active.pop(k, None)
-                    continue
-                pool = st_left
-                for k in top:
-                    if st_left <= 0.0:
-                        break
-                    prop = restschulden[k] / total_rs
-                    betrag = min(pool * prop, restschulden[k])
-                    restschulden[k] -= betrag
-                    st_left -= betrag
-                    if k in jahres_daten_dieses_jahr:
-                        jahres_daten_dieses_jahr[k]["Sondertilgung"] += betrag
-                        jahres_daten_dieses_jahr[k]["Restschuld Ende"] = restschulden[k]
-                    sondertilgungen[k][jahr] = sondertilgungen[k].get(jahr, 0.0) + betrag
-                for k in list(top):
-                    if restschulden[k] < 0.01:
-                        active.pop(k, None)
-        elif st_modus_fam == "Manuelle Eingabe":
-            if not st_df_fam.empty and jahr in st_df_fam["Jahr"].values:
-                row = st_df_fam.loc[st_df_fam["Jahr"] == jahr]
-                for k in LOAN_KEYS_FAM:
-                    if k in row.columns and pd.notna(row[k].iloc[0]) and row[k].iloc[0] > 0:
-                        betrag = min(float(row[k].iloc[0]), restschulden[k])
-                        if betrag > 0.0:
-                            restschulden[k] -= betrag
-                            if k in jahres_daten_dieses_jahr:
-                                jahres_daten_dieses_jahr[k]["Sondertilgung"] += betrag
-                                jahres_daten_dieses_jahr[k]["Restschuld Ende"] = restschulden[k]
-                            sondertilgungen[k][jahr] = sondertilgungen[k].get(jahr, 0.0) + betrag
-
-        # Sondertilgung: Sie
-        if st_modus_sie == "Automatische Verteilung":
-            st_sie = 0.0
-            if not st_df_sie.empty and jahr in st_df_sie["Jahr"].values:
-                st_sie = float(st_df_sie.loc[st_df_sie["Jahr"] == jahr, "Betrag"].iloc[0])
-            st_left = st_sie
-            active = {k: next(d["zins"] for d in darlehen_details if d["key"] == k)
-                      for k in LOAN_KEYS_SIE if restschulden[k] > 0.01}
-            while st_left > 0.01 and active:
-                max_z = max(active.values())
-                top = [k for k, z in active.items() if z == max_z]
-                total_rs = sum(restschulden[k] for k in top)
-                if total_rs < 0.01:
-                    for k in top:
-                        active.pop(k, None)
+    # Checkpoints: Zustand zu Jahresbeginn (Zeile jahr - 1), für inkrementelle Neuberechnung
+    n_kredite = len(loan_keys)
+    verlauf = {
+        # Register samt Beträgen und Raten (diese können vorgegeben sein)
+        "params": (register.schluessel(), tuple(darlehen.values()), tuple(monatsraten.values())),
+        "monatlich": monatlich,
+        "st": st_eingaben,
+        "annuitaeten": frozenset(annuitaeten),
+        "jahre": 0,
+        "restschulden": np.zeros((MAX_JAHRE, n_kredite)),
+        "zinskosten": np.zeros((MAX_JAHRE, n_kredite)),
+        "laufzeit": np.zeros((MAX_JAHRE, n_kredite), dtype=np.int64),
+    }
+
+    verlauf["start_jahr"] = start_jahr = 1
+    fortsetzung = _checkpoint(basis, verlauf["params"], st_eingaben, annuitaeten, monatlich)
+    if fortsetzung is not None:
+        start_jahr, basis_verlauf = fortsetzung
+        verlauf["start_jahr"] = start_jahr
+        for feld in ("restschulden", "zinskosten", "laufzeit"):
+            verlauf[feld][:start_jahr] = basis_verlauf[feld][:start_jahr]
+        restschulden = dict(zip(loan_keys, verlauf["restschulden"][start_jahr - 1].tolist()))
+        zinskosten_pro_kredit = dict(zip(loan_keys, verlauf["zinskosten"][start_jahr - 1].tolist()))
+        laufzeit = verlauf["laufzeit"][start_jahr - 1].tolist()
+        plan = np.array(basis.plan)
+        sonder = np.array(basis.sondertilgung)
+        for i, k in enumerate(loan_keys):
+            if k not in annuitaeten:
+                plan[i, start_jahr - 1:] = 0.0
+                sonder[i, start_jahr - 1:] = 0.0
+    else:
+        restschulden = dict(darlehen)
+        zinskosten_pro_kredit = dict.fromkeys(loan_keys, 0.0)
+        laufzeit = [0] * n_kredite
+        plan = np.zeros((n_kredite, MAX_JAHRE, len(PLAN_FELDER)))
+        sonder = np.zeros((n_kredite, MAX_JAHRE))
+        with span("engine: annuitäten (geschlossen)"):
+            for i, k in enumerate(loan_keys):
+                if k not in annuitaeten:
                     continue
-                pool = st_left
-                for k in top:
-                    if st_left <= 0.0:
-                        break
-                    prop = restschulden[k] / total_rs
-                    betrag = min(pool * prop, restschulden[k])
-                    restschulden[k] -= betrag
-                    st_left -= betrag
-                    if k in jahres_daten_dieses_jahr:
-                        jahres_daten_dieses_jahr[k]["Sondertilgung"] += betrag
-                        jahres_daten_dieses_jahr[k]["Restschuld Ende"] = restschulden[k]
-                    sondertilgungen[k][jahr] = sondertilgungen[k].get(jahr, 0.0) + betrag
-                for k in list(top):
-                    if restschulden[k] < 0.01:
-                        active.pop(k, None)
-        elif st_modus_sie == "Manuelle Eingabe":
-            if not st_df_sie.empty and jahr in st_df_sie["Jahr"].values:
-                row = st_df_sie.loc[st_df_sie["Jahr"] == jahr]
-                for k in LOAN_KEYS_SIE:
-                    if k in row.columns and pd.notna(row[k].iloc[0]) and row[k].iloc[0] > 0:
-                        betrag = min(float(row[k].iloc[0]), restschulden[k])
+                a = annuitaeten[k]
+                ap = annuitaet_plan(a["summe"], a["zins"], a["jahresrate"], MAX_JAHRE)
+                laufzeit[i] = len(ap["Jahr"])
+                plan[i, :laufzeit[i]] = np.column_stack([ap[f] for f in PLAN_FELDER])
+                zinskosten_pro_kredit[k] = float(annuitaet_zinskosten(a["summe"], a["zins"], a["jahresrate"], MAX_JAHRE))
+    index = {k: i for i, k in enumerate(loan_keys)}
+    jahresraten = {k: monatsraten[k] * 12 for k in iterierte}
+
+    # Sondertilgung je Partei: Zins-Stufen (einmal sortiert) und optionale Jahres-Obergrenzen
+    sonder_parteien = []
+    for p in parteien:
+        st_plan, keys = st_plaene[p.key], keys_partei[p.key]
+        if st_plan.aktiv:
+            sonder_parteien.append((st_plan, keys, zins_stufen([zinsen[k] for k in keys]),
+                                    st_plan.obergrenzen([darlehen[k] for k in keys])))
+
+    def buche_sondertilgung(k: str, jahr: int, betrag: float) -> None:
+        i = index[k]
+        restschulden[k] -= betrag
+        if laufzeit[i] == jahr:  # Kredit hat in diesem Jahr eine Planzeile
+            plan[i, jahr - 1, 3] += betrag
+            plan[i, jahr - 1, 4] = restschulden[k]
+        sonder[i, jahr - 1] += betrag
+
+    messung = aktuell()
+    st_sekunden, st_jahre = 0.0, 0
+    with span("engine: tilgungsplan"):
+        for jahr in range(start_jahr, MAX_JAHRE + 1):  # max 50 Jahre
+            verlauf["restschulden"][jahr - 1] = [restschulden[k] for k in loan_keys]
+            verlauf["zinskosten"][jahr - 1] = [zinskosten_pro_kredit[k] for k in loan_keys]
+            verlauf["laufzeit"][jahr - 1] = laufzeit
+            verlauf["jahre"] = jahr
+            if not iterierte or (all(restschulden[k] < 0.01 for k in iterierte) and jahr > annuitaet_ende):
+                break
+
+            # Reguläre Zahlungen p.a.
+            if monatlich:
+                aktiv = [k for k in iterierte if restschulden[k] > 0.01]
+                if aktiv:
+                    start = [restschulden[k] for k in aktiv]
+                    zinsen_j, tilgung_j, ende_j = annuitaet_monatsjahr(
+                        start, [zinsen[k] for k in aktiv], [monatsraten[k] for k in aktiv]
+                    )
+                    for key, rs_start, z, t, rs_ende in zip(aktiv, start, zinsen_j.tolist(), tilgung_j.tolist(), ende_j.tolist()):
+                        restschulden[key] = rs_ende
+                        zinskosten_pro_kredit[key] += z
+                        i = index[key]
+                        plan[i, jahr - 1] = (rs_start, z, t, 0.0, rs_ende)
+                        laufzeit[i] = jahr
+            else:
+                for key in iterierte:
+                    if restschulden[key] > 0.01:
+                        restschuld_start = restschulden[key]
+                        zinsen_jahr = restschuld_start * zinsen[key]
+                        tilgung_jahr = jahresraten[key] - zinsen_jahr
+                        if tilgung_jahr < 0:
+                            tilgung_jahr = 0.0
+                        tilgung_jahr = min(tilgung_jahr, restschuld_start)
+                        restschulden[key] -= tilgung_jahr
+                        zinskosten_pro_kredit[key] += zinsen_jahr
+
+                        i = index[key]
+                        plan[i, jahr - 1] = (restschuld_start, zinsen_jahr, tilgung_jahr, 0.0, restschulden[key])
+                        laufzeit[i] = jahr
+
+            # Sondertilgung pro Partei (Zeit über alle Jahre summiert, nur bei aktiver Messung)
+            if messung is not None and sonder_parteien:
+                st_start = time.perf_counter()
+            for st_plan, keys, stufen, grenzen in sonder_parteien:
+                if st_plan.modus == ST_MODUS_AUTO:
+                    betraege = verteile_sondertilgung(
+                        float(st_plan.werte[jahr - 1]), [restschulden[k] for k in keys], stufen, grenzen
+                    )
+                    for k, betrag in zip(keys, betraege):
                         if betrag > 0.0:
-                            restschulden[k] -= betrag
-                            if k in jahres_daten_dieses_jahr:
-                                jahres_daten_dieses_jahr[k]["Sondertilgung"] += betrag
-                                jahres_daten_dieses_jahr[k]["Restschuld Ende"] = restschulden[k]
-                            sondertilgungen[k][jahr] = sondertilgungen[k].get(jahr, 0.0) + betrag
-
-        # Jahresdaten einsammeln
-        for k, daten in jahres_daten_dieses_jahr.items():
-            jahres_daten_pro_kredit[k].append(daten)
-
-    tilgungsplaene = {k: (pd.DataFrame(v) if v else pd.DataFrame()) for k, v in jahres_daten_pro_kredit.items()}
-
-    return {
-        "gesamtkosten": float(kosten_fam) + float(kosten_sie),
-        "finanzierungsbedarf": finanzbedarf_fam + finanzbedarf_sie,
-        "finanzierungsbedarf_fam": finanzbedarf_fam,
-        "finanzierungsbedarf_sie": finanzbedarf_sie,
+                            buche_sondertilgung(k, jahr, betrag)
+                else:
+                    for n, (k, wert) in enumerate(zip(keys, st_plan.werte[jahr - 1].tolist())):
+                        if wert > 0:
+                            betrag = min(wert, restschulden[k], grenzen[n] if grenzen else wert)
+                            if betrag > 0.0:
+                                buche_sondertilgung(k, jahr, betrag)
+            if messung is not None and sonder_parteien:
+                st_sekunden += time.perf_counter() - st_start
+                st_jahre += 1
+        if st_jahre:
+            messung.erfasse("engine: sondertilgung", st_sekunden, st_jahre)
+
+    zinskosten_partei = {p: sum(zinskosten_pro_kredit[k] for k in keys) for p, keys in keys_partei.items()}
+    kennzahlen = {
+        "gesamtkosten": sum(float(p.kosten) for p in parteien),
+        "finanzierungsbedarf": sum(bedarf.values()),
+    }
+    kennzahlen.update({f"finanzierungsbedarf_{p}": b for p, b in bedarf.items()})
+    kennzahlen.update({
         "darlehen": darlehen,
         "monatsraten": monatsraten,
         "monatsraten_partei": monatsraten_partei,
         "gesamtrate": gesamtrate,
-        "tilgungsplaene": tilgungsplaene,
-        "gesamte_zinskosten": gesamte_zinskosten,
-        "sondertilgungen": sondertilgungen,
-        # --- NEW: per-party zinskosten & raw inputs for coverage pies
-        "zinskosten_partei": {
-            "fam": sum(zinskosten_pro_kredit[k] for k in ["fam_kfw297", "fam_kfw124", "fam_hausbank"]),
-            "sie": sum(zinskosten_pro_kredit[k] for k in ["sie_kfw297", "sie_kfw124", "sie_hausbank"]),
-        },
-        "inputs": {
-            "fam": {"kosten": float(kosten_fam), "ek": float(ek_fam), "zusch": float(zus_fam)},
-            "sie": {"kosten": float(kosten_sie), "ek": float(ek_sie), "zusch": float(zus_sie)},
-        },
-    }
+        "gesamte_zinskosten": sum(zinskosten_pro_kredit[k] for k in loan_keys),
+        "annuitaeten": annuitaeten,  # Kredite ohne Sondertilgung -> geschlossene Form
+        "zinskosten_partei": zinskosten_partei,
+        "inputs": {p.key: {"kosten": float(p.kosten), "ek": float(p.ek), "zusch": float(p.zuschuss)} for p in parteien},
+        **register.labels,  # "parteien" / "produkte": Schlüssel -> Anzeigename
+    })
+    if checkpoint:
+        kennzahlen["_verlauf"] = verlauf  # Checkpoints je Jahr (siehe basis)
+    return ScenarioResult(
+        loan_keys=loan_keys,
+        plan=plan,
+        laufzeit=np.array(laufzeit),
+        sondertilgung=sonder,
+        kennzahlen=kennzahlen,
+    )
+
 
+def calculate_financing_scenario(params, st_params_fam, st_params_sie, basis: ScenarioResult | None = None,
+                                 monatlich: bool = False, reihenfolge: dict | None = None, checkpoint: bool = False):
+    """
+    Two-party scenario from the 13 sidebar params (see `standard_register`).
+
+    st_params_fam / st_params_sie: a compiled `SondertilgungPlan` or a (modus, DataFrame) pair.
+    reihenfolge: allocation order per party instead of the KfW waterfall (see `optimizer.reihenfolge_fuer`).
+    basis / checkpoint: incremental runs, see `calculate_scenario`.
+    """
+    return calculate_scenario(
+        standard_register(params, reihenfolge), {"fam": st_params_fam, "sie": st_params_sie}, basis=basis,
+        monatlich=monatlich, checkpoint=checkpoint,
+    )
 
 
 def get_restschuld_nach_jahren(szenario: dict, jahre: int) -> float:
-    restschuld = 0.0
     if "error" in szenario:
         return 0.0
+    if isinstance(szenario, ScenarioResult):
+        return float(szenario.restschuld(jahre))  # O(1) über die Restschuld-Kurve
+
+    # Ergebnis-Dicts mit DataFrame-Plänen (z. B. von Hand gebaut)
+    restschuld = 0.0
     for plan in szenario["tilgungsplaene"].values():
-        if not isinstance(plan, pd.DataFrame) or plan.empty:
+        if not ist_dataframe(plan) or plan.empty:
             continue
         if jahre in plan["Jahr"].values:
             restschuld += float(plan.loc[plan["Jahr"] == jahre, "Restschuld Ende"].iloc[0])
@@ -0,0 +1,347 @@
+"""
+Headless batch runner: score many financing configs without the Streamlit app.
+
+    python -m core.cli szenarien.jsonl -o kennzahlen.parquet --plaene plaene.parquet
+
+Input records (JSON lines or CSV, "-" = stdin) use the keys of `render_sidebar`'s config
+dict. Sondertilgung tables ("st_df_fam" / "st_df_sie") are lists of row objects such as
+{"Jahr": 1, "Betrag": 5000} (JSON-encoded in CSV cells), with an optional
+"st_max_quote_fam" / "st_max_quote_sie". "aufteilung" (a key of AUFTEILUNG_MODI, default
+"wasserfall") and "max_monatsrate" choose the loan split as in the sidebar. Records are
+read and evaluated in chunks, so memory stays constant for arbitrarily long inputs.
+
+--plaene writes the yearly Tilgungsplan of every loan in long form: one row per id, kredit
+and jahr of the loan's Laufzeit with the PLAN_SPALTEN restschuld_start, zinsen, tilgung,
+sondertilgung and restschuld_ende (as in the app's Tilgungsplan tables).
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .batch import DETAIL_FELDER, calculate_scenarios_batch
+from .helpers import CONFIG_FELDER, MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from .optimizer import AUFTEILUNG_MODI, AUFTEILUNG_WASSERFALL, reihenfolge_fuer
+from .registry import standard_parteien, standard_register
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+ZINSBINDUNG_STANDARD = 15  # wie in der Sidebar
+PARTEIEN = standard_parteien()  # Partei -> Kredit-Schlüssel, aus dem Register
+# Spalten der Tilgungspläne (--plaene), entsprechen PLAN_FELDER
+PLAN_SPALTEN = ("restschuld_start", "zinsen", "tilgung", "sondertilgung", "restschuld_ende")
+
+
+def _wahr(wert) -> bool:
+    if isinstance(wert, str):
+        return wert.strip().lower() in ("1", "true", "ja", "monatlich")
+    return bool(wert)
+
+
+def _leer(wert) -> bool:
+    return wert is None or (isinstance(wert, str) and not wert.strip()) or (isinstance(wert, float) and np.isnan(wert))
+
+
+def _zahl(wert) -> float:
+    try:
+        zahl = float(wert)
+    except (TypeError, ValueError):
+        return 0.0
+    return zahl if np.isfinite(zahl) else 0.0
+
+
+def st_tabelle(zeilen, modus: str, loan_keys) -> np.ndarray:
+    """
+    Compile Sondertilgung table rows (list of dicts) like `SondertilgungPlan.from_dataframe`.
+
+    Rows outside 1..MAX_JAHRE are ignored, the first row of a year wins, invalid or
+    negative amounts count as 0. Returns (MAX_JAHRE,) for "Automatische Verteilung" and
+    (MAX_JAHRE, k) for "Manuelle Eingabe".
+    """
+    manuell = modus == ST_MODUS_MANUELL
+    werte = np.zeros((MAX_JAHRE, len(loan_keys)) if manuell else MAX_JAHRE)
+    if _leer(zeilen):
+        return werte
+    if isinstance(zeilen, str):
+        zeilen = json.loads(zeilen)
+    gesehen = set()
+    for zeile in zeilen:
+        jahr = _zahl(zeile.get("Jahr"))
+        if not (1 <= jahr <= MAX_JAHRE and jahr == round(jahr)) or jahr in gesehen:
+            continue
+        gesehen.add(jahr)
+        if manuell:
+            werte[int(jahr) - 1] = [_zahl(zeile.get(k)) for k in loan_keys]
+        else:
+            werte[int(jahr) - 1] = _zahl(zeile.get("Betrag"))
+    werte[werte < 0] = 0.0
+    return werte
+
+
+def lies_datensaetze(quelle, format: str):
+    """Yield config dicts from a JSON-lines or CSV text stream, one at a time."""
+    if format == "csv":
+        yield from csv.DictReader(quelle)
+        return
+    for zeile in quelle:
+        if zeile.strip():
+            yield json.loads(zeile)
+
+
+def _eingabe(datensatz: dict, nr: int) -> tuple:
+    """
+    Validate one record; returns (id, params, zinsbindung, monatlich, {partei: (modus, werte, quote)},
+    (aufteilung, max_monatsrate)).
+    """
+    if not isinstance(datensatz, dict):
+        raise ValueError(f"Datensatz {nr}: erwartet ein JSON-Objekt, erhalten: {type(datensatz).__name__}")
+    fehlend = [f for f in CONFIG_FELDER if _leer(datensatz.get(f))]
+    if fehlend:
+        raise ValueError(f"Datensatz {nr}: fehlende Felder {', '.join(fehlend)}")
+    try:
+        params = [float(datensatz[f]) for f in CONFIG_FELDER]
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Datensatz {nr}: {e}") from None
+    zb = datensatz.get("Zinsbindung_Jahre")
+    try:
+        zinsbindung = ZINSBINDUNG_STANDARD if _leer(zb) else int(float(zb))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"Datensatz {nr}: ungültige Zinsbindung_Jahre {zb!r}") from None
+    sonder = {}
+    for partei, loan_keys in PARTEIEN.items():
+        modus = datensatz.get(f"st_modus_{partei}")
+        if modus not in (ST_MODUS_AUTO, ST_MODUS_MANUELL):
+            sonder[partei] = (None, None, 0.0)
+            continue
+        quote = datensatz.get(f"st_max_quote_{partei}")
+        try:
+            werte = st_tabelle(datensatz.get(f"st_df_{partei}"), modus, loan_keys)
+        except (ValueError, AttributeError, TypeError) as e:
+            raise ValueError(f"Datensatz {nr}: ungültige Sondertilgungstabelle ({partei}): {e}") from None
+        sonder[partei] = (modus, werte, 0.0 if _leer(quote) else _zahl(quote))
+    aufteilung = datensatz.get("aufteilung")
+    aufteilung = AUFTEILUNG_WASSERFALL if _leer(aufteilung) else str(aufteilung).strip()
+    if aufteilung not in AUFTEILUNG_MODI:
+        raise ValueError(f"Datensatz {nr}: unbekannte Aufteilung {aufteilung!r} (erlaubt: {', '.join(AUFTEILUNG_MODI)})")
+    max_monatsrate = datensatz.get("max_monatsrate")
+    try:
+        max_monatsrate = None if _leer(max_monatsrate) else float(max_monatsrate)
+    except (TypeError, ValueError):
+        raise ValueError(f"Datensatz {nr}: ungültige max_monatsrate {max_monatsrate!r}") from None
+    kennung = datensatz.get("id")
+    return ((nr if _leer(kennung) else kennung), params, zinsbindung, _wahr(datensatz.get("monatlich", False)), sonder,
+            (aufteilung, max_monatsrate or None))
+
+
+def _tilgungsjahr(restschuld: np.ndarray, keine_finanzierung: np.ndarray) -> np.ndarray:
+    """First year with no debt left (MAX_JAHRE + 1 = not paid off, 0 = no financing)."""
+    getilgt = restschuld <= 0.01
+    jahr = np.where(getilgt.any(axis=1), getilgt.argmax(axis=1) + 1, MAX_JAHRE + 1)
+    return np.where(keine_finanzierung, 0, jahr)
+
+
+def bewerte_chunk(eingaben: list, plaene: bool = False) -> tuple:
+    """
+    Evaluate validated records (see `_eingabe`) with the batch engine.
+
+    The allocation order of records with an Aufteilung other than the waterfall is resolved
+    per record with `reihenfolge_fuer`, as in the app. Records are grouped by interest mode,
+    Sondertilgung modes and allocation order (one engine call per group) and returned in input
+    order. Returns (kennzahlen, plaene or None) DataFrames.
+    """
+    import pandas as pd
+
+    gruppen = {}
+    for i, (_, params, _, monatlich, sonder, (aufteilung, max_monatsrate)) in enumerate(eingaben):
+        # Sondertilgungen in Registerreihenfolge (fam, sie), wie reihenfolge_fuer sie erwartet
+        reihenfolge = reihenfolge_fuer(params, *(sonder[p] for p in PARTEIEN), aufteilung, max_monatsrate, monatlich)
+        reihenfolge = tuple(sorted(reihenfolge.items())) if reihenfolge else None
+        modi = tuple(sonder[p][0] for p in PARTEIEN)
+        gruppen.setdefault((monatlich, modi, reihenfolge), []).append(i)
+
+    n = len(eingaben)
+    kennzahlen = {
+        "id": [e[0] for e in eingaben],
+        "keine_finanzierung": np.zeros(n, dtype=bool),
+        "finanzierungsbedarf": np.zeros(n),
+        "gesamtrate": np.zeros(n),
+        **{f"monatsrate_{p}": np.zeros(n) for p in PARTEIEN},
+        "gesamte_zinskosten": np.zeros(n),
+        **{f"zinskosten_{p}": np.zeros(n) for p in PARTEIEN},
+        "restschuld_zinsbindung": np.zeros(n),
+        "tilgungsjahr": np.zeros(n, dtype=int),
+        **{f"darlehen_{k}": np.zeros(n) for keys in PARTEIEN.values() for k in keys},
+    }
+    teile = []
+    for (monatlich, modi, reihenfolge), zeilen in gruppen.items():
+        auswahl = [eingaben[i] for i in zeilen]
+        params = np.array([e[1] for e in auswahl]).T
+        st = {}
+        for partei, modus in zip(PARTEIEN, modi):
+            if modus is not None:
+                st[partei] = (modus, np.stack([e[4][partei][1] for e in auswahl]),
+                              np.array([e[4][partei][2] for e in auswahl]))
+        b = calculate_scenarios_batch(standard_register(list(params), dict(reihenfolge or ())), st, details=plaene,
+                                      monatlich=monatlich)
+        zb = np.clip([e[2] for e in auswahl], 1, MAX_JAHRE)
+        jahr = _tilgungsjahr(b["restschuld"], b["keine_finanzierung"])
+        for spalte, werte in (
+            ("keine_finanzierung", b["keine_finanzierung"]),
+            ("finanzierungsbedarf", b["finanzierungsbedarf"]),
+            ("gesamtrate", b["gesamtrate"]),
+            *((f"monatsrate_{p}", w) for p, w in b["monatsraten_partei"].items()),
+            ("gesamte_zinskosten", b["gesamte_zinskosten"]),
+            *((f"zinskosten_{p}", w) for p, w in b["zinskosten_partei"].items()),
+            ("restschuld_zinsbindung", b["restschuld"][np.arange(len(zeilen)), zb - 1]),
+            ("tilgungsjahr", jahr),
+        ):
+            kennzahlen[spalte][zeilen] = werte
+        for j, k in enumerate(b["loan_keys"]):
+            kennzahlen[f"darlehen_{k}"][zeilen] = b["darlehen"][:, j]
+        if plaene:
+            teile.append((zeilen, b))
+
+    return pd.DataFrame(kennzahlen), (_plaene(eingaben, teile) if plaene else None)
+
+
+def _plaene(eingaben: list, teile: list) -> "pd.DataFrame":
+    """
+    Long yearly schedules: one row per record, loan and year of the loan's Laufzeit, in input
+    order, with the PLAN_FELDER of the app's Tilgungsplan (see PLAN_SPALTEN).
+    """
+    import pandas as pd
+
+    stuecke = []
+    for zeilen, b in teile:
+        zeile_idx, jahr_idx, kredit_idx = np.nonzero(b["restschuld_start_kredit"] > 0.01)
+        stueck = {
+            "_pos": np.asarray(zeilen)[zeile_idx],
+            "_kredit": kredit_idx,
+            "kredit": np.asarray(b["loan_keys"], dtype=object)[kredit_idx],
+            "jahr": jahr_idx + 1,
+        }
+        for spalte, feld in zip(PLAN_SPALTEN, DETAIL_FELDER):
+            stueck[spalte] = b[feld][zeile_idx, jahr_idx, kredit_idx]
+        stuecke.append(pd.DataFrame(stueck))
+    df = pd.concat(stuecke, ignore_index=True).sort_values(["_pos", "_kredit", "jahr"], kind="stable")
+    df.insert(0, "id", [eingaben[i][0] for i in df["_pos"]])
+    return df.drop(columns=["_pos", "_kredit"]).reset_index(drop=True)
+
+
+class TabellenSchreiber:
+    """Append DataFrame chunks to one CSV or Parquet file ("-" = CSV on stdout)."""
+
+    __slots__ = ("ziel", "format", "_datei", "_parquet", "zeilen")
+
+    def __init__(self, ziel: str, format: str):
+        if format not in ("csv", "parquet"):
+            raise ValueError(f"Unbekanntes Ausgabeformat: {format}")
+        if format == "parquet" and ziel == "-":
+            raise ValueError("Parquet kann nicht auf stdout geschrieben werden.")
+        self.ziel = ziel
+        self.format = format
+        self._datei = None
+        self._parquet = None
+        self.zeilen = 0
+
+    def schreibe(self, df: "pd.DataFrame") -> None:
+        if self.format == "csv":
+            if self._datei is None:
+                self._datei = sys.stdout if self.ziel == "-" else open(self.ziel, "w", newline="", encoding="utf-8")
+            df.to_csv(self._datei, header=self.zeilen == 0, index=False)
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ValueError("Parquet-Ausgabe benötigt pyarrow (pip install pyarrow).") from None
+            tabelle = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.ziel, tabelle.schema)
+            self._parquet.write_table(tabelle.cast(self._parquet.schema))
+        self.zeilen += len(df)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._datei is not None and self._datei is not sys.stdout:
+            self._datei.close()
+        else:
+            sys.stdout.flush()
+
+    def __enter__(self) -> "TabellenSchreiber":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _format(pfad: str, angabe: str | None, standard: str) -> str:
+    if angabe:
+        return angabe
+    for endung, format in ((".jsonl", "jsonl"), (".ndjson", "jsonl"), (".json", "jsonl"), (".csv", "csv"),
+                           (".parquet", "parquet"), (".pq", "parquet")):
+        if pfad.lower().endswith(endung):
+            return format
+    return standard
+
+
+def run(quelle, kennzahlen: TabellenSchreiber, plaene: TabellenSchreiber | None = None,
+        eingabeformat: str = "jsonl", chunk_groesse: int = 4_096) -> int:
+    """Stream records from `quelle` through the batch engine in chunks; returns the record count."""
+    datensaetze = lies_datensaetze(quelle, eingabeformat)
+    anzahl = 0
+    while True:
+        chunk = list(itertools.islice(datensaetze, chunk_groesse))
+        if not chunk:
+            return anzahl
+        eingaben = [_eingabe(d, anzahl + i) for i, d in enumerate(chunk)]
+        df, df_plaene = bewerte_chunk(eingaben, plaene=plaene is not None)
+        kennzahlen.schreibe(df)
+        if plaene is not None:
+            plaene.schreibe(df_plaene)
+        anzahl += len(chunk)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli", description="Finanzierungsszenarien ohne Oberfläche bewerten (Batch)."
+    )
+    parser.add_argument("eingabe", help="JSON-Lines- oder CSV-Datei mit Konfigurationen ('-' = stdin)")
+    parser.add_argument("-o", "--ausgabe", default="-", help="Kennzahlen als CSV/Parquet ('-' = CSV auf stdout)")
+    parser.add_argument("--plaene", help="Optional: jährliche Tilgungspläne je Kredit als CSV/Parquet")
+    parser.add_argument("--eingabeformat", choices=("jsonl", "csv"))
+    parser.add_argument("--format", choices=("csv", "parquet"), help="Ausgabeformat (Standard: nach Dateiendung)")
+    parser.add_argument("--chunk", type=int, default=4_096, help="Datensätze pro Engine-Aufruf (Standard: 4096)")
+    args = parser.parse_args(argv)
+    if args.chunk < 1:
+        parser.error("--chunk muss mindestens 1 sein.")
+
+    eingabeformat = _format(args.eingabe, args.eingabeformat, "jsonl")
+    start = time.perf_counter()
+    try:
+        quelle = (io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if args.eingabe == "-"
+                  else open(args.eingabe, newline="", encoding="utf-8"))
+        with quelle, TabellenSchreiber(args.ausgabe, _format(args.ausgabe, args.format, "csv")) as kennzahlen:
+            if args.plaene:
+                with TabellenSchreiber(args.plaene, _format(args.plaene, args.format, "csv")) as plaene:
+                    anzahl = run(quelle, kennzahlen, plaene, eingabeformat, args.chunk)
+            else:
+                anzahl = run(quelle, kennzahlen, None, eingabeformat, args.chunk)
+    except (OSError, ValueError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 1
+    dauer = time.perf_counter() - start
+    print(f"{anzahl} Szenarien in {dauer:.2f} s bewertet.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
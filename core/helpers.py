@@ -1,12 +1,29 @@
-import pandas as pd
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 LOAN_KEYS_FAM = ["fam_kfw297", "fam_kfw124", "fam_hausbank"]
 LOAN_KEYS_SIE = ["sie_kfw297", "sie_kfw124", "sie_hausbank"]
 LOAN_KEYS = LOAN_KEYS_FAM + LOAN_KEYS_SIE
 
+MAX_JAHRE = 50  # Planungshorizont der Tilgungspläne
+ST_MODUS_AUTO = "Automatische Verteilung"
+ST_MODUS_MANUELL = "Manuelle Eingabe"
+
 GROUPS = {"fam": "Schwester & Familie", "sie": "Ihr Anteil"}
 PRODUCT_LABELS = {"kfw297": "KfW 297", "kfw124": "KfW 124", "hausbank": "Hausbank"}
 
+# Config-Schlüssel in der Reihenfolge von PARAM_FIELDS (Sidebar-Config, CLI, App-Pipeline)
+CONFIG_FELDER = (
+    "Kosten_Fam", "Eigenkapital_Fam", "Zuschuesse_Fam",
+    "Kosten_Sie", "Eigenkapital_Sie", "Zuschuesse_Sie",
+    "Zins_KfW_297", "Zins_KfW_124", "Zins_Hausbank",
+    "Tilgung_Fam", "Tilgung_Sie",
+    "Kredit_KfW_297_pro_WE", "Kredit_KfW_124_max",
+)
+
 
 def product_of(key: str) -> str:
     return key.split("_", 1)[1]  # "kfw297" / "kfw124" / "hausbank"
@@ -17,6 +34,14 @@ def loans_by_prefix(tilgungsplaene: dict, pref: str) -> dict:
     return {product_of(k): df for k, df in tilgungsplaene.items() if k.startswith(pref) and not df.empty}
 
 
-def safe_concat_plans(plans: dict) -> pd.DataFrame:
-    non_empty = [df for df in plans.values() if isinstance(df, pd.DataFrame) and not df.empty]
+def ist_dataframe(obj) -> bool:
+    """isinstance(obj, pd.DataFrame) without importing pandas (a DataFrame implies pandas is loaded)."""
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(obj, pd.DataFrame)
+
+
+def safe_concat_plans(plans: dict) -> "pd.DataFrame":
+    import pandas as pd
+
+    non_empty = [df for df in plans.values() if ist_dataframe(df) and not df.empty]
     return pd.concat(non_empty, ignore_index=True) if non_empty else pd.DataFrame()
\ No newline at end of file
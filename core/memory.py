@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import result_nbytes
+from .helpers import ist_dataframe
+from .result import ScenarioResult
+
+# Speicherbudget je Session (gespeicherte Szenarien + Sidebar-Tabellen + zwischengespeicherte Diagrammdaten)
+BUDGET_STANDARD = int(float(os.environ.get("LOAN_DOLPHIN_SESSION_BUDGET_MB", "16")) * 1024 * 1024)
+
+_OHNE_INHALT = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def _slots(obj) -> list:
+    return [n for cls in type(obj).__mro__ for n in getattr(cls, "__slots__", ()) if n != "__weakref__"]
+
+
+def messe_bytes(obj, geteilt=frozenset()) -> int:
+    """
+    Approximate bytes held by `obj` and everything it references, each object counted once.
+
+    Arrays count their buffer (views and memory maps only their header), engine results
+    `result_nbytes`, DataFrames their deep `memory_usage`; containers and other objects count
+    `sys.getsizeof` plus their items, slots or attributes. Objects whose id is in `geteilt`
+    (e.g. results owned by the process-wide cache) count nothing.
+    """
+    gesehen = set()
+    nbytes = 0
+    stapel = [obj]
+    while stapel:
+        o = stapel.pop()
+        if id(o) in gesehen or id(o) in geteilt or isinstance(o, _OHNE_INHALT):
+            continue
+        gesehen.add(id(o))
+        if isinstance(o, np.ndarray):
+            nbytes += sys.getsizeof(o)
+            if isinstance(o.base, np.ndarray):
+                stapel.append(o.base)
+        elif isinstance(o, ScenarioResult):
+            nbytes += result_nbytes(o)
+        elif ist_dataframe(o):
+            nbytes += int(o.memory_usage(index=True, deep=True).sum())
+        elif isinstance(o, dict):
+            nbytes += sys.getsizeof(o)
+            stapel.extend(o.keys())
+            stapel.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            nbytes += sys.getsizeof(o)
+            stapel.extend(o)
+        else:
+            nbytes += sys.getsizeof(o)
+            stapel.extend(getattr(o, n) for n in _slots(o) if hasattr(o, n))
+            if hasattr(o, "__dict__"):
+                stapel.append(o.__dict__)
+    return nbytes
+
+
+class Groessen:
+    """
+    Sizes of named entries, measured once per object.
+
+    An entry is measured again only when its name refers to another object; the last measured
+    object per name is kept, so its id cannot be reused by a new object.
+    """
+
+    __slots__ = ("_eintraege",)
+
+    def __init__(self):
+        self._eintraege = {}  # name -> (obj, nbytes)
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
+
+    def groesse(self, name, obj, geteilt=frozenset()) -> int:
+        eintrag = self._eintraege.get(name)
+        if eintrag is not None and eintrag[0] is obj:
+            return eintrag[1]
+        nbytes = messe_bytes(obj, geteilt)
+        self._eintraege[name] = (obj, nbytes)
+        return nbytes
+
+
+def speicherbericht(gruppen: dict, groessen: Groessen | None = None, geteilt=frozenset()) -> list:
+    """
+    Memory report rows {"kategorie", "name", "bytes"} for {kategorie -> {name -> obj}}.
+
+    Entries whose size is already known can be passed as int (e.g. saved scenarios,
+    measured once when they were stored). `groessen` caches the sizes between reports;
+    objects in `geteilt` (ids) are not charged to the report.
+    """
+    zeilen = []
+    for kategorie, eintraege in gruppen.items():
+        for name, obj in eintraege.items():
+            if isinstance(obj, int):
+                nbytes = obj
+            elif groessen is not None:
+                nbytes = groessen.groesse((kategorie, name), obj, geteilt)
+            else:
+                nbytes = messe_bytes(obj, geteilt)
+            zeilen.append({"kategorie": kategorie, "name": name, "bytes": nbytes})
+    return zeilen
+
+
+class SzenarioSpeicher:
+    """
+    Saved scenarios of one session, oldest first, bounded by a byte budget.
+
+    Each scenario is measured once when saved. `speichere` evicts the oldest scenarios while
+    the saved ones plus the session's other state (`weitere_bytes`) exceed the budget; the
+    newest scenario is always kept.
+    """
+
+    __slots__ = ("budget", "_eintraege", "nbytes", "evictions")
+
+    def __init__(self, budget: int = BUDGET_STANDARD):
+        self.budget = budget
+        self._eintraege = OrderedDict()  # name -> (szenario, nbytes, zeitpunkt)
+        self.nbytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._eintraege)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._eintraege
+
+    def namen(self) -> list:
+        return list(self._eintraege)
+
+    def get(self, name: str):
+        eintrag = self._eintraege.get(name)
+        return None if eintrag is None else eintrag[0]
+
+    def neuestes(self):
+        """(name, szenario) of the most recently saved scenario, or None."""
+        if not self._eintraege:
+            return None
+        name = next(reversed(self._eintraege))
+        return name, self._eintraege[name][0]
+
+    def groessen(self) -> dict:
+        return {name: nbytes for name, (_, nbytes, _) in self._eintraege.items()}
+
+    def entferne(self, name: str) -> bool:
+        """Remove a saved scenario; False if there is none under `name`."""
+        eintrag = self._eintraege.pop(name, None)
+        if eintrag is None:
+            return False
+        self.nbytes -= eintrag[1]
+        return True
+
+    def speichere(self, name: str, szenario, weitere_bytes: int = 0) -> list:
+        """Save (or replace) a scenario under `name`; returns the names evicted to stay within budget."""
+        if name in self._eintraege:
+            self.nbytes -= self._eintraege.pop(name)[1]
+        nbytes = messe_bytes(szenario)
+        self._eintraege[name] = (szenario, nbytes, time.time())
+        self.nbytes += nbytes
+        return self.kuerze(weitere_bytes)
+
+    def kuerze(self, weitere_bytes: int = 0) -> list:
+        """Evict the oldest scenarios until everything fits the budget (the newest stays)."""
+        entfernt = []
+        while len(self._eintraege) > 1 and self.nbytes + weitere_bytes > self.budget:
+            name, (_, alt, _) = self._eintraege.popitem(last=False)
+            self.nbytes -= alt
+            self.evictions += 1
+            entfernt.append(name)
+        return entfernt
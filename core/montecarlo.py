@@ -0,0 +1,153 @@
+import numpy as np
+
+from .allocation import EPS, verteile_sondertilgung_batch
+from .annuity import annuitaet_monatsjahr
+from .calculations import calculate_financing_scenario
+from .helpers import MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from .registry import standard_register
+from .result import ScenarioResult
+from .sondertilgung import SondertilgungPlan
+
+
+class ZinsModell:
+    """
+    Mean-reverting short rate (Vasicek), simulated yearly with the exact discretization:
+    r(t+1) = mittel + (r(t) - mittel) * e^-a + volatilitaet * sqrt((1 - e^-2a) / 2a) * eps.
+
+    start is today's level (year 0); rates below `untergrenze` are floored.
+    """
+
+    __slots__ = ("start", "mittel", "geschwindigkeit", "volatilitaet", "untergrenze")
+
+    def __init__(self, start: float = 0.035, mittel: float = 0.04, geschwindigkeit: float = 0.15,
+                 volatilitaet: float = 0.01, untergrenze: float = 0.0):
+        if geschwindigkeit <= 0 or volatilitaet < 0:
+            raise ValueError("Zinsmodell: geschwindigkeit > 0 und volatilitaet >= 0 erforderlich.")
+        self.start = start
+        self.mittel = mittel
+        self.geschwindigkeit = geschwindigkeit
+        self.volatilitaet = volatilitaet
+        self.untergrenze = untergrenze
+
+    def __repr__(self) -> str:
+        return (f"ZinsModell(start={self.start}, mittel={self.mittel}, geschwindigkeit={self.geschwindigkeit}, "
+                f"volatilitaet={self.volatilitaet})")
+
+    def pfade(self, anzahl: int, jahre: int = MAX_JAHRE, rng: np.random.Generator | None = None) -> np.ndarray:
+        """Rate paths of shape (anzahl, jahre + 1); column t is the rate at the end of year t."""
+        rng = np.random.default_rng() if rng is None else rng
+        faktor = np.exp(-self.geschwindigkeit)
+        streuung = self.volatilitaet * np.sqrt((1.0 - faktor ** 2) / (2.0 * self.geschwindigkeit))
+        schocks = rng.standard_normal((anzahl, jahre)) * streuung
+        r = np.empty((anzahl, jahre + 1))
+        r[:, 0] = self.start
+        for t in range(jahre):
+            r[:, t + 1] = self.mittel + (r[:, t] - self.mittel) * faktor + schocks[:, t]
+        return np.maximum(r, self.untergrenze)
+
+
+def _zins_bis(szenario: ScenarioResult, jahre: int) -> np.ndarray:
+    """Interest per loan paid in years 1..jahre of a deterministic run."""
+    aktiv = np.arange(1, jahre + 1)[None, :] <= szenario.laufzeit[:, None]
+    return np.where(aktiv, szenario.plan[:, :jahre, 1], 0.0).sum(axis=1)
+
+
+def simulate_anschlussfinanzierung(params, st_fam, st_sie, zinsbindung_jahre: int, modell: ZinsModell | None = None,
+                                   pfade: int = 2_000, anschluss_bindung: int = 10, seed: int | None = None,
+                                   monatlich: bool = False, quantile=(5, 50, 95), reihenfolge: dict | None = None) -> dict:
+    """
+    Monte Carlo of the follow-up financing after Zinsbindung.
+
+    Years 1..zinsbindung_jahre are the deterministic engine run. From then on each loan pays
+    the simulated short rate plus its current spread over `modell.start`, fixed for
+    `anschluss_bindung` years at a time. At every reset the remaining balance is re-amortized
+    (new rate = Restschuld * (Zins + Anfangstilgung)). Sondertilgung plans keep running.
+    All paths and loans are advanced together, one vectorized step per year.
+    reihenfolge: allocation order per party as in the app (None = KfW waterfall).
+
+    Returns {"zinskosten": {partei -> (pfade,)}, "tilgungsjahr": {partei -> (pfade,)},
+    "zinspfade": (pfade, MAX_JAHRE + 1), "quantile": DataFrame} with parties plus "gesamt".
+    Tilgungsjahr MAX_JAHRE + 1 means not paid off within the horizon.
+    """
+    modell = ZinsModell() if modell is None else modell
+    if anschluss_bindung < 1:
+        raise ValueError("anschluss_bindung muss mindestens 1 Jahr sein.")
+    szenario = calculate_financing_scenario(params, st_fam, st_sie, monatlich=monatlich, reihenfolge=reihenfolge)
+    if not isinstance(szenario, ScenarioResult):
+        raise ValueError(szenario.get("error", "Szenario ohne Ergebnis."))
+
+    zb = int(np.clip(zinsbindung_jahre, 0, MAX_JAHRE))
+    register = standard_register(params, reihenfolge)
+    loan_keys = list(szenario.loan_keys)
+    idx_partei = {p.key: register.indizes_der_partei(p.key) for p in register.parteien}
+    summen = np.array([szenario["darlehen"][k] for k in loan_keys])
+    tilgung = register.tilgungen()
+    aufschlag = register.zinsen() - modell.start  # Produktaufschlag bleibt erhalten
+
+    rng = np.random.default_rng(seed)
+    zinspfade = modell.pfade(pfade, MAX_JAHRE, rng)
+
+    # Deterministischer Teil bis zum Ende der Zinsbindung
+    rs = np.tile([szenario.restschuld(zb, k) for k in loan_keys], (pfade, 1))
+    zinsen_summe = np.tile(_zins_bis(szenario, zb), (pfade, 1))
+    tilgungsjahr = np.tile(np.minimum(szenario.laufzeit, zb).astype(float), (pfade, 1))
+
+    st_params = {"fam": st_fam, "sie": st_sie}
+    st_plaene = []
+    for partei, idx in idx_partei.items():
+        plan = SondertilgungPlan.aus_eingabe(st_params.get(partei), register.loan_keys_der_partei(partei))
+        st_plaene.append((idx, plan, plan.obergrenzen(summen[idx])))
+    zins = np.zeros_like(rs)
+    jahresrate = np.zeros_like(rs)
+    for jahr in range(zb + 1, MAX_JAHRE + 1):
+        aktiv = rs > EPS
+        if not aktiv.any():
+            break
+        if (jahr - zb - 1) % anschluss_bindung == 0:  # Anschlusszins fixieren, Rate neu berechnen
+            zins = np.maximum(zinspfade[:, jahr - 1, None] + aufschlag, modell.untergrenze)
+            jahresrate = rs * (zins + tilgung)
+        if monatlich:
+            zinsen, tilg, _ = annuitaet_monatsjahr(rs, zins, jahresrate / 12.0)
+            zinsen, tilg = np.where(aktiv, zinsen, 0.0), np.where(aktiv, tilg, 0.0)
+        else:
+            zinsen = np.where(aktiv, rs * zins, 0.0)
+            tilg = np.where(aktiv, np.minimum(np.maximum(jahresrate - zinsen, 0.0), rs), 0.0)
+        rs = rs - tilg
+        zinsen_summe += zinsen
+        tilgungsjahr[aktiv] = jahr
+
+        # Sondertilgung pro Partei (wie im Plan, nun auf die simulierten Restschulden)
+        for idx, plan, grenzen in st_plaene:
+            if plan.modus == ST_MODUS_AUTO:
+                betrag = np.full(pfade, float(plan.werte[jahr - 1]))
+                rs[:, idx] -= verteile_sondertilgung_batch(betrag, rs[:, idx], zins[:, idx], grenzen)
+            elif plan.modus == ST_MODUS_MANUELL:
+                obergrenze = rs[:, idx] if grenzen is None else np.minimum(rs[:, idx], grenzen)
+                w = plan.werte[jahr - 1][None, :]
+                rs[:, idx] -= np.where(w > 0, np.minimum(w, obergrenze), 0.0)
+
+    # Nicht getilgt innerhalb des Horizonts
+    tilgungsjahr[rs > EPS] = MAX_JAHRE + 1
+
+    zinskosten = {p: zinsen_summe[:, idx].sum(axis=1) for p, idx in idx_partei.items()}
+    jahre = {p: tilgungsjahr[:, idx].max(axis=1) for p, idx in idx_partei.items()}
+    zinskosten["gesamt"] = zinsen_summe.sum(axis=1)
+    jahre["gesamt"] = tilgungsjahr.max(axis=1)
+
+    import pandas as pd
+
+    labels = {**register.labels["parteien"], "gesamt": "Gesamt"}
+    zeilen = {}
+    for p in zinskosten:
+        zeile = {}
+        for q in quantile:
+            zeile[f"Zinskosten P{q}"] = float(np.percentile(zinskosten[p], q))
+        for q in quantile:
+            zeile[f"Tilgungsjahr P{q}"] = float(np.percentile(jahre[p], q, method="inverted_cdf"))
+        zeilen[labels[p]] = zeile
+    return {
+        "zinskosten": zinskosten,
+        "tilgungsjahr": jahre,
+        "zinspfade": zinspfade,
+        "quantile": pd.DataFrame.from_dict(zeilen, orient="index"),
+    }
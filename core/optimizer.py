@@ -0,0 +1,202 @@
+import itertools
+import time
+
+import numpy as np
+
+from .batch import calculate_scenarios_batch
+from .helpers import MAX_JAHRE, ST_MODUS_MANUELL
+from .profiling import span
+from .registry import Kreditregister, standard_register
+
+# Aufteilungsmodi: Schlüssel -> Anzeigename; "wasserfall" ist die feste Reihenfolge des Registers
+AUFTEILUNG_WASSERFALL = "wasserfall"
+AUFTEILUNG_MODI = {
+    AUFTEILUNG_WASSERFALL: "Wasserfall (KfW 297 → KfW 124 → Hausbank)",
+    "zinskosten": "Beste Reihenfolge: geringste Zinskosten",
+    "monatsrate": "Beste Reihenfolge: geringste Monatsrate",
+}
+
+
+def beste_reihenfolge(register: Kreditregister, st_params: dict | None = None, ziel: str = "zinskosten",
+                      max_monatsrate: float | None = None, monatlich: bool = False) -> dict:
+    """
+    Best product order per party: a vertex heuristic for the cost-optimal split within the caps.
+
+    The feasible splits of a party (0 <= betrag <= obergrenze, sum = bedarf) form a polytope
+    whose vertices are exactly the waterfalls in some product order; only these vertices are
+    compared (all product orders in one batched engine call, every combination of parties).
+    The Monatsrate is linear in the amounts, so its minimum is a vertex and the "monatsrate"
+    goal is exact; so are the Zinskosten without Sondertilgung and budget. With a binding
+    `max_monatsrate` the optimum of the (per year linear) problem can lie on an edge, i.e. a
+    split shared between two products, which no order can express: the result is then the best
+    vertex within the budget, not necessarily the best split. The same holds when Sondertilgung
+    makes the Zinskosten non-linear in the amounts.
+
+    ziel: "zinskosten" (least total interest, optionally with gesamtrate <= max_monatsrate) or
+    "monatsrate" (least gesamtrate, ties broken by interest).
+
+    Returns {"reihenfolge": {partei -> product keys}, "zinskosten", "gesamtrate",
+    "budget_eingehalten", "kandidaten"}.
+    """
+    if ziel not in AUFTEILUNG_MODI or ziel == AUFTEILUNG_WASSERFALL:
+        raise ValueError(f"Unbekanntes Optimierungsziel: {ziel!r}")
+    produkte = [p.key for p in register.produkte]
+    reihenfolgen = list(itertools.permutations(produkte))  # erste = Wasserfall des Registers
+    summen = np.stack([
+        register.mit_reihenfolge({p.key: r for p in register.parteien}).aufteilung() for r in reihenfolgen
+    ])
+    with span("optimierung: aufteilung"):
+        batch = calculate_scenarios_batch(register, st_params, monatlich=monatlich, summen=summen)
+
+    # Alle Kombinationen (eine Reihenfolge je Partei) über die je Partei getrennten Kennzahlen
+    parteien = [p.key for p in register.parteien]
+    wahl = np.array(list(itertools.product(range(len(reihenfolgen)), repeat=len(parteien))))
+    zinskosten = sum(batch["zinskosten_partei"][p][wahl[:, i]] for i, p in enumerate(parteien))
+    raten = sum(batch["monatsraten_partei"][p][wahl[:, i]] for i, p in enumerate(parteien))
+    if ziel == "monatsrate":
+        beste = int(np.lexsort((zinskosten, raten))[0])
+        eingehalten = max_monatsrate is None or raten[beste] <= max_monatsrate
+    else:
+        zulaessig = np.ones(len(wahl), dtype=bool) if max_monatsrate is None else raten <= max_monatsrate + 1e-9
+        eingehalten = bool(zulaessig.any())
+        # Ohne zulässige Kombination: die mit der geringsten Rate
+        beste = int(np.argmin(np.where(zulaessig, zinskosten, np.inf))) if eingehalten else int(np.argmin(raten))
+    return {
+        "reihenfolge": {p: reihenfolgen[wahl[beste, i]] for i, p in enumerate(parteien)},
+        "zinskosten": float(zinskosten[beste]),
+        "gesamtrate": float(raten[beste]),
+        "budget_eingehalten": bool(eingehalten),
+        "kandidaten": len(reihenfolgen),
+    }
+
+
+def reihenfolge_fuer(params, st_params_fam, st_params_sie, modus: str = AUFTEILUNG_WASSERFALL,
+                     max_monatsrate: float | None = None, monatlich: bool = False) -> dict | None:
+    """Allocation order per party of the two-party setup for an Aufteilung mode (None = waterfall; see `beste_reihenfolge`)."""
+    if modus == AUFTEILUNG_WASSERFALL:
+        return None
+    if modus not in AUFTEILUNG_MODI:
+        raise ValueError(f"Unbekannter Aufteilungsmodus: {modus!r} (erlaubt: {', '.join(AUFTEILUNG_MODI)})")
+    register = standard_register([float(p) for p in params])
+    ergebnis = beste_reihenfolge(register, {"fam": st_params_fam, "sie": st_params_sie}, modus, max_monatsrate, monatlich)
+    standard = tuple(p.key for p in register.produkte)
+    # Nur Abweichungen vom Wasserfall speichern (gleiche Ergebnisse -> gleicher Cache-Schlüssel)
+    return {p: r for p, r in ergebnis["reihenfolge"].items() if r != standard} or None
+
+
+# Ziele der Sondertilgungsoptimierung (Kennzahlen der Partei wie in der Zielwertsuche)
+SONDERTILGUNG_ZIELE = {
+    "gesamte_zinskosten": "Geringste Zinskosten (gesamt)",
+    "restschuld_zinsbindung": "Geringste Restschuld nach Zinsbindung",
+}
+
+
+def optimiere_sondertilgung(register: Kreditregister, partei: str, ziel: str = "gesamte_zinskosten",
+                            budget_jahr=None, budget_gesamt: float | None = None, obergrenzen: dict | None = None,
+                            max_quote: float | None = None, zinsbindung_jahre: int = 10, monatlich: bool = False,
+                            schritte: int = 40) -> dict:
+    """
+    Sondertilgung schedule (year x loan of one party) under a cash budget.
+
+    budget_jahr: cash per year (scalar or MAX_JAHRE values), budget_gesamt: cash over all years;
+    at least one is required, both may apply. obergrenzen: {loan key -> € per year} and max_quote
+    (share of the loan amount per year, as in the plan) cap every loan and year.
+
+    The budget is spent greedily in chunks of about budget / `schritte`: each step evaluates the
+    current schedule plus one chunk in every open year x loan cell in one batched engine call and
+    keeps the cell with the largest gain per €. The interest saved by a Sondertilgung is almost
+    linear in its amount, so this is close to the optimum; the Restschuld goal amortizes only up
+    to the Zinsbindung, the Zinskosten goal only considers years in which the loan still runs.
+
+    Returns {"werte" (MAX_JAHRE, loans) for the manual mode, "loan_keys", "ziel", "wert", "ohne"
+    (goal without Sondertilgung), "eingesetzt" (cash actually used), "auswertungen", "sekunden"}.
+    """
+    if ziel not in SONDERTILGUNG_ZIELE:
+        raise ValueError(f"Unbekanntes Ziel: {ziel!r} (erlaubt: {', '.join(SONDERTILGUNG_ZIELE)})")
+    if budget_jahr is None and budget_gesamt is None:
+        raise ValueError("budget_jahr oder budget_gesamt angeben.")
+    start = time.perf_counter()
+    loan_keys = register.loan_keys_der_partei(partei)
+    idx = register.indizes_der_partei(partei)
+    alle_summen = np.atleast_2d(register.aufteilung())
+    summen = alle_summen[0, idx]
+    quote = max_quote if max_quote is not None and max_quote > 0 else None
+    obergrenzen = obergrenzen or {}
+
+    # Grenzen je Zelle (Jahr x Darlehen) und Budgets
+    grenze = np.array([np.inf if obergrenzen.get(k) is None else float(obergrenzen[k]) for k in loan_keys])
+    if quote is not None:
+        grenze = np.minimum(grenze, quote * summen)
+    grenze = np.where(summen > 0, grenze, 0.0)
+    jahr_budget = np.full(MAX_JAHRE, np.inf) if budget_jahr is None else \
+        np.broadcast_to(np.asarray(budget_jahr, dtype=float), (MAX_JAHRE,)).copy()
+    gesamt_budget = np.inf if budget_gesamt is None else float(budget_gesamt)
+    jahre = int(np.clip(zinsbindung_jahre, 1, MAX_JAHRE)) if ziel == "restschuld_zinsbindung" else MAX_JAHRE
+    auswertungen = 0
+
+    def auswerten(w: np.ndarray, details: bool = ziel == "restschuld_zinsbindung") -> dict:
+        nonlocal auswertungen
+        auswertungen += len(w)
+        return calculate_scenarios_batch(register, {partei: (ST_MODUS_MANUELL, w, quote)}, details=details,
+                                         monatlich=monatlich, jahre=jahre,
+                                         summen=np.repeat(alle_summen, len(w), axis=0))
+
+    def zielwert(batch: dict) -> np.ndarray:
+        if ziel == "gesamte_zinskosten":
+            return batch["zinskosten_partei"][partei]
+        return batch["restschuld_kredit"][:, jahre - 1, idx].sum(axis=1)
+
+    # Nur Jahre, in denen das Darlehen ohne Sondertilgung noch läuft
+    ohne = auswerten(np.zeros((1, MAX_JAHRE, len(idx))), details=True)
+    laeuft = np.ones((MAX_JAHRE, len(idx)), dtype=bool)
+    laeuft[1:] = ohne["restschuld_kredit"][0, :-1, idx].T > 0.01
+    laeuft[jahre:] = False
+    offen_grenze = np.where(laeuft, grenze, 0.0)
+
+    schritt = min(gesamt_budget, np.minimum(jahr_budget, offen_grenze.sum(axis=1)).sum()) / max(int(schritte), 1)
+    werte = np.zeros((MAX_JAHRE, len(idx)))
+    with span("optimierung: sondertilgung"):
+        while schritt > 0.005:
+            betrag = np.minimum.reduce([
+                np.full(werte.shape, schritt),
+                offen_grenze - werte,
+                np.broadcast_to((jahr_budget - werte.sum(axis=1))[:, None], werte.shape),
+                np.full(werte.shape, gesamt_budget - werte.sum()),
+            ])
+            zellen = np.argwhere(betrag > 0.005)
+            if not len(zellen):
+                break
+            kandidaten = np.repeat(werte[None], len(zellen) + 1, axis=0)
+            kandidaten[np.arange(1, len(zellen) + 1), zellen[:, 0], zellen[:, 1]] += betrag[zellen[:, 0], zellen[:, 1]]
+            z = zielwert(auswerten(kandidaten))
+            gewinn = (z[0] - z[1:]) / betrag[zellen[:, 0], zellen[:, 1]]
+            beste = int(np.argmax(gewinn))
+            if gewinn[beste] <= 1e-9:  # Darlehen getilgt: weitere Sondertilgung bringt nichts
+                break
+            j, k = zellen[beste]
+            werte[j, k] += betrag[j, k]
+
+    # Tatsächlich wirksame Beträge (Kappung an der Restschuld wie in der Engine)
+    ergebnis = auswerten(werte[None], details=True)
+    werte = ergebnis["sondertilgung_kredit"][0][:, idx]
+    return {
+        "partei": partei,
+        "loan_keys": list(loan_keys),
+        "ziel": ziel,
+        "werte": werte,
+        "wert": float(zielwert(ergebnis)[0]),
+        "ohne": float(zielwert(ohne)[0]),
+        "eingesetzt": float(werte.sum()),
+        "auswertungen": auswertungen,
+        "sekunden": time.perf_counter() - start,
+    }
+
+
+def sondertilgung_fuer(params, partei: str, ziel: str = "gesamte_zinskosten", budget_jahr=None,
+                       budget_gesamt: float | None = None, obergrenzen: dict | None = None,
+                       max_quote: float | None = None, zinsbindung_jahre: int = 10, monatlich: bool = False,
+                       reihenfolge: dict | None = None) -> dict:
+    """`optimiere_sondertilgung` for one party of the two-party setup."""
+    register = standard_register([float(p) for p in params], reihenfolge)
+    return optimiere_sondertilgung(register, partei, ziel, budget_jahr, budget_gesamt, obergrenzen, max_quote,
+                                   zinsbindung_jahre, monatlich)
@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import PARAM_FIELDS, calculate_financing_scenarios_batch
+from .helpers import LOAN_KEYS, MAX_JAHRE
+from .sondertilgung import SondertilgungPlan
+
+# Ergebnisfelder im Shared-Memory-Block: Name -> Form je Szenario (alles float64)
+ERGEBNIS_FELDER = {
+    "keine_finanzierung": (),
+    "gesamtkosten": (),
+    "finanzierungsbedarf": (),
+    "gesamtrate": (),
+    "gesamte_zinskosten": (),
+    "darlehen": (len(LOAN_KEYS),),
+    "monatsraten": (len(LOAN_KEYS),),
+    "restschuld": (MAX_JAHRE,),
+    "sondertilgung": (MAX_JAHRE,),
+}
+
+
+def _layout(n: int) -> tuple:
+    """Byte offsets of the ERGEBNIS_FELDER arrays for n scenarios, and the total size."""
+    offsets, pos = {}, 0
+    for feld, form in ERGEBNIS_FELDER.items():
+        offsets[feld] = pos
+        pos += n * int(np.prod(form, dtype=int)) * 8
+    return offsets, pos
+
+
+def _ansichten(puffer, n: int) -> dict:
+    offsets, _ = _layout(n)
+    return {
+        feld: np.ndarray((n, *form), dtype=np.float64, buffer=puffer, offset=offsets[feld])
+        for feld, form in ERGEBNIS_FELDER.items()
+    }
+
+
+def _st_teil(st_params, start: int, stop: int):
+    """Slice per-scenario Sondertilgung inputs to a chunk; shared plans pass through."""
+    if st_params is None or isinstance(st_params, SondertilgungPlan):
+        return st_params
+    modus, werte, *quote = st_params
+    werte = np.asarray(werte)
+    if werte.ndim in (2, 3) and werte.shape[1] == MAX_JAHRE:  # (n, MAX_JAHRE[, k]) je Szenario
+        werte = werte[start:stop]
+    quote = [np.asarray(q)[start:stop] if np.ndim(q) == 1 else q for q in quote]
+    return (modus, werte, *quote)
+
+
+def _worker(shm_name: str, n: int, start: int, stop: int, params: list, st_fam, st_sie, monatlich: bool,
+            reihenfolge: dict | None = None) -> int:
+    """Compute one chunk and write it into the shared block (runs in a worker process)."""
+    ergebnis = calculate_financing_scenarios_batch(params, st_fam, st_sie, monatlich=monatlich, reihenfolge=reihenfolge)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        ansichten = _ansichten(shm.buf, n)
+        for feld, ansicht in ansichten.items():
+            ansicht[start:stop] = ergebnis[feld]
+        del ansichten, ansicht  # Views freigeben, sonst lässt sich der Block nicht schließen
+    finally:
+        shm.close()
+    return stop - start
+
+
+def _mp_context():
+    # forkserver/spawn: Worker erben keinen Streamlit-Zustand und importieren nur core.batch
+    methoden = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methoden else "spawn")
+
+
+class ParallelExecutor:
+    """
+    Runs large scenario batches on a process pool.
+
+    Params are split into chunks; each worker evaluates its chunk with the batch engine and
+    writes the arrays into one `multiprocessing.shared_memory` block, so only the small
+    parameter slices are pickled. Workers need NumPy and `core` only (no Streamlit).
+    The pool is started lazily and reused across `run` calls; use as context manager or call `close`.
+    """
+
+    def __init__(self, max_workers: int | None = None, chunk_size: int = 2_048):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def __enter__(self) -> "ParallelExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _chunks(self, n: int) -> list:
+        # Mindestens ein paar Chunks je Worker, damit ungleich lange Läufe sich ausgleichen
+        groesse = max(1, min(self.chunk_size, -(-n // (self.max_workers * 4))))
+        return [(a, min(a + groesse, n)) for a in range(0, n, groesse)]
+
+    def run(self, params, st_fam=None, st_sie=None, monatlich: bool = False, reihenfolge: dict | None = None) -> tuple:
+        """
+        Evaluate n scenarios (params as for `calculate_financing_scenarios_batch`).
+
+        Returns (ergebnis, bericht): ergebnis holds the ERGEBNIS_FELDER arrays (row i =
+        scenario i), bericht the throughput report (szenarien, sekunden, szenarien_pro_sekunde,
+        worker, chunks).
+        """
+        if len(params) != len(PARAM_FIELDS):
+            raise ValueError(f"Erwartet {len(PARAM_FIELDS)} Parameter, erhalten: {len(params)}")
+        t0 = time.perf_counter()
+        werte = np.broadcast_arrays(*[np.atleast_1d(np.asarray(p, dtype=float)) for p in params])
+        n = werte[0].shape[0]
+        chunks = self._chunks(n)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(_layout(n)[1], 1))
+        try:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_mp_context())
+            futures = [
+                self._pool.submit(
+                    _worker, shm.name, n, a, b, [w[a:b] for w in werte],
+                    _st_teil(st_fam, a, b), _st_teil(st_sie, a, b), monatlich, reihenfolge,
+                )
+                for a, b in chunks
+            ]
+            berechnet = sum(f.result() for f in futures)
+            ergebnis = {feld: np.array(ansicht) for feld, ansicht in _ansichten(shm.buf, n).items()}
+        finally:
+            shm.close()
+            shm.unlink()
+        ergebnis["keine_finanzierung"] = ergebnis["keine_finanzierung"].astype(bool)
+        ergebnis["loan_keys"] = list(LOAN_KEYS)
+
+        sekunden = time.perf_counter() - t0
+        bericht = {
+            "szenarien": berechnet,
+            "sekunden": sekunden,
+            "szenarien_pro_sekunde": berechnet / sekunden if sekunden > 0 else float("inf"),
+            "worker": self.max_workers,
+            "chunks": len(chunks),
+        }
+        return ergebnis, bericht
+
+
+def parallel_financing_scenarios(params, st_fam=None, st_sie=None, max_workers: int | None = None,
+                                 chunk_size: int = 2_048, monatlich: bool = False) -> tuple:
+    """One-off `ParallelExecutor.run` with a temporary pool."""
+    with ParallelExecutor(max_workers=max_workers, chunk_size=chunk_size) as executor:
+        return executor.run(params, st_fam, st_sie, monatlich=monatlich)
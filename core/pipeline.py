@@ -0,0 +1,218 @@
+import numpy as np
+
+from .calculations import calculate_scenario, get_restschuld_nach_jahren, sum_sondertilgung_for_year
+from .helpers import CONFIG_FELDER, GROUPS, loans_by_prefix
+from .optimizer import reihenfolge_fuer
+from .profiling import span
+from .registry import standard_register
+from .sondertilgung import SondertilgungPlan
+
+# Eingaben der Zuteilung (Kosten/EK/Zuschüsse je Partei, Obergrenzen) und der Raten (Zinsen, Anfangstilgung)
+ZUTEILUNG_FELDER = CONFIG_FELDER[:6] + CONFIG_FELDER[11:]
+RATEN_FELDER = CONFIG_FELDER[6:11]
+# Eingaben des Tilgungsplans neben Zuteilung und Raten (Kosten/EK/Zuschüsse, Zinsen)
+TILGUNG_FELDER = CONFIG_FELDER[:9]
+_OHNE_SCHLUESSEL = object()  # Wert ohne Inhaltsschlüssel (z. B. Szenario): jede Neuberechnung ist eine neue Version
+
+
+def _schluessel(wert):
+    """Hashable key of an input value; raises TypeError for values without a content key."""
+    if wert is None or isinstance(wert, (bool, int, float, str, np.number)):
+        return wert
+    if isinstance(wert, (tuple, list)):
+        return tuple(_schluessel(w) for w in wert)
+    if isinstance(wert, dict):
+        return tuple((k, _schluessel(w)) for k, w in wert.items())
+    if isinstance(wert, np.ndarray):
+        return (wert.dtype.str, wert.shape, wert.tobytes())
+    if isinstance(wert, SondertilgungPlan):
+        return ("plan", wert.modus, tuple(wert.loan_keys), wert.max_quote, wert.werte.tobytes())
+    raise TypeError(f"Kein Schlüssel für {type(wert).__name__}")
+
+
+class Knoten:
+    """
+    One memoized stage: `funktion(*werte)` over named inputs (raw inputs or other nodes).
+
+    With `vorwert=True` the function also gets the node's previous value as `vorwert=`
+    (None on the first run), e.g. as checkpoint basis of an incremental recomputation.
+    """
+
+    __slots__ = ("name", "funktion", "eingaben", "vorwert")
+
+    def __init__(self, name: str, funktion, eingaben=(), vorwert: bool = False):
+        self.name = name
+        self.funktion = funktion
+        self.eingaben = tuple(eingaben)
+        self.vorwert = vorwert
+
+    def __repr__(self) -> str:
+        return f"Knoten({self.name!r}, eingaben={self.eingaben!r})"
+
+
+class Pipeline:
+    """
+    Memoized computation stages of one session, each keyed on its own inputs.
+
+    Raw inputs enter a node's key by value, upstream nodes by version. A node that recomputes
+    gets a new version unless its value has a content key equal to the previous one (e.g. an
+    unchanged allocation after moving money between equity and grants), so downstream nodes
+    rerun only when something they read really changed. Each node keeps its last value only.
+    """
+
+    __slots__ = ("knoten", "_stand", "protokoll")
+
+    def __init__(self, knoten):
+        self.knoten = {}
+        for k in knoten:
+            if k.name in self.knoten:
+                raise ValueError(f"Knoten doppelt: {k.name!r}")
+            self.knoten[k.name] = k
+        self._stand = {}  # name -> (eingabe-schluessel, wert, wert-schluessel, version)
+        self.protokoll = {}  # name -> True (neu berechnet) / False (wiederverwendet), letzter Lauf
+
+    def lauf(self, eingaben: dict) -> "Lauf":
+        """Start a rerun with the raw inputs (e.g. the sidebar config); nodes evaluate on access."""
+        self.protokoll = {}
+        return Lauf(self, eingaben)
+
+    def werte(self) -> dict:
+        """Last value of every computed node."""
+        return {name: stand[1] for name, stand in self._stand.items()}
+
+    def _berechne(self, knoten: Knoten, schluessel: tuple, werte: list) -> int:
+        alt = self._stand.get(knoten.name)
+        with span(f"knoten: {knoten.name}"):
+            if knoten.vorwert:
+                wert = knoten.funktion(*werte, vorwert=alt[1] if alt is not None else None)
+            else:
+                wert = knoten.funktion(*werte)
+        try:
+            wert_schluessel = _schluessel(wert)
+        except TypeError:
+            wert_schluessel = _OHNE_SCHLUESSEL
+        if alt is None:
+            version = 0
+        elif wert_schluessel is not _OHNE_SCHLUESSEL and wert_schluessel == alt[2]:
+            version = alt[3]
+        else:
+            version = alt[3] + 1
+        self._stand[knoten.name] = (schluessel, wert, wert_schluessel, version)
+        return version
+
+
+class Lauf:
+    """One rerun of a `Pipeline`: `lauf["tilgung"]` evaluates a node (and what it reads) at most once."""
+
+    __slots__ = ("pipeline", "eingaben", "_versionen")
+
+    def __init__(self, pipeline: Pipeline, eingaben: dict):
+        self.pipeline = pipeline
+        self.eingaben = eingaben
+        self._versionen = {}
+
+    def __getitem__(self, name: str):
+        self._version(name)
+        return self.pipeline._stand[name][1]
+
+    def _version(self, name: str) -> int:
+        version = self._versionen.get(name)
+        if version is not None:
+            return version
+        pipeline = self.pipeline
+        knoten = pipeline.knoten[name]
+        werte, schluessel = [], []
+        for eingabe in knoten.eingaben:
+            if eingabe in pipeline.knoten:
+                schluessel.append(("knoten", self._version(eingabe)))
+                werte.append(pipeline._stand[eingabe][1])
+            else:
+                wert = self.eingaben[eingabe]
+                schluessel.append(_schluessel(wert))
+                werte.append(wert)
+        schluessel = tuple(schluessel)
+        stand = pipeline._stand.get(name)
+        if stand is not None and stand[0] == schluessel:
+            version = stand[3]
+            pipeline.protokoll[name] = False
+        else:
+            version = pipeline._berechne(knoten, schluessel, werte)
+            pipeline.protokoll[name] = True
+        self._versionen[name] = version
+        return version
+
+
+def _reihenfolge(*eingaben) -> dict | None:
+    """Allocation order per party for the chosen Aufteilung mode (None = KfW waterfall)."""
+    params, (st_fam, st_sie, monatlich, modus, max_monatsrate) = list(eingaben[:13]), eingaben[13:]
+    return reihenfolge_fuer(params, st_fam, st_sie, modus, max_monatsrate or None, monatlich)
+
+
+def _zuteilung(*felder) -> dict:
+    """Financing need per party and the loan amounts in the allocation order (rates play no role here)."""
+    kosten_ek_zus, obergrenzen, reihenfolge = felder[:6], felder[6:8], felder[8]
+    register = standard_register([*kosten_ek_zus, 0.0, 0.0, 0.0, 0.0, 0.0, *obergrenzen], reihenfolge)
+    return {
+        "bedarf": dict(zip((p.key for p in register.parteien), register.bedarf().tolist())),
+        "darlehen": dict(zip(register.loan_keys, register.aufteilung().tolist())),
+    }
+
+
+def _monatsraten(zuteilung: dict, *raten) -> dict:
+    """Initial Monatsrate per loan and per party for the allocated amounts."""
+    register = standard_register([0.0] * 6 + list(raten) + [0.0, 0.0])
+    summen = np.array([zuteilung["darlehen"][k] for k in register.loan_keys])
+    monatsraten = dict(zip(register.loan_keys, register.monatsraten(summen).tolist()))
+    return {
+        "monatsraten": monatsraten,
+        "partei": {p.key: sum(monatsraten[k] for k in register.loan_keys_der_partei(p.key)) for p in register.parteien},
+        "gesamt": sum(monatsraten.values()),
+    }
+
+
+def _tilgung(zuteilung: dict, monatsraten: dict, *eingaben, vorwert=None):
+    """
+    Yearly plans for the amounts and rates of the upstream nodes (no second allocation).
+
+    The previous plans serve as checkpoint basis: after a Sondertilgung edit only the years
+    from the first changed one are recomputed.
+    """
+    felder, (st_fam, st_sie, monatlich) = list(eingaben[:9]), eingaben[9:]
+    register = standard_register([*felder, 0.0, 0.0, 0.0, 0.0])
+    vorgabe = {"darlehen": zuteilung["darlehen"], "monatsraten": monatsraten["monatsraten"]}
+    return calculate_scenario(register, {"fam": st_fam, "sie": st_sie}, basis=vorwert, monatlich=monatlich,
+                              vorgabe=vorgabe, checkpoint=True)
+
+
+def _aggregate(szenario) -> dict | None:
+    """Yearly summaries and per-party plan series (DataFrames) of a scenario, None if nothing is financed."""
+    if "error" in szenario:
+        return None
+    parteien = szenario.get("parteien", GROUPS)
+    plaene = dict(szenario["tilgungsplaene"])
+    return {
+        "serien": {p: loans_by_prefix(plaene, f"{p}_") for p in parteien},
+        "jahresuebersicht": {p: szenario.jahresuebersicht(p) for p in (*parteien, None)},
+    }
+
+
+def _kennzahlen(szenario, zinsbindung_jahre: int) -> dict:
+    if "error" in szenario:
+        return {"restschuld": 0.0, "sonder_j1": 0.0}
+    return {
+        "restschuld": get_restschuld_nach_jahren(szenario, zinsbindung_jahre),
+        "sonder_j1": sum_sondertilgung_for_year(szenario["sondertilgungen"], 1),
+    }
+
+
+# Stufen der App-Rechnung; Eingabenamen wie in der Sidebar-Konfiguration
+FINANZIERUNG_KNOTEN = (
+    Knoten("reihenfolge", _reihenfolge,
+           (*CONFIG_FELDER, "st_plan_fam", "st_plan_sie", "monatlich", "aufteilung", "max_monatsrate")),
+    Knoten("zuteilung", _zuteilung, (*ZUTEILUNG_FELDER, "reihenfolge")),
+    Knoten("monatsraten", _monatsraten, ("zuteilung", *RATEN_FELDER)),
+    Knoten("tilgung", _tilgung,
+           ("zuteilung", "monatsraten", *TILGUNG_FELDER, "st_plan_fam", "st_plan_sie", "monatlich"), vorwert=True),
+    Knoten("aggregate", _aggregate, ("tilgung",)),
+    Knoten("kennzahlen", _kennzahlen, ("tilgung", "Zinsbindung_Jahre")),
+)
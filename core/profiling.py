@@ -0,0 +1,93 @@
+import contextvars
+import json
+import time
+from contextlib import nullcontext
+
+# Aktive Messung des laufenden Reruns (None = Zeitmessung aus); je Thread / Kontext getrennt
+_AKTUELL = contextvars.ContextVar("loan_dolphin_zeitmessung", default=None)
+_AUS = nullcontext()  # wiederverwendbar, kostet fast nichts
+
+
+class _Span:
+    __slots__ = ("messung", "name", "start")
+
+    def __init__(self, messung: "Zeitmessung", name: str):
+        self.messung = messung
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.messung._tiefe += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        ende = time.perf_counter()
+        m = self.messung
+        m._tiefe -= 1
+        m.spans.append((self.name, self.start - m.beginn, ende - self.start, m._tiefe, 1))
+
+
+class Zeitmessung:
+    """
+    Timing spans of one rerun: (name, start offset, seconds, nesting depth, calls).
+
+    Spans are recorded in the order they end; `erfasse` adds a pre-aggregated measurement
+    (e.g. the summed Sondertilgung time over all plan years).
+    """
+
+    __slots__ = ("spans", "beginn", "_tiefe")
+
+    def __init__(self):
+        self.spans = []
+        self.beginn = time.perf_counter()
+        self._tiefe = 0
+
+    def span(self, name: str) -> _Span:
+        return _Span(self, name)
+
+    def erfasse(self, name: str, sekunden: float, anzahl: int = 1) -> None:
+        self.spans.append((name, None, sekunden, self._tiefe, anzahl))
+
+    @property
+    def gesamt(self) -> float:
+        return time.perf_counter() - self.beginn
+
+    def zusammenfassung(self) -> list:
+        """Per span name: calls, total and max seconds, sorted by total time (descending)."""
+        summen = {}
+        for name, _, dauer, tiefe, anzahl in self.spans:
+            s = summen.setdefault(name, {"name": name, "tiefe": tiefe, "aufrufe": 0, "sekunden": 0.0, "max": 0.0})
+            s["aufrufe"] += anzahl
+            s["sekunden"] += dauer
+            s["max"] = max(s["max"], dauer / anzahl)
+        return sorted(summen.values(), key=lambda s: -s["sekunden"])
+
+    def als_dict(self) -> dict:
+        return {
+            "gesamt_sekunden": self.gesamt,
+            "zusammenfassung": self.zusammenfassung(),
+            "spans": [
+                {"name": n, "start": s, "sekunden": d, "tiefe": t, "aufrufe": a} for n, s, d, t, a in self.spans
+            ],
+        }
+
+    def als_json(self) -> str:
+        return json.dumps(self.als_dict(), indent=2)
+
+
+def starte(aktiv: bool = True) -> Zeitmessung | None:
+    """Start collecting spans for the current rerun (or switch collection off); returns the collector."""
+    messung = Zeitmessung() if aktiv else None
+    _AKTUELL.set(messung)
+    return messung
+
+
+def aktuell() -> Zeitmessung | None:
+    """Collector of the current rerun, None while timing is switched off."""
+    return _AKTUELL.get()
+
+
+def span(name: str):
+    """`with span("engine: zuteilung"):` – timed block, a shared no-op while timing is off."""
+    messung = _AKTUELL.get()
+    return _AUS if messung is None else _Span(messung, name)
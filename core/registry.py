@@ -0,0 +1,180 @@
+import numpy as np
+
+from .helpers import CONFIG_FELDER, GROUPS, PRODUCT_LABELS
+
+
+class Produkt:
+    """
+    One loan product (tranche type) offered to every party.
+
+    zins is the yearly rate; obergrenze the maximum amount per party (None = unbegrenzt).
+    """
+
+    __slots__ = ("key", "label", "zins", "obergrenze")
+
+    def __init__(self, key: str, label: str, zins, obergrenze=None):
+        self.key = key
+        self.label = label
+        self.zins = zins
+        self.obergrenze = obergrenze
+
+    def __repr__(self) -> str:
+        return f"Produkt({self.key!r}, zins={self.zins!r}, obergrenze={self.obergrenze!r})"
+
+
+class Partei:
+    """One owner with own costs, equity, grants and Anfangstilgung; `key` is the loan key prefix."""
+
+    __slots__ = ("key", "label", "kosten", "ek", "zuschuss", "tilgung")
+
+    def __init__(self, key: str, label: str, kosten, ek, zuschuss, tilgung):
+        self.key = key
+        self.label = label
+        self.kosten = kosten
+        self.ek = ek
+        self.zuschuss = zuschuss
+        self.tilgung = tilgung
+
+    def __repr__(self) -> str:
+        return f"Partei({self.key!r}, kosten={self.kosten!r})"
+
+    @property
+    def bedarf(self):
+        """Financing need (never negative)."""
+        return np.maximum(np.asarray(self.kosten, dtype=float) - self.ek - self.zuschuss, 0.0)
+
+
+class Kreditregister:
+    """
+    Declarative loan model: parties x products.
+
+    Every party finances its need through the products in list order (allocation order),
+    each up to its obergrenze; the last product is usually unbounded. `reihenfolge` overrides
+    the allocation order per party ({partei -> product keys}, e.g. from the split optimizer);
+    loans keep their positions. Loans are the cross product with key "<partei>_<produkt>",
+    party-major. Numeric fields may be scalars (one scenario) or arrays of shape (n,) (batch);
+    all derived arrays then carry a leading n axis.
+    """
+
+    __slots__ = ("parteien", "produkte", "reihenfolge")
+
+    def __init__(self, parteien, produkte, reihenfolge: dict | None = None):
+        self.parteien = tuple(parteien)
+        self.produkte = tuple(produkte)
+        if not self.parteien or not self.produkte:
+            raise ValueError("Kreditregister braucht mindestens eine Partei und ein Produkt.")
+        for name, eintraege in (("Partei", self.parteien), ("Produkt", self.produkte)):
+            keys = [e.key for e in eintraege]
+            if len(set(keys)) != len(keys) or any("_" in k for k in keys):
+                raise ValueError(f"{name}-Schlüssel müssen eindeutig sein und ohne '_': {keys}")
+        self.reihenfolge = {}
+        produkt_keys = sorted(p.key for p in self.produkte)
+        for partei, keys in (reihenfolge or {}).items():
+            if partei not in [p.key for p in self.parteien] or sorted(keys) != produkt_keys:
+                raise ValueError(f"Reihenfolge für {partei!r} muss alle Produkte genau einmal enthalten: {keys}")
+            self.reihenfolge[partei] = tuple(keys)
+
+    def __repr__(self) -> str:
+        return f"Kreditregister(parteien={[p.key for p in self.parteien]}, produkte={[p.key for p in self.produkte]})"
+
+    @property
+    def loan_keys(self) -> list:
+        return [f"{partei.key}_{produkt.key}" for partei in self.parteien for produkt in self.produkte]
+
+    def loan_keys_der_partei(self, partei: str) -> list:
+        return [f"{partei}_{produkt.key}" for produkt in self.produkte]
+
+    def indizes_der_partei(self, partei: str) -> list:
+        """Positions of a party's loans in `loan_keys`."""
+        p = [x.key for x in self.parteien].index(partei)
+        n = len(self.produkte)
+        return list(range(p * n, (p + 1) * n))
+
+    @property
+    def labels(self) -> dict:
+        return {
+            "parteien": {p.key: p.label for p in self.parteien},
+            "produkte": {p.key: p.label for p in self.produkte},
+        }
+
+    def bedarf(self) -> np.ndarray:
+        """Financing need per party, shape (..., parteien)."""
+        return np.stack(np.broadcast_arrays(*[p.bedarf for p in self.parteien]), axis=-1)
+
+    def aufteilung(self) -> np.ndarray:
+        """Loan amounts in `loan_keys` order, shape (..., loans): per party a waterfall over the products."""
+        produkte = {p.key: p for p in self.produkte}
+        spalten = []
+        for partei in self.parteien:
+            rest = partei.bedarf
+            betraege = {}
+            for key in self.reihenfolge.get(partei.key, produkte):
+                produkt = produkte[key]
+                if produkt.obergrenze is None:
+                    betrag = np.maximum(rest, 0.0)
+                else:
+                    betrag = np.minimum(rest, produkt.obergrenze)
+                rest = rest - betrag
+                betraege[key] = betrag
+            spalten.extend(betraege[key] for key in produkte)
+        return np.stack(np.broadcast_arrays(*spalten), axis=-1)
+
+    def zinsen(self) -> np.ndarray:
+        """Yearly rate per loan, shape (..., loans)."""
+        spalten = [np.asarray(produkt.zins, dtype=float) for _ in self.parteien for produkt in self.produkte]
+        return np.stack(np.broadcast_arrays(*spalten), axis=-1)
+
+    def tilgungen(self) -> np.ndarray:
+        """Anfangstilgung per loan (the owning party's), shape (..., loans)."""
+        spalten = [np.asarray(partei.tilgung, dtype=float) for partei in self.parteien for _ in self.produkte]
+        return np.stack(np.broadcast_arrays(*spalten), axis=-1)
+
+    def monatsraten(self, summen: np.ndarray | None = None) -> np.ndarray:
+        """Initial Monatsrate per loan: summe * (zins + tilgung) / 12, 0 for unused loans."""
+        summen = self.aufteilung() if summen is None else summen
+        return np.where(summen > 0, summen * ((self.zinsen() + self.tilgungen()) / 12.0), 0.0)
+
+    def schluessel(self) -> tuple:
+        """Hashable identity of the (scalar) register, e.g. for checkpoint reuse."""
+        return (
+            tuple((p.key, float(p.kosten), float(p.ek), float(p.zuschuss), float(p.tilgung)) for p in self.parteien),
+            tuple((p.key, float(p.zins), None if p.obergrenze is None else float(p.obergrenze)) for p in self.produkte),
+            tuple(sorted(self.reihenfolge.items())),
+        )
+
+    def mit_reihenfolge(self, reihenfolge: dict | None) -> "Kreditregister":
+        """Same parties and products with another allocation order per party (None = list order)."""
+        return Kreditregister(self.parteien, self.produkte, reihenfolge)
+
+
+def standard_register(params, reihenfolge: dict | None = None) -> Kreditregister:
+    """
+    Register of the app's two-party setup from the 13 engine params (see batch.PARAM_FIELDS):
+    KfW 297 (two units per party) -> KfW 124 -> Hausbank. Params may be scalars or (n,) arrays.
+    reihenfolge: optional allocation order per party (see `Kreditregister`).
+    """
+    (
+        kosten_fam, ek_fam, zus_fam,
+        kosten_sie, ek_sie, zus_sie,
+        z_kfw297, z_kfw124, z_hausbank,
+        tilgung_fam, tilgung_sie,
+        max_kfw297, max_kfw124,
+    ) = params
+    return Kreditregister(
+        parteien=[
+            Partei("fam", GROUPS["fam"], kosten_fam, ek_fam, zus_fam, tilgung_fam),
+            Partei("sie", GROUPS["sie"], kosten_sie, ek_sie, zus_sie, tilgung_sie),
+        ],
+        produkte=[
+            Produkt("kfw297", PRODUCT_LABELS["kfw297"], z_kfw297, 2 * max_kfw297),
+            Produkt("kfw124", PRODUCT_LABELS["kfw124"], z_kfw124, max_kfw124),
+            Produkt("hausbank", PRODUCT_LABELS["hausbank"], z_hausbank),
+        ],
+        reihenfolge=reihenfolge,
+    )
+
+
+def standard_parteien() -> dict:
+    """Party key -> loan keys of the app's two-party setup, i.e. the structure of `standard_register`."""
+    register = standard_register([0.0] * len(CONFIG_FELDER))
+    return {p.key: register.loan_keys_der_partei(p.key) for p in register.parteien}
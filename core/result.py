@@ -0,0 +1,171 @@
+from collections.abc import Mapping
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .profiling import span
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Spalten eines Tilgungsplans (nach "Jahr"), Reihenfolge = letzte Achse von ScenarioResult.plan
+PLAN_FELDER = ("Restschuld Start", "Zinsen p.a.", "Tilgung p.a.", "Sondertilgung", "Restschuld Ende")
+
+
+class LazyPlans(Mapping):
+    """Read-only {loan key -> DataFrame} view; each DataFrame is built only when accessed."""
+
+    __slots__ = ("_result",)
+
+    def __init__(self, result: "ScenarioResult"):
+        self._result = result
+
+    def __getitem__(self, key: str) -> "pd.DataFrame":
+        return self._result.plan_frame(key)
+
+    def __iter__(self):
+        return iter(self._result.loan_keys)
+
+    def __len__(self) -> int:
+        return len(self._result.loan_keys)
+
+
+class ScenarioResult(Mapping):
+    """
+    Engine result backed by compact arrays.
+
+    plan[i, j] holds the PLAN_FELDER of loan `loan_keys[i]` in Jahr j + 1; only the first
+    laufzeit[i] years are part of its plan. sondertilgung[i, j] is every Sondertilgung booked
+    on that loan in that year. Behaves like the former result dict: scalar entries live in
+    `kennzahlen`, while "tilgungsplaene" and "sondertilgungen" are derived on access.
+    """
+
+    __slots__ = ("loan_keys", "plan", "laufzeit", "sondertilgung", "kennzahlen", "_index", "_kurven", "_summen")
+
+    ABGELEITET = ("tilgungsplaene", "sondertilgungen")
+
+    def __init__(self, loan_keys, plan: np.ndarray, laufzeit: np.ndarray, sondertilgung: np.ndarray, kennzahlen: dict):
+        self.loan_keys = tuple(loan_keys)
+        self.plan = plan
+        self.laufzeit = np.asarray(laufzeit, dtype=np.int64)
+        self.sondertilgung = sondertilgung
+        self.kennzahlen = kennzahlen
+        self._index = {k: i for i, k in enumerate(self.loan_keys)}
+        self._kurven = None
+        self._summen = {}
+        for arr in (self.plan, self.laufzeit, self.sondertilgung):
+            arr.flags.writeable = False
+
+    # --- Mapping-Interface (kompatibel zum bisherigen Ergebnis-Dict)
+    def __getitem__(self, key: str):
+        if key == "tilgungsplaene":
+            return LazyPlans(self)
+        if key == "sondertilgungen":
+            return self.sondertilgungen_dict()
+        return self.kennzahlen[key]
+
+    def __iter__(self):
+        yield from self.kennzahlen
+        yield from self.ABGELEITET
+
+    def __len__(self) -> int:
+        return len(self.kennzahlen) + len(self.ABGELEITET)
+
+    def __repr__(self) -> str:
+        return f"ScenarioResult(loans={len(self.loan_keys)}, gesamtrate={self.kennzahlen.get('gesamtrate', 0.0):,.2f})"
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.plan.nbytes + self.laufzeit.nbytes + self.sondertilgung.nbytes)
+
+    # --- Restschuld-Kurven (Index = Jahr)
+    def _restschuld_kurven(self) -> dict:
+        """
+        Balance curves indexed by year: per loan key, per party prefix ("fam", "sie") and
+        total (None). Index 0 is the initial amount; after a loan's last plan year it is 0.
+        """
+        if self._kurven is None:
+            n_jahre = self.plan.shape[1]
+            jahre = np.arange(1, n_jahre + 1)
+            kredit = np.zeros((len(self.loan_keys), n_jahre + 1))
+            kredit[:, 0] = self.plan[:, 0, 0]
+            kredit[:, 1:] = np.where(jahre[None, :] <= self.laufzeit[:, None], self.plan[:, :, 4], 0.0)
+            kurven = {k: kredit[i] for i, k in enumerate(self.loan_keys)}
+            for partei in dict.fromkeys(k.split("_", 1)[0] for k in self.loan_keys):
+                kurven[partei] = kredit[[i for i, k in enumerate(self.loan_keys) if k.startswith(partei + "_")]].sum(axis=0)
+            kurven[None] = kredit.sum(axis=0)
+            for kurve in kurven.values():
+                kurve.flags.writeable = False
+            self._kurven = kurven
+        return self._kurven
+
+    def restschuld_kurve(self, schluessel: str | None = None) -> np.ndarray:
+        """Restschuld after 0..MAX_JAHRE years for a loan key, a party ("fam"/"sie") or in total (None)."""
+        return self._restschuld_kurven()[schluessel]
+
+    def restschuld(self, jahre, schluessel: str | None = None):
+        """
+        Restschuld after `jahre` years (int -> float, array -> array), O(1) per year.
+
+        Years past the horizon count as paid off; years < 1 return the initial amount.
+        """
+        kurve = self.restschuld_kurve(schluessel)
+        j = np.asarray(jahre)
+        werte = np.where(j > len(kurve) - 1, 0.0, kurve[np.clip(j, 0, len(kurve) - 1)])
+        return float(werte) if werte.ndim == 0 else werte
+
+    # --- Jahressummen je Partei / gesamt
+    def _kredit_indizes(self, partei: str | None) -> list:
+        return [i for i, k in enumerate(self.loan_keys) if partei is None or k.startswith(partei + "_")]
+
+    def jahressummen(self, partei: str | None = None) -> np.ndarray:
+        """
+        Yearly sums of PLAN_FELDER over a party's loans (or all loans), shape (jahre, felder).
+
+        Row j is Jahr j + 1; rows stop after the last year in which any of these loans runs,
+        matching concat + groupby("Jahr").sum() over the plan DataFrames.
+        """
+        if partei not in self._summen:
+            idx = self._kredit_indizes(partei)
+            laufzeit = self.laufzeit[idx]
+            n_jahre = int(laufzeit.max()) if len(idx) else 0
+            aktiv = np.arange(1, n_jahre + 1)[None, :] <= laufzeit[:, None]
+            summen = np.where(aktiv[:, :, None], self.plan[idx, :n_jahre], 0.0).sum(axis=0)
+            summen.flags.writeable = False
+            self._summen[partei] = summen
+        return self._summen[partei]
+
+    def jahresuebersicht(self, partei: str | None = None) -> "pd.DataFrame":
+        """`jahressummen` as DataFrame with a leading "Jahr" column (empty if no loan runs)."""
+        import pandas as pd
+
+        with span("dataframe: jahresübersicht"):
+            summen = self.jahressummen(partei)
+            if len(summen) == 0:
+                return pd.DataFrame()
+            df = pd.DataFrame(summen, columns=list(PLAN_FELDER), copy=True)
+            df.insert(0, "Jahr", np.arange(1, len(summen) + 1))
+        return df
+
+    # --- Lazy materialization
+    def plan_frame(self, key: str) -> "pd.DataFrame":
+        """Yearly plan of one loan as DataFrame (empty DataFrame if the loan never runs)."""
+        import pandas as pd
+
+        i = self._index[key]
+        n = int(self.laufzeit[i])
+        if n == 0:
+            return pd.DataFrame()
+        with span("dataframe: tilgungsplan"):
+            df = pd.DataFrame(self.plan[i, :n], columns=list(PLAN_FELDER), copy=True)
+            df.insert(0, "Jahr", np.arange(1, n + 1))
+        return df
+
+    def sondertilgungen_dict(self) -> dict:
+        """{loan key -> {jahr -> betrag}} for every booked Sondertilgung."""
+        out = {}
+        for i, k in enumerate(self.loan_keys):
+            jahre = np.flatnonzero(self.sondertilgung[i])
+            out[k] = dict(zip((jahre + 1).tolist(), self.sondertilgung[i, jahre].tolist()))
+        return out
@@ -0,0 +1,165 @@
+import time
+
+import numpy as np
+
+from .batch import PARAM_FIELDS, calculate_scenarios_batch
+from .helpers import MAX_JAHRE, ST_MODUS_AUTO
+from .registry import standard_register
+from .sondertilgung import SondertilgungPlan
+from .sweep import SWEEP_KENNZAHLEN
+
+# Stellgrößen: Anzeigename -> (Parameterfelder bzw. "st_<partei>", Untergrenze, Obergrenze, Toleranz).
+# Obergrenze None: wird ab dem aktuellen Wert verdoppelt, bis das Ziel eingeschlossen ist.
+STELLGROESSEN = {
+    "Anf. Tilgung Familie": (("tilgung_fam",), 0.0, 0.2, 1e-6),
+    "Anf. Tilgung Sie": (("tilgung_sie",), 0.0, 0.2, 1e-6),
+    "Anf. Tilgung (beide)": (("tilgung_fam", "tilgung_sie"), 0.0, 0.2, 1e-6),
+    "Sondertilgung p.a. Familie": (("st_fam",), 0.0, None, 0.01),
+    "Sondertilgung p.a. Sie": (("st_sie",), 0.0, None, 0.01),
+    "Kosten Familie": (("kosten_fam",), 0.0, None, 0.01),
+    "Kosten Sie": (("kosten_sie",), 0.0, None, 0.01),
+}
+ZIEL_KENNZAHLEN = SWEEP_KENNZAHLEN
+GRENZE_MAXIMAL = 1e9  # Abbruch der Verdopplung (€)
+
+
+def _st_variiert(st_params, werte: np.ndarray):
+    """Auto-mode Sondertilgung of `werte[i]` € in every year for scenario i, keeping the plan's yearly cap."""
+    quote = st_params.max_quote if isinstance(st_params, SondertilgungPlan) else None
+    return (ST_MODUS_AUTO, np.repeat(werte[:, None], MAX_JAHRE, axis=1), quote)
+
+
+def _kennzahl(batch: dict, kennzahl: str, partei: str | None, idx: list, zinsbindung_jahre: int) -> np.ndarray:
+    if kennzahl == "gesamte_zinskosten":
+        return batch["gesamte_zinskosten"] if partei is None else batch["zinskosten_partei"][partei]
+    if kennzahl == "restschuld_zinsbindung":
+        jahr = int(np.clip(zinsbindung_jahre, 1, MAX_JAHRE)) - 1
+        if partei is None:
+            return batch["restschuld"][:, jahr]
+        return batch["restschuld_kredit"][:, jahr, idx].sum(axis=1)
+    raise ValueError(f"Unbekannte Kennzahl: {kennzahl!r} (erlaubt: {', '.join(ZIEL_KENNZAHLEN)})")
+
+
+def auswerter(params, stellgroesse: str, kennzahl: str, st_fam=None, st_sie=None, partei: str | None = None,
+              zinsbindung_jahre: int = 10, monatlich: bool = False, reihenfolge: dict | None = None):
+    """
+    Vectorized f(x): the Kennzahl for an array of Stellgrößen values in one batched engine call
+    (Monatsraten in closed form, Restschuld amortized only up to the Zinsbindung).
+
+    All other inputs stay as given; a Sondertilgung Stellgröße replaces the party's plan by the
+    same amount every year (automatic distribution, the plan's yearly cap is kept).
+    reihenfolge: allocation order per party as in the app (None = KfW waterfall), fixed for all x.
+    Parties and their loans are those of `standard_register`.
+    """
+    if stellgroesse not in STELLGROESSEN:
+        raise ValueError(f"Unbekannte Stellgröße: {stellgroesse!r} (erlaubt: {', '.join(STELLGROESSEN)})")
+    register = standard_register([float(p) for p in params], reihenfolge)
+    parteien = [p.key for p in register.parteien]
+    if partei not in (None, *parteien):
+        raise ValueError(f"Unbekannte Partei: {partei!r} (erlaubt: {', '.join(parteien)})")
+    idx = slice(None) if partei is None else register.indizes_der_partei(partei)
+    st = {"fam": st_fam, "sie": st_sie}
+    felder = STELLGROESSEN[stellgroesse][0]
+    details = kennzahl == "restschuld_zinsbindung" and partei is not None
+    # Restschuld: nur bis zum Ende der Zinsbindung tilgen
+    jahre = int(np.clip(zinsbindung_jahre, 1, MAX_JAHRE)) if kennzahl == "restschuld_zinsbindung" else MAX_JAHRE
+
+    def f(x) -> np.ndarray:
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        spalten = [x if feld in felder else np.full(len(x), float(wert)) for feld, wert in zip(PARAM_FIELDS, params)]
+        register_x = standard_register(spalten, reihenfolge)
+        if kennzahl == "gesamtrate":  # Raten hängen nur von Zuteilung, Zins und Tilgung ab
+            return register_x.monatsraten()[:, idx].sum(axis=1)
+        sonder = {p: _st_variiert(st.get(p), x) if f"st_{p}" in felder else st.get(p) for p in parteien}
+        batch = calculate_scenarios_batch(register_x, sonder, details=details, monatlich=monatlich, jahre=jahre)
+        return _kennzahl(batch, kennzahl, partei, idx, zinsbindung_jahre)
+
+    return f
+
+
+def _aktuell(params, stellgroesse: str, st_fam, st_sie) -> float:
+    feld = STELLGROESSEN[stellgroesse][0][0]
+    if feld in PARAM_FIELDS:
+        return float(params[PARAM_FIELDS.index(feld)])
+    plan = {"fam": st_fam, "sie": st_sie}.get(feld.removeprefix("st_"))
+    return float(np.max(plan.werte)) if isinstance(plan, SondertilgungPlan) else 0.0
+
+
+def loese(params, stellgroesse: str, kennzahl: str, ziel: float, st_fam=None, st_sie=None, partei: str | None = None,
+          zinsbindung_jahre: int = 10, monatlich: bool = False, toleranz: float | None = None,
+          punkte: int = 33, max_iterationen: int = 40, reihenfolge: dict | None = None) -> dict:
+    """
+    Goal seek: the Stellgröße value at which the Kennzahl reaches `ziel`.
+
+    The Kennzahlen are monotone in every Stellgröße, so the solver brackets the boundary of the
+    region where Kennzahl <= ziel and narrows it by bisection, evaluating `punkte` candidates per
+    step in one batched engine call (each step shrinks the bracket by a factor punkte - 1).
+    The returned "wert" lies on the side of the boundary that meets the target (Kennzahl <= ziel)
+    and within `toleranz` (units of the Stellgröße) of it; Kennzahlen that are flat around the
+    target (e.g. Restschuld 0) yield the boundary of the flat part, i.e. the smallest Tilgung /
+    Sondertilgung or largest Kosten that still meets the target. If the target is met or missed
+    over the whole searched range, "erfolgreich" is False and "wert" is the lower bound (the upper
+    one for a Kennzahl rising with the Stellgröße that is met everywhere); "meldung" names the range.
+
+    Returns {"stellgroesse", "kennzahl", "partei", "ziel", "wert", "erreicht", "abweichung",
+    "toleranz", "iterationen", "auswertungen", "sekunden", "erfolgreich", "meldung"}.
+    """
+    start = time.perf_counter()
+    f = auswerter(params, stellgroesse, kennzahl, st_fam, st_sie, partei, zinsbindung_jahre, monatlich, reihenfolge)
+    _, lo, hi, standard_toleranz = STELLGROESSEN[stellgroesse]
+    toleranz = standard_toleranz if toleranz is None else float(toleranz)
+    if punkte < 3 or toleranz <= 0:
+        raise ValueError("punkte muss >= 3 und toleranz > 0 sein.")
+    auswertungen = 0
+
+    def erfuellt(x) -> np.ndarray:
+        nonlocal auswertungen
+        auswertungen += len(x)
+        return f(x) <= ziel
+
+    # Klammer [lo, hi] suchen, deren Enden das Ziel verschieden erfüllen; lo0 = Untergrenze des Suchbereichs
+    lo0 = lo
+    ok_lo = erfuellt([lo])[0]
+    if hi is None:
+        hi = max(2.0 * _aktuell(params, stellgroesse, st_fam, st_sie), 1_000.0)
+        while erfuellt([hi])[0] == ok_lo and hi < GRENZE_MAXIMAL:
+            lo, hi = hi, 2.0 * hi  # [lo, hi] bleibt Klammer, falls das Ziel dahinter wechselt
+    ok_hi = erfuellt([hi])[0]
+
+    iterationen = 0
+    if ok_lo == ok_hi:
+        # Überall erfüllt: größter Wert, falls die Kennzahl mit der Stellgröße steigt (Kosten), sonst kleinster;
+        # nirgends erfüllt: Untergrenze (kein sinnvoller Vorschlag, "erfolgreich" bleibt False)
+        steigend = ok_hi and f([hi])[0] > f([lo0])[0]
+        wert = hi if steigend else lo0
+        meldung = (f"Ziel im ganzen Bereich {'erfüllt' if ok_hi else 'nicht erreichbar'} "
+                   f"(gesucht: {lo0:,.6g} … {hi:,.6g}){'; Randwert zurückgegeben' if ok_hi else ''}.")
+        erfolgreich = False
+    else:
+        while hi - lo > toleranz and iterationen < max_iterationen:
+            iterationen += 1
+            x = np.linspace(lo, hi, punkte)
+            ok = erfuellt(x)
+            wechsel = int(np.flatnonzero(ok[:-1] != ok[1:])[0])
+            lo, hi = x[wechsel], x[wechsel + 1]
+        # Die Seite der Grenze, die das Ziel erfüllt
+        wert = lo if ok_lo else hi
+        erfolgreich = hi - lo <= toleranz
+        meldung = "Ziel erreicht." if erfolgreich else f"Toleranz nach {iterationen} Schritten nicht erreicht."
+
+    erreicht = float(f([wert])[0])
+    return {
+        "stellgroesse": stellgroesse,
+        "kennzahl": kennzahl,
+        "partei": partei,
+        "ziel": float(ziel),
+        "wert": float(wert),
+        "erreicht": erreicht,
+        "abweichung": erreicht - float(ziel),
+        "toleranz": toleranz,
+        "iterationen": iterationen,
+        "auswertungen": auswertungen + 1,
+        "sekunden": time.perf_counter() - start,
+        "erfolgreich": bool(erfolgreich),
+        "meldung": meldung,
+    }
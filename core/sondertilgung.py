@@ -0,0 +1,114 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .helpers import MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class SondertilgungPlan:
+    """
+    Sondertilgung inputs of one party, validated once and compiled into a dense array.
+
+    werte[jahr - 1] is the yearly amount ("Automatische Verteilung", shape (MAX_JAHRE,))
+    or the amount per loan in `loan_keys` order ("Manuelle Eingabe", shape (MAX_JAHRE, k)).
+    Other modes carry no Sondertilgung. max_quote optionally caps the Sondertilgung per loan
+    and year at that share of the original loan amount (e.g. 0.05). Instances are immutable.
+    """
+
+    __slots__ = ("modus", "loan_keys", "werte", "max_quote")
+
+    def __init__(self, modus: str, loan_keys, werte=None, max_quote: float | None = None):
+        self.modus = modus
+        self.loan_keys = tuple(loan_keys)
+        if max_quote is not None and not max_quote > 0:
+            max_quote = None  # 0 / negativ = unbegrenzt
+        self.max_quote = None if max_quote is None else float(max_quote)
+        shape = (MAX_JAHRE, len(self.loan_keys)) if modus == ST_MODUS_MANUELL else (MAX_JAHRE,)
+        werte = np.zeros(shape) if werte is None else np.array(werte, dtype=float)
+        if werte.shape != shape:
+            raise ValueError(f"Sondertilgung: erwartete Form {shape}, erhalten {werte.shape}")
+        werte[~np.isfinite(werte) | (werte < 0)] = 0.0
+        werte.flags.writeable = False
+        self.werte = werte
+
+    def __repr__(self) -> str:
+        return (f"SondertilgungPlan({self.modus!r}, {list(self.loan_keys)!r}, summe={float(self.werte.sum()):,.2f}, "
+                f"max_quote={self.max_quote!r})")
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, SondertilgungPlan) and self.modus == other.modus
+                and self.loan_keys == other.loan_keys and self.max_quote == other.max_quote
+                and np.array_equal(self.werte, other.werte))
+
+    __hash__ = None
+
+    @classmethod
+    def from_dataframe(cls, modus: str, st_df: "pd.DataFrame", loan_keys, max_quote: float | None = None) -> "SondertilgungPlan":
+        """
+        Compile a sidebar table ("Jahr" + "Betrag" or one column per loan key).
+
+        Rows outside 1..MAX_JAHRE are ignored, the first row of a year wins, and
+        NaN / negative / non-numeric amounts count as 0 (as in the previous per-year lookups).
+        """
+        plan = cls(modus, loan_keys, max_quote=max_quote)
+        if modus not in (ST_MODUS_AUTO, ST_MODUS_MANUELL) or st_df is None or st_df.empty:
+            return plan
+        if "Jahr" not in st_df.columns:
+            raise ValueError("Sondertilgungstabelle ohne Spalte 'Jahr'.")
+        if modus == ST_MODUS_AUTO and "Betrag" not in st_df.columns:
+            raise ValueError("Sondertilgungstabelle ohne Spalte 'Betrag'.")
+
+        import pandas as pd
+
+        jahre = pd.to_numeric(st_df["Jahr"], errors="coerce").to_numpy(dtype=float)
+        gueltig = np.flatnonzero((jahre >= 1) & (jahre <= MAX_JAHRE) & (jahre == np.round(jahre)))
+        idx, erste = np.unique(jahre[gueltig].astype(int) - 1, return_index=True)
+        zeilen = gueltig[erste]
+
+        werte = np.zeros(plan.werte.shape)
+        spalten = ["Betrag"] if modus == ST_MODUS_AUTO else plan.loan_keys
+        for i, k in enumerate(spalten):
+            if k not in st_df.columns:
+                continue
+            v = pd.to_numeric(st_df[k], errors="coerce").to_numpy(dtype=float)[zeilen]
+            if modus == ST_MODUS_AUTO:
+                werte[idx] = v
+            else:
+                werte[idx, i] = v
+        return cls(modus, loan_keys, werte, max_quote=max_quote)
+
+    @classmethod
+    def aus_eingabe(cls, st_params, loan_keys) -> "SondertilgungPlan":
+        """Accept a compiled plan, the legacy (modus, DataFrame) pair or None (no Sondertilgung)."""
+        if isinstance(st_params, cls):
+            return st_params
+        modus, st_df = st_params if st_params is not None else (None, None)
+        return cls.from_dataframe(modus, st_df, loan_keys)
+
+    @property
+    def aktiv(self) -> bool:
+        return self.modus in (ST_MODUS_AUTO, ST_MODUS_MANUELL)
+
+    def beruehrte_kredite(self) -> set:
+        """Keys of the loans that receive any Sondertilgung from this plan."""
+        if self.modus == ST_MODUS_AUTO:
+            return set(self.loan_keys) if (self.werte > 0.01).any() else set()
+        if self.modus == ST_MODUS_MANUELL:
+            return {k for i, k in enumerate(self.loan_keys) if (self.werte[:, i] > 0).any()}
+        return set()
+
+    def obergrenzen(self, summen) -> list | None:
+        """Yearly cap per loan for the given original loan amounts (None = unbegrenzt)."""
+        if self.max_quote is None:
+            return None
+        return [self.max_quote * float(s) for s in summen]
+
+    def erstes_abweichendes_jahr(self, other: "SondertilgungPlan") -> int:
+        """First year with different inputs (1 on mode or cap changes, MAX_JAHRE + 1 if identical)."""
+        if self.modus != other.modus or self.loan_keys != other.loan_keys or self.max_quote != other.max_quote:
+            return 1
+        diff = (self.werte != other.werte).reshape(MAX_JAHRE, -1).any(axis=1)
+        return int(diff.argmax()) + 1 if diff.any() else MAX_JAHRE + 1
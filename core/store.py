@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+
+from .calculations import ENGINE_VERSION
+from .result import ScenarioResult
+from .sondertilgung import SondertilgungPlan
+from .vergleich import GespeichertesSzenario
+
+# Standardablage (lokal, ohne Datenbankserver); per Umgebungsvariable verschiebbar
+STORE_STANDARD = os.environ.get("LOAN_DOLPHIN_STORE", str(Path.home() / ".loan_dolphin"))
+
+_TMP = ".tmp-"  # Präfix halb geschriebener Array-Ordner
+TMP_ALTER = 3600  # s; jüngere Ordner gehören evtl. einem laufenden Schreibvorgang
+SCHEMA_VERSION = 1  # Aufbau von Index und Array-Dateien
+# Version der Inhalte: Engine und Ablageformat; Inhalte anderer Versionen gelten als nicht vorhanden
+VERSION = f"{ENGINE_VERSION}.{SCHEMA_VERSION}"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inhalte (
+    hash TEXT PRIMARY KEY,
+    eingaben TEXT NOT NULL,
+    kennzahlen TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    erstellt REAL NOT NULL,
+    version TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS namen (
+    name TEXT PRIMARY KEY,
+    hash TEXT NOT NULL REFERENCES inhalte(hash),
+    gespeichert REAL NOT NULL
+);
+"""
+
+
+def inhalt_hash(szenario: GespeichertesSzenario, version: str | None = None) -> str:
+    """Content key of a scenario in the store: its input fingerprint under the engine/format version."""
+    version = VERSION if version is None else version
+    return hashlib.blake2b(f"{version}\x1e{szenario.fingerprint()}".encode(), digest_size=16).hexdigest()
+
+
+def _plan_meta(plan: SondertilgungPlan) -> dict:
+    return {"modus": plan.modus, "loan_keys": list(plan.loan_keys), "max_quote": plan.max_quote}
+
+
+class SzenarioAblage:
+    """
+    Saved scenarios on local disk, keyed by the content hash of their inputs.
+
+    A SQLite index (`index.sqlite`) maps names to contents and holds the inputs and Kennzahlen
+    as JSON; the arrays (Sondertilgung plans, plan / laufzeit / sondertilgung of the result)
+    live as .npy files in `arrays/<hash>/` and are opened memory-mapped, so reopening a
+    scenario reads its plans instead of recomputing them. Equal inputs under several names
+    share one content (deduplication); `aufraeumen` deletes contents no name refers to.
+
+    Contents are keyed and tagged with VERSION (engine and format version): entries written by
+    another version are ignored and removed, with their names, by `aufraeumen`.
+    """
+
+    __slots__ = ("pfad",)
+
+    def __init__(self, pfad: str | Path | None = None):
+        self.pfad = Path(pfad or STORE_STANDARD)
+        (self.pfad / "arrays").mkdir(parents=True, exist_ok=True)
+        with closing(self._verbinde()) as db, db:
+            db.executescript(_SCHEMA)
+            spalten = {z[1] for z in db.execute("PRAGMA table_info(inhalte)")}
+            if "version" not in spalten:  # Index aus der Zeit vor der Versionierung
+                db.execute("ALTER TABLE inhalte ADD COLUMN version TEXT NOT NULL DEFAULT ''")
+
+    def __repr__(self) -> str:
+        return f"SzenarioAblage({str(self.pfad)!r})"
+
+    def _verbinde(self) -> sqlite3.Connection:
+        # Eine Verbindung je Vorgang: Streamlit-Sessions laufen in verschiedenen Threads
+        return sqlite3.connect(self.pfad / "index.sqlite", timeout=10)
+
+    def _ordner(self, hash_: str) -> Path:
+        return self.pfad / "arrays" / hash_
+
+    def __contains__(self, name: str) -> bool:
+        with closing(self._verbinde()) as db:
+            return db.execute(
+                "SELECT 1 FROM namen n JOIN inhalte i ON i.hash = n.hash WHERE n.name = ? AND i.version = ?",
+                (name, VERSION),
+            ).fetchone() is not None
+
+    def speichere(self, name: str, szenario: GespeichertesSzenario, ergebnis=None) -> str:
+        """
+        Save (or re-point) `name` to the scenario; returns its content hash.
+
+        Arrays and Kennzahlen are written only for new contents; `ergebnis` (the engine result of
+        these inputs) is computed if not given.
+        """
+        hash_ = inhalt_hash(szenario)
+        with closing(self._verbinde()) as db:
+            neu = db.execute("SELECT 1 FROM inhalte WHERE hash = ?", (hash_,)).fetchone() is None
+        if neu:
+            ergebnis = szenario.szenario() if ergebnis is None else ergebnis
+            nbytes = self._schreibe_arrays(hash_, szenario, ergebnis)
+            eingaben = {
+                "params": szenario.params.tolist(),
+                "monatlich": szenario.monatlich,
+                "reihenfolge": szenario.reihenfolge,
+                "st_fam": _plan_meta(szenario.st_fam),
+                "st_sie": _plan_meta(szenario.st_sie),
+            }
+            if isinstance(ergebnis, ScenarioResult):
+                kennzahlen = {"loan_keys": list(ergebnis.loan_keys),
+                              **{k: v for k, v in ergebnis.kennzahlen.items() if not k.startswith("_")}}
+            else:
+                kennzahlen = dict(ergebnis)  # {"error": ...}
+        jetzt = time.time()
+        with closing(self._verbinde()) as db, db:
+            if neu:
+                db.execute("INSERT OR IGNORE INTO inhalte VALUES (?, ?, ?, ?, ?, ?)",
+                           (hash_, json.dumps(eingaben), json.dumps(kennzahlen), nbytes, jetzt, VERSION))
+            db.execute("INSERT OR REPLACE INTO namen VALUES (?, ?, ?)", (name, hash_, jetzt))
+        return hash_
+
+    def _schreibe_arrays(self, hash_: str, szenario: GespeichertesSzenario, ergebnis) -> int:
+        """Write the .npy files into a temporary folder and move it in place (no half-written contents)."""
+        tmp = self.pfad / "arrays" / f"{_TMP}{hash_}-{os.getpid()}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        arrays = {"st_fam": szenario.st_fam.werte, "st_sie": szenario.st_sie.werte}
+        if isinstance(ergebnis, ScenarioResult):
+            arrays.update(plan=ergebnis.plan, laufzeit=ergebnis.laufzeit, sondertilgung=ergebnis.sondertilgung)
+        for feld, arr in arrays.items():
+            np.save(tmp / f"{feld}.npy", np.ascontiguousarray(arr))
+        try:
+            os.replace(tmp, self._ordner(hash_))
+        except OSError:  # gleicher Inhalt schon vorhanden (z. B. parallel geschrieben)
+            shutil.rmtree(tmp, ignore_errors=True)
+        return sum(int(arr.nbytes) for arr in arrays.values())
+
+    def _zeile(self, name: str) -> tuple:
+        with closing(self._verbinde()) as db:
+            zeile = db.execute(
+                "SELECT i.hash, i.eingaben, i.kennzahlen FROM namen n JOIN inhalte i ON i.hash = n.hash "
+                "WHERE n.name = ? AND i.version = ?",
+                (name, VERSION),
+            ).fetchone()
+        if zeile is None:
+            raise KeyError(f"Kein gespeichertes Szenario: {name!r}")
+        return zeile
+
+    def _array(self, hash_: str, feld: str) -> np.ndarray:
+        return np.load(self._ordner(hash_) / f"{feld}.npy", mmap_mode="r")
+
+    def lade(self, name: str) -> GespeichertesSzenario:
+        """Inputs of a saved scenario."""
+        hash_, eingaben, _ = self._zeile(name)
+        eingaben = json.loads(eingaben)
+        plaene = {
+            p: SondertilgungPlan(m["modus"], m["loan_keys"], self._array(hash_, p), m["max_quote"])
+            for p, m in ((p, eingaben[p]) for p in ("st_fam", "st_sie"))
+        }
+        return GespeichertesSzenario(eingaben["params"], plaene["st_fam"], plaene["st_sie"],
+                                     eingaben["monatlich"], eingaben["reihenfolge"])
+
+    def ergebnis(self, name: str):
+        """Engine result of a saved scenario from disk (arrays memory-mapped, nothing recomputed)."""
+        hash_, _, kennzahlen = self._zeile(name)
+        kennzahlen = json.loads(kennzahlen)
+        if "error" in kennzahlen:
+            return kennzahlen
+        loan_keys = kennzahlen.pop("loan_keys")
+        return ScenarioResult(loan_keys, self._array(hash_, "plan"), self._array(hash_, "laufzeit"),
+                              self._array(hash_, "sondertilgung"), kennzahlen)
+
+    def liste(self) -> list:
+        """Saved names, newest first: {"name", "hash", "gespeichert", "nbytes", "geteilt"} (names sharing the content)."""
+        with closing(self._verbinde()) as db:
+            zeilen = db.execute(
+                "SELECT n.name, n.hash, n.gespeichert, i.nbytes, "
+                "(SELECT COUNT(*) FROM namen m WHERE m.hash = n.hash) "
+                "FROM namen n JOIN inhalte i ON i.hash = n.hash WHERE i.version = ? "
+                "ORDER BY n.gespeichert DESC, n.name",
+                (VERSION,),
+            ).fetchall()
+        return [dict(zip(("name", "hash", "gespeichert", "nbytes", "geteilt"), z)) for z in zeilen]
+
+    def entferne(self, name: str) -> bool:
+        """Remove a name (its content stays until `aufraeumen`); False if there is none."""
+        with closing(self._verbinde()) as db, db:
+            return db.execute("DELETE FROM namen WHERE name = ?", (name,)).rowcount > 0
+
+    def aufraeumen(self) -> dict:
+        """
+        Garbage collection: delete contents no name refers to, contents of other versions (with
+        their names) and array folders without index entry (e.g. from interrupted writes older
+        than TMP_ALTER). Returns {"inhalte", "bytes"} removed.
+        """
+        with closing(self._verbinde()) as db, db:
+            db.execute("DELETE FROM namen WHERE hash IN (SELECT hash FROM inhalte WHERE version != ?)", (VERSION,))
+            db.execute("DELETE FROM namen WHERE hash NOT IN (SELECT hash FROM inhalte)")
+            verwaist = db.execute(
+                "SELECT hash, nbytes FROM inhalte WHERE hash NOT IN (SELECT hash FROM namen)"
+            ).fetchall()
+            db.executemany("DELETE FROM inhalte WHERE hash = ?", [(h,) for h, _ in verwaist])
+            bekannt = {h for (h,) in db.execute("SELECT hash FROM inhalte")}
+        entfernt = 0
+        for ordner in (self.pfad / "arrays").iterdir():
+            if ordner.name.startswith(_TMP) and time.time() - ordner.stat().st_mtime < TMP_ALTER:
+                continue
+            if ordner.name not in bekannt:
+                entfernt += sum(f.stat().st_size for f in ordner.glob("*") if f.is_file())
+                shutil.rmtree(ordner, ignore_errors=True)
+        return {"inhalte": len(verwaist), "bytes": entfernt}
+
+    def statistik(self) -> dict:
+        with closing(self._verbinde()) as db:
+            namen, = db.execute(
+                "SELECT COUNT(*) FROM namen n JOIN inhalte i ON i.hash = n.hash WHERE i.version = ?", (VERSION,)
+            ).fetchone()
+            inhalte, nbytes = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM inhalte WHERE version = ?", (VERSION,)
+            ).fetchone()
+        return {"namen": namen, "inhalte": inhalte, "bytes": nbytes}
@@ -0,0 +1,91 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .batch import PARAM_FIELDS, calculate_financing_scenarios_batch
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Sweep-Achsen: Anzeigename -> (Parameterfelder, Minimum, Maximum) wie die Slider in ui/sidebar.py.
+# Mehrere Felder bekommen denselben Wert (z. B. alle Zinssätze oder beide Tilgungen).
+SWEEP_ACHSEN = {
+    "Zins KfW 297": (("z_kfw297",), 0.001, 0.05),
+    "Zins KfW 124": (("z_kfw124",), 0.001, 0.05),
+    "Zins Hausbank": (("z_hausbank",), 0.001, 0.06),
+    "Zins (alle Darlehen)": (("z_kfw297", "z_kfw124", "z_hausbank"), 0.001, 0.05),
+    "Anf. Tilgung Familie": (("tilgung_fam",), 0.005, 0.05),
+    "Anf. Tilgung Sie": (("tilgung_sie",), 0.005, 0.05),
+    "Anf. Tilgung (beide)": (("tilgung_fam", "tilgung_sie"), 0.005, 0.05),
+}
+
+SWEEP_KENNZAHLEN = {
+    "gesamte_zinskosten": "Gesamte Zinskosten",
+    "restschuld_zinsbindung": "Restschuld nach Zinsbindung",
+    "gesamtrate": "Gesamte Monatsrate",
+}
+
+
+def achsen_werte(achse: str, schritt: float = 0.001) -> np.ndarray:
+    """Full slider range of an axis in `schritt` steps (0.1 %-points by default)."""
+    _, lo, hi = SWEEP_ACHSEN[achse]
+    return np.round(np.arange(lo, hi + schritt / 2, schritt), 6)
+
+
+def sweep_grid(params, x_achse: str, x_werte, y_achse: str, y_werte) -> list:
+    """
+    The 13 params broadcast over the x/y grid (n = len(x) * len(y), x varies fastest).
+
+    Fields not on an axis keep their value from `params`.
+    """
+    felder_x, felder_y = SWEEP_ACHSEN[x_achse][0], SWEEP_ACHSEN[y_achse][0]
+    if set(felder_x) & set(felder_y):
+        raise ValueError(f"Achsen '{x_achse}' und '{y_achse}' überschneiden sich.")
+    xx, yy = np.meshgrid(np.asarray(x_werte, dtype=float), np.asarray(y_werte, dtype=float))
+    spalten = []
+    for feld, wert in zip(PARAM_FIELDS, params):
+        if feld in felder_x:
+            spalten.append(xx.ravel())
+        elif feld in felder_y:
+            spalten.append(yy.ravel())
+        else:
+            spalten.append(float(wert))
+    return spalten
+
+
+def parameter_sweep(params, x_achse: str, y_achse: str, x_werte=None, y_werte=None,
+                    st_fam=None, st_sie=None, zinsbindung_jahre: int = 10, monatlich: bool = False,
+                    executor=None, reihenfolge: dict | None = None) -> "pd.DataFrame":
+    """
+    Evaluate the x/y grid around the current config in one batched engine call.
+
+    Returns a tidy frame with one row per grid point: the two axis values (columns named
+    after the axes), SWEEP_KENNZAHLEN and "keine_finanzierung". Axes default to the full
+    slider ranges (`achsen_werte`). Large grids can be spread over cores by passing a
+    `core.parallel.ParallelExecutor`. reihenfolge: the allocation order of the current config,
+    kept fixed over the grid (None = KfW waterfall).
+    """
+    import pandas as pd
+
+    x_werte = achsen_werte(x_achse) if x_werte is None else np.asarray(x_werte, dtype=float)
+    y_werte = achsen_werte(y_achse) if y_werte is None else np.asarray(y_werte, dtype=float)
+    grid = sweep_grid(params, x_achse, x_werte, y_achse, y_werte)
+    if executor is not None:
+        batch, _ = executor.run(grid, st_fam, st_sie, monatlich=monatlich, reihenfolge=reihenfolge)
+    else:
+        batch = calculate_financing_scenarios_batch(grid, st_fam, st_sie, monatlich=monatlich, reihenfolge=reihenfolge)
+    jahr = int(np.clip(zinsbindung_jahre, 1, batch["restschuld"].shape[1]))
+    n = len(x_werte) * len(y_werte)
+    return pd.DataFrame({
+        x_achse: np.broadcast_to(grid[PARAM_FIELDS.index(SWEEP_ACHSEN[x_achse][0][0])], (n,)),
+        y_achse: np.broadcast_to(grid[PARAM_FIELDS.index(SWEEP_ACHSEN[y_achse][0][0])], (n,)),
+        "gesamte_zinskosten": batch["gesamte_zinskosten"],
+        "restschuld_zinsbindung": batch["restschuld"][:, jahr - 1],
+        "gesamtrate": batch["gesamtrate"],
+        "keine_finanzierung": batch["keine_finanzierung"],
+    })
+
+
+def sweep_matrix(df: "pd.DataFrame", x_achse: str, y_achse: str, kennzahl: str) -> "pd.DataFrame":
+    """Pivot a sweep frame into a y x x matrix of one Kennzahl (for heatmaps / contours)."""
+    return df.pivot(index=y_achse, columns=x_achse, values=kennzahl)
@@ -0,0 +1,120 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .batch import PARAM_FIELDS, calculate_scenarios_batch
+from .cache import cached_financing_scenario, scenario_fingerprint
+from .helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from .profiling import span
+from .registry import standard_register
+from .sondertilgung import SondertilgungPlan
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Kennzahlen der Vergleichstabelle: Spalte -> Anzeigename
+VERGLEICH_KENNZAHLEN = {
+    "gesamtrate": "Gesamte Monatsrate",
+    "restschuld_zinsbindung": "Restschuld nach Zinsbindung",
+    "gesamte_zinskosten": "Gesamte Zinskosten",
+    "sondertilgung_gesamt": "Sondertilgung (gesamt)",
+    "sondertilgung_j1": "Sondertilgung (J1)",
+}
+
+
+class GespeichertesSzenario:
+    """
+    Inputs of a saved scenario in compact form: the 13 params, both compiled Sondertilgung
+    plans, the interest mode and the allocation order (None = waterfall).
+
+    A few KiB per scenario instead of result DataFrames; Kennzahlen and plans are recomputed
+    from these inputs when needed. Instances are immutable.
+    """
+
+    __slots__ = ("params", "st_fam", "st_sie", "monatlich", "reihenfolge")
+
+    def __init__(self, params, st_fam=None, st_sie=None, monatlich: bool = False, reihenfolge: dict | None = None):
+        params = np.array([float(p) for p in params], dtype=float)
+        if params.shape != (len(PARAM_FIELDS),):
+            raise ValueError(f"Erwartet {len(PARAM_FIELDS)} Parameter, erhalten: {params.size}")
+        params.flags.writeable = False
+        self.params = params
+        # Ohne Plan: leerer Plan (gleiches Ergebnis, aber mit Fingerprint)
+        self.st_fam = st_fam if isinstance(st_fam, SondertilgungPlan) else SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM)
+        self.st_sie = st_sie if isinstance(st_sie, SondertilgungPlan) else SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_SIE)
+        self.monatlich = bool(monatlich)
+        self.reihenfolge = {p: tuple(r) for p, r in reihenfolge.items()} if reihenfolge else None
+
+    def __repr__(self) -> str:
+        return (f"GespeichertesSzenario(kosten={self.params[0] + self.params[3]:,.0f}, monatlich={self.monatlich}, "
+                f"reihenfolge={self.reihenfolge!r})")
+
+    @property
+    def nbytes(self) -> int:
+        return self.params.nbytes + self.st_fam.werte.nbytes + self.st_sie.werte.nbytes
+
+    def fingerprint(self) -> str:
+        return scenario_fingerprint(self.params, self.st_fam, self.st_sie, self.monatlich, self.reihenfolge)
+
+    def szenario(self):
+        """Full engine result (plans on demand), served from the process-wide result cache."""
+        return cached_financing_scenario(list(self.params), self.st_fam, self.st_sie,
+                                         monatlich=self.monatlich, reihenfolge=self.reihenfolge)
+
+
+def _st_spalten(plaene: list) -> tuple | None:
+    """Stacked (modus, werte, max_quote) of plans sharing one mode; a quote of 0 means no yearly cap."""
+    if plaene[0].modus not in (ST_MODUS_AUTO, ST_MODUS_MANUELL):
+        return None
+    return plaene[0].modus, np.stack([p.werte for p in plaene]), np.array([p.max_quote or 0.0 for p in plaene])
+
+
+def vergleichskennzahlen(szenarien: dict, zinsbindung_jahre: int = 10) -> "pd.DataFrame":
+    """
+    Kennzahlen of all scenarios {name -> GespeichertesSzenario} in one batched pass.
+
+    Scenarios are grouped by interest mode and Sondertilgung modes (one engine call per group,
+    each with per-scenario params, allocations and plans). Returns one row per scenario in input
+    order: "Szenario", the columns of VERGLEICH_KENNZAHLEN and "keine_finanzierung".
+    """
+    import pandas as pd
+
+    namen = list(szenarien)
+    werte = {k: np.zeros(len(namen)) for k in VERGLEICH_KENNZAHLEN}
+    keine_finanzierung = np.zeros(len(namen), dtype=bool)
+    jahr = int(np.clip(zinsbindung_jahre, 1, MAX_JAHRE)) - 1
+
+    gruppen = {}
+    for i, name in enumerate(namen):
+        s = szenarien[name]
+        gruppen.setdefault((s.monatlich, s.st_fam.modus, s.st_sie.modus), []).append(i)
+    with span("vergleich: kennzahlen"):
+        for (monatlich, _, _), idx in gruppen.items():
+            auswahl = [szenarien[namen[i]] for i in idx]
+            params = np.stack([s.params for s in auswahl])
+            register = standard_register(list(params.T))
+            # Zuteilung je Szenario (eigene Reihenfolge oder Wasserfall)
+            summen = np.stack([standard_register(list(s.params), s.reihenfolge).aufteilung() for s in auswahl])
+            st_params = {
+                "fam": _st_spalten([s.st_fam for s in auswahl]),
+                "sie": _st_spalten([s.st_sie for s in auswahl]),
+            }
+            batch = calculate_scenarios_batch(register, st_params, monatlich=monatlich, summen=summen)
+            werte["gesamtrate"][idx] = batch["gesamtrate"]
+            werte["restschuld_zinsbindung"][idx] = batch["restschuld"][:, jahr]
+            werte["gesamte_zinskosten"][idx] = batch["gesamte_zinskosten"]
+            werte["sondertilgung_gesamt"][idx] = batch["sondertilgung"].sum(axis=1)
+            werte["sondertilgung_j1"][idx] = batch["sondertilgung"][:, 0]
+            keine_finanzierung[idx] = batch["keine_finanzierung"]
+    return pd.DataFrame({"Szenario": namen, **werte, "keine_finanzierung": keine_finanzierung})
+
+
+def mit_differenzen(kennzahlen: "pd.DataFrame", basis: str) -> "pd.DataFrame":
+    """Add "Δ <kennzahl>" columns (value minus the value of scenario `basis`) to a Kennzahlen table."""
+    zeilen = kennzahlen.index[kennzahlen["Szenario"] == basis]
+    if not len(zeilen):
+        raise KeyError(f"Basisszenario nicht vorhanden: {basis!r}")
+    df = kennzahlen.copy()
+    for k in VERGLEICH_KENNZAHLEN:
+        df[f"Δ {k}"] = df[k] - df.at[zeilen[0], k]
+    return df
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+import numpy as np
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.allocation import verteile_sondertilgung, verteile_sondertilgung_batch, zins_stufen
+from core.batch import calculate_financing_scenarios_batch
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+
+
+def test_highest_rate_first_and_ties_pro_rata():
+    stufen = zins_stufen([0.03, 0.04, 0.04])
+    assert stufen == [[1, 2], [0]]
+    # Gleicher Zins: proportional zur Restschuld
+    assert np.allclose(verteile_sondertilgung(3_000, [50_000, 10_000, 20_000], stufen), [0, 1_000, 2_000])
+    # Teure Stufe wird getilgt, Rest fließt in die nächste Stufe
+    assert np.allclose(verteile_sondertilgung(40_000, [50_000, 10_000, 20_000], stufen), [10_000, 10_000, 20_000])
+    # Getilgte Darlehen nehmen nichts mehr an
+    assert np.allclose(verteile_sondertilgung(5_000, [50_000, 0.0, 20_000], stufen), [0, 0, 5_000])
+
+
+def test_caps_water_fill_within_tier():
+    stufen = zins_stufen([0.04, 0.04, 0.03])
+    grenzen = [1_000, 10_000, 10_000]
+    gezahlt = verteile_sondertilgung(9_000, [50_000, 50_000, 80_000], stufen, grenzen)
+    # Kredit 0 ist gekappt, der Überschuss geht an Kredit 1 (gleiche Stufe), nicht an Stufe 2
+    assert np.allclose(gezahlt, [1_000, 8_000, 0])
+    gezahlt = verteile_sondertilgung(30_000, [50_000, 50_000, 80_000], stufen, grenzen)
+    assert np.allclose(gezahlt, [1_000, 10_000, 10_000])  # 9_000 finden kein Darlehen
+
+
+def test_batch_allocation_matches_scalar():
+    rng = np.random.default_rng(3)
+    n, k = 400, 3
+    rs = rng.integers(0, 5, (n, k)) * 10_000.0
+    zinsen = rng.integers(1, 4, (n, k)) / 100
+    grenzen = rng.integers(1, 8, (n, k)) * 2_000.0
+    betrag = rng.integers(0, 40, n) * 1_000.0
+    batch = verteile_sondertilgung_batch(betrag, rs, zinsen, grenzen)
+    for i in range(n):
+        skalar = verteile_sondertilgung(betrag[i], rs[i].tolist(), zins_stufen(zinsen[i].tolist()), grenzen[i].tolist())
+        assert np.allclose(batch[i], skalar)
+
+
+def test_engine_respects_yearly_cap():
+    plan_fam = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(50, 50_000.0), max_quote=0.05)
+    plan_sie = SondertilgungPlan("Manuelle Eingabe", LOAN_KEYS_SIE, np.full((50, 3), 50_000.0), max_quote=0.05)
+    s = calculate_financing_scenario(PARAMS, plan_fam, plan_sie)
+    summen = s["darlehen"]
+    for k, jahre in s["sondertilgungen"].items():
+        assert all(b <= 0.05 * summen[k] + 1e-6 for b in jahre.values())
+
+    batch = calculate_financing_scenarios_batch(PARAMS, plan_fam, plan_sie)
+    assert abs(batch["gesamte_zinskosten"][0] - s["gesamte_zinskosten"]) < 0.005
+    assert np.allclose(batch["sondertilgung"][0, :10], [sum(j.get(y, 0.0) for j in s["sondertilgungen"].values()) for y in range(1, 11)])
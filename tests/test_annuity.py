@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.annuity import (
+    annuitaet_monatsjahr,
+    annuitaet_plan,
+    annuitaet_restschuld,
+    annuitaet_tilgungsjahr,
+    annuitaet_zinskosten,
+)
+from core.calculations import calculate_financing_scenario
+
+
+def iterate_annuity(summe, zins, jahresrate, max_jahre=50):
+    """Reference: the engine's year loop for a single loan without Sondertilgung."""
+    rs, zinsen_kum, rows = summe, 0.0, []
+    for _ in range(max_jahre):
+        if rs <= 0.01:
+            break
+        zinsen = rs * zins
+        tilgung = min(max(jahresrate - zinsen, 0.0), rs)
+        zinsen_kum += zinsen
+        rows.append(rs - tilgung)
+        rs -= tilgung
+    return rows, zinsen_kum
+
+
+def test_closed_form_matches_year_loop():
+    for summe, zins, tilgung in [(200_000, 0.02, 0.02), (30_000, 0.035, 0.05), (80_000, 0.0, 0.04), (150_000, 0.001, 0.005)]:
+        jahresrate = summe * ((zins + tilgung) / 12.0) * 12
+        rows, zinsen = iterate_annuity(summe, zins, jahresrate, max_jahre=200)
+
+        assert annuitaet_tilgungsjahr(summe, zins, jahresrate) == len(rows)
+        assert abs(annuitaet_zinskosten(summe, zins, jahresrate) - zinsen) < 0.005
+        for jahr in (1, 10, len(rows) - 1, len(rows)):
+            assert abs(annuitaet_restschuld(summe, zins, jahresrate, jahr) - rows[jahr - 1]) < 0.005
+        assert annuitaet_restschuld(summe, zins, jahresrate, len(rows) + 1) == 0.0
+
+
+def test_closed_form_broadcasts_and_caps_horizon():
+    summe = np.array([100_000.0, 100_000.0, 0.0])
+    zins = np.array([0.03, 0.01, 0.03])
+    jahresrate = summe * (zins + 0.005)
+    ende = annuitaet_tilgungsjahr(summe, zins, jahresrate)
+    assert ende[0] > 50 and ende[2] == 0
+
+    plan = annuitaet_plan(100_000.0, 0.03, 3_500.0, max_jahre=50)
+    rows, zinsen = iterate_annuity(100_000.0, 0.03, 3_500.0)
+    assert len(plan["Jahr"]) == 50
+    assert np.allclose(plan["Restschuld Ende"], rows, atol=0.005)
+    assert abs(annuitaet_zinskosten(100_000.0, 0.03, 3_500.0, 50) - zinsen) < 0.005
+
+
+def test_engine_uses_closed_form_only_for_untouched_loans():
+    params = [
+        300_000, 50_000, 0,
+        300_000, 50_000, 0,
+        0.02, 0.03, 0.04,
+        0.02, 0.02,
+        100_000, 30_000,
+    ]
+    manual = pd.DataFrame({"Jahr": range(1, 51), "fam_kfw297": 0, "fam_kfw124": 0, "fam_hausbank": 0})
+    manual.loc[manual["Jahr"] == 2, "fam_hausbank"] = 5_000
+    st_fam = ("Manuelle Eingabe", manual)
+    st_sie = ("Automatische Verteilung", pd.DataFrame({"Jahr": [1], "Betrag": [0]}))
+
+    s = calculate_financing_scenario(params, st_fam, st_sie)
+    assert set(s["annuitaeten"]) == {"fam_kfw297", "fam_kfw124", "sie_kfw297", "sie_kfw124", "sie_hausbank"}
+    assert s["sondertilgungen"]["fam_hausbank"][2] == 5_000
+
+    # Closed-form plans look exactly like iterated ones
+    plan = s["tilgungsplaene"]["sie_kfw297"]
+    rows, _ = iterate_annuity(200_000, 0.02, 200_000 * ((0.02 + 0.02) / 12.0) * 12)
+    assert list(plan.columns) == list(s["tilgungsplaene"]["fam_hausbank"].columns)
+    assert np.allclose(plan["Restschuld Ende"], rows, atol=0.005)
+
+
+def iterate_months(restschuld, zins, monatsrate):
+    """Reference: 12 monthly payments, interest zins / 12 on the running balance."""
+    rs, zinsen_sum, tilgung_sum = restschuld, 0.0, 0.0
+    for _ in range(12):
+        if rs <= 0.01:
+            break
+        zinsen = rs * zins / 12
+        tilgung = min(max(monatsrate - zinsen, 0.0), rs)
+        rs -= tilgung
+        zinsen_sum += zinsen
+        tilgung_sum += tilgung
+    return zinsen_sum, tilgung_sum, rs
+
+
+def test_monthly_year_matches_month_loop():
+    rng = np.random.default_rng(11)
+    rs = np.concatenate([rng.uniform(0, 400_000, 300), rng.uniform(0, 3_000, 100), [0.0, 0.005]])
+    zins = rng.choice([0.0, 0.01, 0.035, 0.07], len(rs))
+    rate = np.concatenate([rng.uniform(0, 3_000, 200), rs[200:] * zins[200:] / 12])  # inkl. stagnierender Fälle
+    zinsen, tilgung, ende = annuitaet_monatsjahr(rs, zins, rate)
+    for i in range(len(rs)):
+        ref = iterate_months(rs[i], zins[i], rate[i])
+        assert np.allclose((zinsen[i], tilgung[i], ende[i]), ref, atol=1e-6)
+
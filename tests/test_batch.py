@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.batch import calculate_financing_scenarios_batch
+from core.calculations import (
+    calculate_financing_scenario,
+    get_restschuld_nach_jahren,
+    sum_sondertilgung_for_year,
+)
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE
+from core.sondertilgung import SondertilgungPlan
+
+
+def random_params(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        rng.integers(200, 900, n) * 1_000.0, rng.integers(0, 200, n) * 1_000.0, rng.integers(0, 20, n) * 1_000.0,
+        rng.integers(0, 900, n) * 1_000.0, rng.integers(0, 200, n) * 1_000.0, rng.integers(0, 20, n) * 1_000.0,
+        rng.integers(1, 50, n) / 1_000, rng.integers(1, 50, n) / 1_000, rng.integers(1, 60, n) / 1_000,
+        rng.integers(5, 50, n) / 1_000, rng.integers(5, 50, n) / 1_000,
+        rng.integers(0, 30, n) * 5_000.0, rng.integers(0, 20, n) * 5_000.0,
+    ]
+
+
+def assert_matches_scalar(batch: dict, params: list, st_fam: tuple, st_sie: tuple, i: int):
+    s = calculate_financing_scenario([p[i] for p in params], st_fam, st_sie)
+    if "error" in s:
+        assert batch["keine_finanzierung"][i]
+        return
+    assert not batch["keine_finanzierung"][i]
+    assert abs(batch["gesamtrate"][i] - s["gesamtrate"]) < 0.005
+    assert abs(batch["gesamte_zinskosten"][i] - s["gesamte_zinskosten"]) < 0.005
+    for jahr in (1, 10, 25, 50):
+        assert abs(batch["restschuld"][i, jahr - 1] - get_restschuld_nach_jahren(s, jahr)) < 0.005
+        assert abs(batch["sondertilgung"][i, jahr - 1] - sum_sondertilgung_for_year(s["sondertilgungen"], jahr)) < 0.005
+
+
+def test_batch_matches_scalar_with_automatic_special_repayment():
+    params = random_params(40, seed=1)
+    auto_df = pd.DataFrame({"Jahr": range(1, 51), "Betrag": [5_000] * 10 + [20_000] * 40})
+    st_fam = ("Automatische Verteilung", auto_df)
+    st_sie = ("Automatische Verteilung", pd.DataFrame({"Jahr": [3], "Betrag": [50_000]}))
+
+    batch = calculate_financing_scenarios_batch(
+        params,
+        st_fam=SondertilgungPlan.from_dataframe(*st_fam, LOAN_KEYS_FAM),
+        st_sie=SondertilgungPlan.from_dataframe(*st_sie, LOAN_KEYS_SIE),
+    )
+    for i in range(40):
+        assert_matches_scalar(batch, params, st_fam, st_sie, i)
+
+
+def test_batch_matches_scalar_with_manual_special_repayment():
+    params = random_params(40, seed=2)
+    manual_df = pd.DataFrame({"Jahr": range(1, 51)})
+    manual_df["fam_kfw297"] = 0
+    manual_df["fam_kfw124"] = 10_000
+    manual_df["fam_hausbank"] = [30_000] * 5 + [0] * 45
+    st_fam = ("Manuelle Eingabe", manual_df)
+    st_sie = ("Automatische Verteilung", pd.DataFrame({"Jahr": [], "Betrag": []}))
+
+    batch = calculate_financing_scenarios_batch(
+        params,
+        st_fam=SondertilgungPlan.from_dataframe(*st_fam, LOAN_KEYS_FAM),
+        st_sie=SondertilgungPlan.from_dataframe(*st_sie, LOAN_KEYS_SIE),
+    )
+    for i in range(40):
+        assert_matches_scalar(batch, params, st_fam, st_sie, i)
+
+
+def test_batch_broadcasts_scalars_and_flags_no_financing():
+    params = [
+        [100_000, 300_000], 100_000, 0,
+        0, 0, 0,
+        0.02, 0.03, 0.04,
+        0.02, 0.02,
+        100_000, 30_000,
+    ]
+    batch = calculate_financing_scenarios_batch(params)
+    assert list(batch["keine_finanzierung"]) == [True, False]
+    assert batch["darlehen"].shape == (2, 6)
+    assert batch["darlehen"][1, 0] == 200_000
+    assert batch["restschuld"].shape == (2, 50)
+
+
+def test_batch_monthly_matches_scalar_monthly():
+    params = random_params(30, seed=5)
+    st_fam = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(50, 6_000.0))
+    batch = calculate_financing_scenarios_batch(params, st_fam, None, monatlich=True)
+    for i in range(30):
+        s = calculate_financing_scenario([p[i] for p in params], st_fam, ("Automatische Verteilung", None), monatlich=True)
+        if "error" in s:
+            continue
+        assert abs(batch["gesamte_zinskosten"][i] - s["gesamte_zinskosten"]) < 0.005
+        assert abs(batch["restschuld"][i, 9] - get_restschuld_nach_jahren(s, 10)) < 0.005
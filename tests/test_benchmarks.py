@@ -0,0 +1,47 @@
+import json
+import sys
+from pathlib import Path
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.suite import BASELINE, BENCHMARKS, _lade, main, run, vergleiche
+
+
+def _bericht(zeiten: dict) -> dict:
+    return {"version": 1, "meta": {}, "benchmarks": {n: {"min": t, "median": t} for n, t in zeiten.items()}}
+
+
+def test_every_benchmark_builds_and_runs_once():
+    for name, aufbau in BENCHMARKS.items():
+        aufbau()()  # Aufbau + ein Aufruf ohne Fehler
+    bericht = run(["restschuld"], wiederholungen=2, mindestdauer=0.001, ausgabe=lambda *_: None)
+    assert list(bericht["benchmarks"]) == ["restschuld_nach_jahren"]
+    messung = bericht["benchmarks"]["restschuld_nach_jahren"]
+    assert 0 < messung["min"] <= messung["median"] and messung["aufrufe"] >= 1
+    json.dumps(bericht)
+
+
+def test_compare_flags_regressions_beyond_threshold(tmp_path, capsys):
+    basis = _bericht({"a": 1.0, "b": 1.0, "c": 1.0, "weg": 1.0})
+    neu = _bericht({"a": 1.1, "b": 1.5, "c": 0.5, "dazu": 1.0})
+    status = {z[0]: z[4] for z in vergleiche(basis, neu, schwelle=0.2)}
+    assert status == {"a": "ok", "b": "regression", "c": "schneller", "weg": "fehlt", "dazu": "neu"}
+
+    (tmp_path / "basis.json").write_text(json.dumps(basis))
+    (tmp_path / "neu.json").write_text(json.dumps(neu))
+    assert main(["compare", str(tmp_path / "basis.json"), str(tmp_path / "neu.json")]) == 1
+    assert "Regression" in capsys.readouterr().err
+    assert main(["compare", str(tmp_path / "basis.json"), str(tmp_path / "neu.json"), "--schwelle", "0.6"]) == 0
+
+
+def test_committed_baseline_covers_the_suite_and_missing_baselines_fail(tmp_path, capsys):
+    assert set(_lade(str(BASELINE))["benchmarks"]) == set(BENCHMARKS)
+
+    neu = _bericht({"a": 1.0})
+    (tmp_path / "neu.json").write_text(json.dumps(neu))
+    assert main(["compare", str(tmp_path / "fehlt.json"), str(tmp_path / "neu.json")]) == 2
+    assert "Baseline fehlt" in capsys.readouterr().err
+    # Keine gemeinsamen Benchmarks: kein stilles Bestehen
+    (tmp_path / "andere.json").write_text(json.dumps(_bericht({"b": 1.0})))
+    assert main(["compare", str(tmp_path / "andere.json"), str(tmp_path / "neu.json")]) == 2
@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+import pandas as pd
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.cache import ScenarioCache, result_nbytes, scenario_fingerprint
+
+PARAMS = [
+    300_000, 50_000, 0,
+    0,       0,      0,
+    0.02, 0.03, 0.04,
+    0.02, 0.02,
+    100_000, 30_000,
+]
+
+
+def auto_table(betrag: float) -> pd.DataFrame:
+    return pd.DataFrame({"Jahr": range(1, 51), "Betrag": betrag})
+
+
+def st_params(betrag: float = 0.0):
+    return ("Automatische Verteilung", auto_table(betrag)), ("Automatische Verteilung", auto_table(0.0))
+
+
+def test_fingerprint_depends_on_content_not_identity():
+    assert scenario_fingerprint(PARAMS, *st_params(1_000)) == scenario_fingerprint(list(PARAMS), *st_params(1_000))
+    assert scenario_fingerprint(PARAMS, *st_params(1_000)) != scenario_fingerprint(PARAMS, *st_params(2_000))
+
+    st_fam, st_sie = st_params()
+    edited = st_fam[1].copy()
+    edited.loc[edited["Jahr"] == 30, "Betrag"] = 500
+    assert scenario_fingerprint(PARAMS, st_fam, st_sie) != scenario_fingerprint(PARAMS, (st_fam[0], edited), st_sie)
+    assert scenario_fingerprint(PARAMS, st_fam, st_sie) != scenario_fingerprint(PARAMS, ("Manuelle Eingabe", st_fam[1]), st_sie)
+
+    changed = list(PARAMS)
+    changed[9] = 0.03
+    assert scenario_fingerprint(PARAMS, st_fam, st_sie) != scenario_fingerprint(changed, st_fam, st_sie)
+
+
+def test_cache_counts_hits_and_returns_same_result():
+    cache = ScenarioCache()
+    first = cache.calculate(PARAMS, *st_params(1_000))
+    second = cache.calculate(PARAMS, *st_params(1_000))
+    assert first is second
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = ScenarioCache(max_entries=2)
+    a = cache.calculate(PARAMS, *st_params(1_000))
+    cache.calculate(PARAMS, *st_params(2_000))
+    assert cache.calculate(PARAMS, *st_params(1_000)) is a  # refresh a
+    cache.calculate(PARAMS, *st_params(3_000))  # evicts 2_000
+    assert len(cache) == 2 and cache.stats()["evictions"] == 1
+    assert cache.calculate(PARAMS, *st_params(1_000)) is a
+    misses = cache.stats()["misses"]
+    cache.calculate(PARAMS, *st_params(2_000))
+    assert cache.stats()["misses"] == misses + 1
+
+
+def test_result_size_counts_checkpoints_and_their_plans():
+    s = ScenarioCache().calculate(PARAMS, *st_params(1_000))
+    verlauf = s["_verlauf"]
+    arrays = sum(verlauf[f].nbytes for f in ("restschulden", "zinskosten", "laufzeit"))
+    assert result_nbytes(s) == 4096 + s.nbytes + arrays + sum(p.werte.nbytes for p in verlauf["st"])
+
+
+def test_cache_respects_byte_budget():
+    one = ScenarioCache().calculate(PARAMS, *st_params(1_000))
+    budget = int(result_nbytes(one) * 2.5)
+    cache = ScenarioCache(max_entries=100, max_bytes=budget)
+    for betrag in (1_000, 2_000, 3_000, 4_000):
+        cache.calculate(PARAMS, *st_params(betrag))
+    assert cache.nbytes <= budget
+    assert len(cache) < 4 and cache.stats()["evictions"] >= 1
+
+
+def test_cache_miss_resumes_from_cached_run_with_same_params():
+    cache = ScenarioCache()
+    basis = cache.calculate(PARAMS, *st_params(1_000))
+    st_fam, st_sie = st_params(1_000)
+    edited = st_fam[1].copy()
+    edited.loc[edited["Jahr"] == 20, "Betrag"] = 9_000
+    s = cache.calculate(PARAMS, (st_fam[0], edited), st_sie)
+    assert basis["_verlauf"]["start_jahr"] == 1
+    assert s["_verlauf"]["start_jahr"] == 20
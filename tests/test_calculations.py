@@ -123,3 +123,78 @@ def test_sum_sondertilgung_for_year_sums_all_loans():
     s = calculate_financing_scenario(params, st_fam, st_sie)
     total_st_y1 = sum_sondertilgung_for_year(s["sondertilgungen"], 1)
     assert total_st_y1 == 10_000
+
+
+def test_incremental_run_from_checkpoint_matches_full_run():
+    params = [
+        300_000, 50_000, 0,
+        300_000, 20_000, 0,
+        0.02, 0.03, 0.05,
+        0.02, 0.02,
+        100_000, 30_000,
+    ]
+    auto = make_auto_st_df({j: 5_000 for j in range(1, 51)})
+    st_sie = ("Automatische Verteilung", make_auto_st_df({1: 2_000}))
+    basis = calculate_financing_scenario(params, ("Automatische Verteilung", auto), st_sie, checkpoint=True)
+
+    edited = auto.copy()
+    edited.loc[edited["Jahr"] == 12, "Betrag"] = 40_000
+    st_fam = ("Automatische Verteilung", edited)
+    inkrementell = calculate_financing_scenario(params, st_fam, st_sie, basis=basis, checkpoint=True)
+    voll = calculate_financing_scenario(params, st_fam, st_sie, checkpoint=True)
+
+    # Resumed at year 12 from the basis checkpoint
+    assert inkrementell["_verlauf"]["start_jahr"] == 12
+    assert voll["_verlauf"]["start_jahr"] == 1
+
+    assert inkrementell["gesamte_zinskosten"] == voll["gesamte_zinskosten"]
+    assert inkrementell["sondertilgungen"] == voll["sondertilgungen"]
+    for k, plan in voll["tilgungsplaene"].items():
+        pd.testing.assert_frame_equal(inkrementell["tilgungsplaene"][k], plan)
+
+
+def test_checkpoint_ignored_when_params_differ():
+    params = [300_000, 50_000, 0, 0, 0, 0, 0.02, 0.03, 0.05, 0.02, 0.02, 100_000, 30_000]
+    st_fam = ("Automatische Verteilung", make_auto_st_df({j: 5_000 for j in range(1, 51)}))
+    st_sie = ("Automatische Verteilung", make_auto_st_df({}))
+    basis = calculate_financing_scenario(params, st_fam, st_sie, checkpoint=True)
+
+    changed = list(params)
+    changed[9] = 0.03
+    s = calculate_financing_scenario(changed, st_fam, st_sie, basis=basis, checkpoint=True)
+    assert s["gesamte_zinskosten"] == calculate_financing_scenario(changed, st_fam, st_sie)["gesamte_zinskosten"]
+    assert s["_verlauf"]["start_jahr"] == 1
+    # Ohne checkpoint=True keine Checkpoint-Arrays im Ergebnis
+    assert "_verlauf" not in calculate_financing_scenario(params, st_fam, st_sie)
+
+
+def test_monthly_mode_matches_month_by_month_schedule():
+    params = [300_000, 50_000, 0, 0, 0, 0, 0.02, 0.03, 0.05, 0.02, 0.02, 100_000, 30_000]
+    st_fam = ("Automatische Verteilung", make_auto_st_df({3: 20_000, 10: 50_000}))
+    st_sie = ("Automatische Verteilung", make_auto_st_df({}))
+    s = calculate_financing_scenario(params, st_fam, st_sie, monatlich=True)
+    jaehrlich = calculate_financing_scenario(params, st_fam, st_sie)
+
+    # Referenz: 600 Monate, Sondertilgung nach dem 12. Monat (teuerster Zins zuerst)
+    keys = ["fam_kfw297", "fam_kfw124", "fam_hausbank"]
+    rs = {k: s["darlehen"][k] for k in keys}
+    zins = dict(zip(keys, params[6:9]))
+    zinsen_ref = 0.0
+    for jahr in range(1, 51):
+        for _ in range(12):
+            for k in keys:
+                if rs[k] > 0.01:
+                    z = rs[k] * zins[k] / 12
+                    rs[k] -= min(max(s["monatsraten"][k] - z, 0.0), rs[k])
+                    zinsen_ref += z
+        betrag = {3: 20_000, 10: 50_000}.get(jahr, 0.0)
+        for k in sorted(keys, key=lambda k: -zins[k]):
+            b = min(betrag, rs[k]) if rs[k] > 0.01 else 0.0
+            rs[k] -= b
+            betrag -= b
+        if jahr in (5, 15):
+            assert abs(get_restschuld_nach_jahren(s, jahr) - sum(rs.values())) < 1e-4
+
+    assert abs(s["gesamte_zinskosten"] - zinsen_ref) < 1e-4
+    assert s["gesamte_zinskosten"] < jaehrlich["gesamte_zinskosten"]
+    assert list(s["tilgungsplaene"]["fam_kfw297"].columns) == list(jaehrlich["tilgungsplaene"]["fam_kfw297"].columns)
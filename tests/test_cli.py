@@ -0,0 +1,116 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.cli import CONFIG_FELDER, PLAN_SPALTEN, main, st_tabelle
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE
+from core.optimizer import reihenfolge_fuer
+from core.sondertilgung import SondertilgungPlan
+
+BASIS = dict(zip(CONFIG_FELDER, [600_000, 150_000, 10_000, 600_000, 150_000, 11_000,
+                                 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]))
+
+DATENSAETZE = [
+    {"id": "a", **BASIS, "Zinsbindung_Jahre": 10},
+    {"id": "b", **BASIS, "Zins_Hausbank": 0.045, "monatlich": True,
+     "st_modus_fam": "Automatische Verteilung", "st_df_fam": [{"Jahr": j, "Betrag": 5_000} for j in range(1, 11)]},
+    {"id": "c", **BASIS, "Eigenkapital_Sie": 0, "st_modus_sie": "Manuelle Eingabe",
+     "st_df_sie": [{"Jahr": 3, "sie_hausbank": 20_000}, {"Jahr": 3, "sie_hausbank": 1}], "st_max_quote_sie": 0.05},
+    {"id": "d", **BASIS, "Kosten_Fam": 100_000, "Kosten_Sie": 100_000},  # keine Finanzierung nötig
+    {"id": "e", **BASIS, "Tilgung_Fam": 0.04},
+]
+
+
+def _referenz(d):
+    plaene = []
+    for partei, keys in (("fam", LOAN_KEYS_FAM), ("sie", LOAN_KEYS_SIE)):
+        plaene.append(SondertilgungPlan.from_dataframe(d.get(f"st_modus_{partei}"), pd.DataFrame(d.get(f"st_df_{partei}", [])),
+                                                       keys, d.get(f"st_max_quote_{partei}")))
+    return calculate_financing_scenario([d[f] for f in CONFIG_FELDER], *plaene, monatlich=d.get("monatlich", False))
+
+
+def test_jsonl_to_csv_matches_engine_in_input_order(tmp_path):
+    eingabe = tmp_path / "szenarien.jsonl"
+    eingabe.write_text("\n".join(json.dumps(d) for d in DATENSAETZE) + "\n")
+    # Kleine Chunks: Gruppen (Modus/Zinsverrechnung) über Chunkgrenzen hinweg
+    assert main([str(eingabe), "-o", str(tmp_path / "k.csv"), "--chunk", "2"]) == 0
+    k = pd.read_csv(tmp_path / "k.csv")
+    assert list(k["id"]) == ["a", "b", "c", "d", "e"]
+    for d, zeile in zip(DATENSAETZE, k.itertuples()):
+        s = _referenz(d)
+        if "error" in s:
+            assert zeile.keine_finanzierung and zeile.tilgungsjahr == 0
+            continue
+        assert zeile.gesamte_zinskosten == pytest.approx(s["gesamte_zinskosten"], abs=1e-6)
+        assert zeile.gesamtrate == pytest.approx(s["gesamtrate"])
+        assert zeile.restschuld_zinsbindung == pytest.approx(s.restschuld(d.get("Zinsbindung_Jahre", 15)), abs=1e-6)
+        assert zeile.tilgungsjahr == s.laufzeit.max()
+
+
+def test_csv_input_and_parquet_schedules(tmp_path):
+    pytest.importorskip("pyarrow")
+    zeilen = [{**d, "st_df_fam": json.dumps(d.get("st_df_fam", [])), "st_df_sie": json.dumps(d.get("st_df_sie", []))}
+              for d in DATENSAETZE]
+    pd.DataFrame(zeilen).to_csv(tmp_path / "szenarien.csv", index=False)
+    args = [str(tmp_path / "szenarien.csv"), "-o", str(tmp_path / "k.parquet"), "--plaene", str(tmp_path / "p.parquet")]
+    assert main(args) == 0
+    k, p = pd.read_parquet(tmp_path / "k.parquet"), pd.read_parquet(tmp_path / "p.parquet")
+    assert len(k) == 5 and k.loc[3, "keine_finanzierung"]
+
+    assert "d" not in set(p["id"])
+    for d in (DATENSAETZE[1], DATENSAETZE[2]):
+        s = _referenz(d)
+        for i, k in enumerate(s.loan_keys):
+            plan = p[(p["id"] == d["id"]) & (p["kredit"] == k)]
+            assert list(plan["jahr"]) == list(range(1, s.laufzeit[i] + 1))
+            assert np.allclose(plan[list(PLAN_SPALTEN)], s.plan[i, :s.laufzeit[i]], atol=1e-6)
+    plan = p[(p["id"] == "c") & (p["kredit"] == "sie_hausbank")]
+    assert plan["sondertilgung"].max() == pytest.approx(min(20_000, 0.05 * s["darlehen"]["sie_hausbank"]))
+
+
+def test_allocation_mode_is_resolved_per_record(tmp_path):
+    datensaetze = [{"id": m, **BASIS, "Zins_Hausbank": 0.025, "aufteilung": m, "max_monatsrate": ""}
+                   for m in ("wasserfall", "zinskosten", "monatsrate")]
+    eingabe = tmp_path / "szenarien.jsonl"
+    eingabe.write_text("\n".join(json.dumps(d) for d in datensaetze) + "\n")
+    assert main([str(eingabe), "-o", str(tmp_path / "k.csv")]) == 0
+    k = pd.read_csv(tmp_path / "k.csv")
+    params = [BASIS[f] if f != "Zins_Hausbank" else 0.025 for f in CONFIG_FELDER]
+    for m, zeile in zip(("wasserfall", "zinskosten", "monatsrate"), k.itertuples()):
+        s = calculate_financing_scenario(params, None, None, reihenfolge=reihenfolge_fuer(params, None, None, m))
+        assert zeile.gesamte_zinskosten == pytest.approx(s["gesamte_zinskosten"], abs=1e-6)
+        assert zeile.darlehen_fam_hausbank == pytest.approx(s["darlehen"]["fam_hausbank"])
+    assert k.loc[1, "gesamte_zinskosten"] < k.loc[0, "gesamte_zinskosten"]
+
+
+def test_invalid_records_and_table_compilation(tmp_path, capsys):
+    eingabe = tmp_path / "kaputt.jsonl"
+    eingabe.write_text(json.dumps({"Kosten_Fam": 1}) + "\n")
+    assert main([str(eingabe)]) == 1
+    assert "fehlende Felder" in capsys.readouterr().err
+    eingabe.write_text(json.dumps({**BASIS, "aufteilung": "zufall"}) + "\n")
+    assert main([str(eingabe)]) == 1
+    assert "unbekannte Aufteilung 'zufall'" in capsys.readouterr().err
+    for zeile, meldung in (("[1, 2]", "erwartet ein JSON-Objekt"), ('"x"', "erwartet ein JSON-Objekt"),
+                           (json.dumps({**BASIS, "Zinsbindung_Jahre": "zehn"}), "ungültige Zinsbindung_Jahre 'zehn'"),
+                           (json.dumps({**BASIS, "Zins_KfW_297": [1]}), "Datensatz 0:")):
+        eingabe.write_text(zeile + "\n")
+        assert main([str(eingabe)]) == 1
+        assert "Fehler: Datensatz 0: " in (err := capsys.readouterr().err) and meldung in err
+
+    werte = st_tabelle('[{"Jahr": 2, "Betrag": 100}, {"Jahr": 2, "Betrag": 5}, {"Jahr": 99, "Betrag": 1}, {"Jahr": 3, "Betrag": -4}]',
+                       "Automatische Verteilung", LOAN_KEYS_FAM)
+    assert werte.shape == (MAX_JAHRE,) and werte[1] == 100 and werte.sum() == 100
+
+
+def test_cli_does_not_import_ui_libraries():
+    code = "import sys, core.cli; assert 'streamlit' not in sys.modules and 'plotly' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], check=True)
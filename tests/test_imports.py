@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+ROOT = Path(__file__).resolve().parents[1]
+CORE_MODULE = [
+    "core.allocation", "core.annuity", "core.batch", "core.cache", "core.calculations", "core.cli",
+    "core.helpers", "core.memory", "core.montecarlo", "core.optimizer", "core.parallel", "core.pipeline",
+    "core.profiling", "core.registry", "core.result", "core.solver", "core.sondertilgung", "core.sweep",
+    "core.store", "core.vergleich",
+]
+# Importzeit des Kerns (nach NumPy) in Sekunden; gemessen ~0.06 s, Puffer für langsame Rechner
+IMPORT_BUDGET = 0.3
+
+CODE = f"""
+import json, sys, time
+import numpy
+start = time.perf_counter()
+for m in {CORE_MODULE!r}:
+    __import__(m)
+dauer = time.perf_counter() - start
+from core.calculations import calculate_financing_scenario
+s = calculate_financing_scenario([600_000, 150_000, 10_000, 600_000, 150_000, 11_000,
+                                  0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000], None, None)
+print(json.dumps({{"dauer": dauer, "zinsen": s["gesamte_zinskosten"],
+                  "geladen": [m for m in ("pandas", "plotly", "streamlit") if m in sys.modules]}}))
+"""
+
+
+def _messung() -> dict:
+    ausgabe = subprocess.run([sys.executable, "-c", CODE], cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(ausgabe.stdout)
+
+
+def test_core_runs_without_pandas_or_plotly():
+    messung = _messung()
+    assert messung["geladen"] == []
+    assert messung["zinsen"] > 0
+
+
+def test_core_import_time_budget():
+    # Bester von drei kalten Starts, damit einzelne Ausreißer (I/O, Scheduler) nicht zählen
+    dauer = min(_messung()["dauer"] for _ in range(3))
+    assert dauer < IMPORT_BUDGET, f"Import des Kerns dauert {dauer:.3f} s (Budget {IMPORT_BUDGET} s)"
+
+
+def test_dataframes_load_pandas_on_demand():
+    code = ("import sys; from core.calculations import calculate_financing_scenario; "
+            "s = calculate_financing_scenario([600_000, 150_000, 10_000, 600_000, 150_000, 11_000, "
+            "0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000], None, None); "
+            "assert 'pandas' not in sys.modules; df = s['tilgungsplaene']['fam_kfw297']; "
+            "assert 'pandas' in sys.modules and not df.empty")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+
+
+def test_app_layout_loads_the_disk_store_on_demand():
+    # sqlite3 fehlt z. B. unter Pyodide: die Oberfläche importiert die Ablage erst beim Speichern/Laden
+    code = "import sys; import ui.layout; assert 'core.store' not in sys.modules and 'sqlite3' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.memory import Groessen, SzenarioSpeicher, messe_bytes, speicherbericht
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+
+
+def test_measured_bytes_cover_arrays_and_frames():
+    arr = np.zeros(100_000)
+    assert arr.nbytes <= messe_bytes(arr) < arr.nbytes * 1.1
+    assert messe_bytes({"a": arr, "b": arr}) < arr.nbytes * 1.1  # geteilte Objekte zählen einmal
+    assert messe_bytes([arr, arr[10:]]) < arr.nbytes * 1.1  # Sichten teilen den Puffer
+
+    szenario = calculate_financing_scenario(PARAMS, None, None)
+    assert messe_bytes(szenario) >= szenario.nbytes
+    zeilen = speicherbericht({"Tabellen": {"st": pd.DataFrame({"Jahr": range(1, 51), "Betrag": 0.0})}, "Szenarien": {"A": 123}})
+    assert zeilen[0]["bytes"] >= 400 and zeilen[1] == {"kategorie": "Szenarien", "name": "A", "bytes": 123}
+
+
+def test_sizes_are_cached_per_object_and_shared_results_excluded():
+    szenario = calculate_financing_scenario(PARAMS, None, None)
+    groessen = Groessen()
+    gruppen = {"Knoten": {"tilgung": szenario, "tabelle": pd.DataFrame({"Jahr": range(1, 51)})}}
+    zeilen = speicherbericht(gruppen, groessen)
+    assert zeilen[0]["bytes"] >= szenario.nbytes and len(groessen) == 2
+    assert speicherbericht(gruppen, groessen) == zeilen  # gleiche Objekte: gemerkte Größen
+    geteilt = speicherbericht({"Knoten": {"tilgung": szenario}}, Groessen(), frozenset({id(szenario)}))
+    assert geteilt[0]["bytes"] == 0
+    assert messe_bytes({"a": szenario, "b": np.zeros(10)}, frozenset({id(szenario)})) < 1024
+
+
+def test_budget_evicts_oldest_saved_scenarios():
+    szenario = calculate_financing_scenario(PARAMS, None, None)
+    groesse = messe_bytes(szenario)
+    speicher = SzenarioSpeicher(budget=int(groesse * 3.5))
+    for name in "abc":
+        assert speicher.speichere(name, szenario) == []
+    assert speicher.speichere("d", szenario) == ["a"]
+    assert speicher.namen() == ["b", "c", "d"] and speicher.neuestes()[0] == "d"
+
+    # Erneutes Speichern ersetzt; übriger Session-Zustand zählt mit
+    assert speicher.speichere("b", szenario, weitere_bytes=groesse) == ["c"]
+    assert speicher.namen() == ["d", "b"] and speicher.evictions == 2
+    # Das neueste Szenario bleibt auch über dem Budget erhalten
+    assert speicher.kuerze(weitere_bytes=10 * groesse) == ["d"] and speicher.namen() == ["b"]
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, MAX_JAHRE
+from core.montecarlo import ZinsModell, simulate_anschlussfinanzierung
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+ST_FAM = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0))
+
+
+def test_rate_model_reverts_to_mean():
+    modell = ZinsModell(start=0.01, mittel=0.04, geschwindigkeit=0.5, volatilitaet=0.005)
+    pfade = modell.pfade(4_000, 30, np.random.default_rng(0))
+    assert pfade.shape == (4_000, 31)
+    assert np.all(pfade[:, 0] == 0.01)
+    assert abs(pfade[:, -1].mean() - 0.04) < 0.001
+    with pytest.raises(ValueError):
+        ZinsModell(geschwindigkeit=0.0)
+
+
+def test_without_rate_risk_matches_deterministic_engine():
+    # Anschluss ab Jahr 0 zum heutigen Zins ohne Neufestsetzung = ursprünglicher Plan
+    modell = ZinsModell(start=0.03, mittel=0.03, volatilitaet=0.0)
+    for reihenfolge in (None, {"fam": ("hausbank", "kfw124", "kfw297")}):
+        mc = simulate_anschlussfinanzierung(PARAMS, ST_FAM, None, 0, modell=modell, pfade=4, anschluss_bindung=MAX_JAHRE,
+                                            reihenfolge=reihenfolge)
+        s = calculate_financing_scenario(PARAMS, ST_FAM, None, reihenfolge=reihenfolge)
+        for partei in ("fam", "sie"):
+            assert np.allclose(mc["zinskosten"][partei], s["zinskosten_partei"][partei])
+            assert np.all(mc["tilgungsjahr"][partei] == s.laufzeit[[k.startswith(partei) for k in s.loan_keys]].max())
+
+
+def test_distribution_report_per_party():
+    mc = simulate_anschlussfinanzierung(PARAMS, ST_FAM, None, 15, pfade=1_000, seed=3)
+    assert list(mc["quantile"].index) == ["Schwester & Familie", "Ihr Anteil", "Gesamt"]
+    q = mc["quantile"]
+    assert (q["Zinskosten P5"] <= q["Zinskosten P50"]).all() and (q["Zinskosten P50"] <= q["Zinskosten P95"]).all()
+    assert np.allclose(mc["zinskosten"]["gesamt"], mc["zinskosten"]["fam"] + mc["zinskosten"]["sie"])
+    # Zinsen bis zum Ende der Zinsbindung sind in jedem Pfad gleich, danach streuen sie
+    assert mc["zinskosten"]["gesamt"].std() > 0
+    assert np.all(mc["tilgungsjahr"]["fam"] > 15)
+
+    # Höhere Zinsen im Anschluss -> höhere Zinskosten (gleiche Zufallszahlen)
+    teuer = simulate_anschlussfinanzierung(PARAMS, ST_FAM, None, 15, modell=ZinsModell(mittel=0.07), pfade=1_000, seed=3)
+    assert np.all(teuer["zinskosten"]["gesamt"] > mc["zinskosten"]["gesamt"])
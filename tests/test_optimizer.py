@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.batch import calculate_scenarios_batch
+from core.cache import scenario_fingerprint
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from core.optimizer import beste_reihenfolge, optimiere_sondertilgung, reihenfolge_fuer, sondertilgung_fuer
+from core.registry import standard_register
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+# Hausbank günstiger als KfW 124: der feste Wasserfall ist dann nicht mehr optimal
+INVERTIERT = PARAMS[:8] + [0.03] + PARAMS[9:]
+ST_FAM = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0))
+
+
+def test_waterfall_stays_when_it_is_optimal():
+    # Günstigster Zins zuerst = Wasserfall des Registers: keine abweichende Reihenfolge
+    assert reihenfolge_fuer(PARAMS, ST_FAM, None, "monatsrate") is None
+    assert reihenfolge_fuer(PARAMS, ST_FAM, None) is None
+    with pytest.raises(ValueError):
+        reihenfolge_fuer(PARAMS, None, None, "billig")
+
+
+def test_inverted_rates_prefer_the_cheaper_loan():
+    reihenfolge = reihenfolge_fuer(INVERTIERT, ST_FAM, None, "monatsrate")
+    assert reihenfolge == {p: ("kfw297", "hausbank", "kfw124") for p in ("fam", "sie")}
+    wasserfall = calculate_financing_scenario(INVERTIERT, ST_FAM, None)
+    optimiert = calculate_financing_scenario(INVERTIERT, ST_FAM, None, reihenfolge=reihenfolge)
+    assert optimiert["darlehen"]["fam_kfw124"] == 0 and optimiert["darlehen"]["fam_kfw297"] == 300_000
+    assert optimiert["finanzierungsbedarf"] == wasserfall["finanzierungsbedarf"]
+    assert optimiert["gesamtrate"] < wasserfall["gesamtrate"]
+    st_sie = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_SIE, np.zeros(MAX_JAHRE))
+    assert scenario_fingerprint(INVERTIERT, ST_FAM, st_sie, reihenfolge=reihenfolge) != scenario_fingerprint(INVERTIERT, ST_FAM, st_sie)
+
+    zinsoptimal = reihenfolge_fuer(INVERTIERT, ST_FAM, None, "zinskosten")
+    szenario = calculate_financing_scenario(INVERTIERT, ST_FAM, None, reihenfolge=zinsoptimal)
+    assert szenario["gesamte_zinskosten"] <= min(optimiert["gesamte_zinskosten"], wasserfall["gesamte_zinskosten"])
+
+
+def test_optimum_beats_every_split_on_a_grid():
+    register = standard_register(INVERTIERT)
+    # Beliebige Aufteilungen innerhalb der Obergrenzen, Rest an die Hausbank (beide Parteien gleich)
+    x297, x124 = np.meshgrid(np.linspace(0, 300_000, 13), np.linspace(0, 100_000, 11))
+    spalten = []
+    for b in register.bedarf():
+        spalten += [np.minimum(x297.ravel(), b), np.minimum(x124.ravel(), b - np.minimum(x297.ravel(), b))]
+        spalten.append(b - spalten[-2] - spalten[-1])
+    batch = calculate_scenarios_batch(register, {"fam": ST_FAM}, summen=np.stack(spalten, axis=1))
+    assert beste_reihenfolge(register, {"fam": ST_FAM}, "zinskosten")["zinskosten"] <= batch["gesamte_zinskosten"].min() + 1e-6
+    assert beste_reihenfolge(register, {"fam": ST_FAM}, "monatsrate")["gesamtrate"] <= batch["gesamtrate"].min() + 1e-6
+
+
+def test_monthly_budget_and_register_order_validation():
+    register = standard_register(INVERTIERT)
+    frei = beste_reihenfolge(register, {"fam": ST_FAM}, "zinskosten")
+    guenstigste = beste_reihenfolge(register, {"fam": ST_FAM}, "monatsrate")
+    assert guenstigste["gesamtrate"] < frei["gesamtrate"]
+    # Budget zwischen günstigster und zinsoptimaler Rate: Zinsen steigen, Budget hält
+    budget = (guenstigste["gesamtrate"] + frei["gesamtrate"]) / 2
+    knapp = beste_reihenfolge(register, {"fam": ST_FAM}, "zinskosten", max_monatsrate=budget)
+    assert knapp["budget_eingehalten"] and knapp["gesamtrate"] <= budget and knapp["zinskosten"] >= frei["zinskosten"]
+    # Unerreichbares Budget: Kombination mit der geringsten Rate, markiert
+    zu_knapp = beste_reihenfolge(register, {"fam": ST_FAM}, "zinskosten", max_monatsrate=3_000)
+    assert not zu_knapp["budget_eingehalten"] and zu_knapp["gesamtrate"] == guenstigste["gesamtrate"]
+    with pytest.raises(ValueError):
+        standard_register(PARAMS, {"fam": ("kfw297", "hausbank")})
+
+
+def test_sondertilgung_schedule_beats_single_cells_and_matches_engine():
+    r = sondertilgung_fuer(PARAMS, "fam", "restschuld_zinsbindung", budget_gesamt=50_000, zinsbindung_jahre=15)
+    assert r["loan_keys"] == LOAN_KEYS_FAM and r["werte"].shape == (MAX_JAHRE, 3)
+    assert r["eingesetzt"] == pytest.approx(50_000) and not r["werte"][15:].any()
+    plan = SondertilgungPlan(ST_MODUS_MANUELL, LOAN_KEYS_FAM, r["werte"])
+    assert calculate_financing_scenario(PARAMS, plan, None).restschuld(15, "fam") == pytest.approx(r["wert"])
+    # Das ganze Budget in einer einzigen Zelle (Jahr x Darlehen) ist nie besser
+    register = standard_register(PARAMS)
+    zellen = np.zeros((15 * 3, MAX_JAHRE, 3))
+    for i in range(15 * 3):
+        zellen[i, i // 3, i % 3] = 50_000
+    batch = calculate_scenarios_batch(register, {"fam": (ST_MODUS_MANUELL, zellen)}, details=True,
+                                      summen=np.repeat(np.atleast_2d(register.aufteilung()), len(zellen), axis=0))
+    assert r["wert"] <= batch["restschuld_kredit"][:, 14, :3].sum(axis=1).min() + 1e-6 < r["ohne"]
+
+
+def test_sondertilgung_yearly_budget_and_caps():
+    register = standard_register(PARAMS)
+    r = optimiere_sondertilgung(register, "fam", budget_jahr=10_000, max_quote=0.05)
+    grenzen = 0.05 * register.aufteilung()[:3]
+    assert (r["werte"].sum(axis=1) <= 10_000 + 1e-6).all() and (r["werte"] <= grenzen + 1e-6).all()
+    # Gleiches Budget p.a. automatisch verteilt: mehr Zinsen
+    auto = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 10_000.0), max_quote=0.05)
+    assert r["wert"] < calculate_financing_scenario(PARAMS, auto, None)["zinskosten_partei"]["fam"]
+    # Darlehensgrenze je Produkt
+    ohne_hausbank = optimiere_sondertilgung(register, "fam", budget_jahr=10_000, obergrenzen={"fam_hausbank": 0})
+    assert not ohne_hausbank["werte"][:, 2].any()
+    with pytest.raises(ValueError):
+        optimiere_sondertilgung(register, "fam", "monatsrate", budget_jahr=10_000)
+    with pytest.raises(ValueError):
+        optimiere_sondertilgung(register, "fam")
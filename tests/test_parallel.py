@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.batch import calculate_financing_scenarios_batch
+from core.parallel import ParallelExecutor, _st_teil
+from core.helpers import LOAN_KEYS_FAM, MAX_JAHRE
+from core.sondertilgung import SondertilgungPlan
+from core.sweep import parameter_sweep
+from test_batch import random_params
+
+
+def test_parallel_results_match_batch_engine():
+    params = random_params(700, seed=4)
+    st_fam = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(MAX_JAHRE, 4_000.0))
+    st_sie = ("Automatische Verteilung", np.random.default_rng(2).integers(0, 10, (700, MAX_JAHRE)) * 1_000.0)
+    ref = calculate_financing_scenarios_batch(params, st_fam, st_sie)
+
+    with ParallelExecutor(max_workers=2, chunk_size=128) as executor:
+        ergebnis, bericht = executor.run(params, st_fam, st_sie)
+        assert bericht["szenarien"] == 700
+        assert bericht["chunks"] == 8  # 700 / (2 Worker * 4) -> Chunks à 88
+        assert bericht["szenarien_pro_sekunde"] > 0
+        # Pool wird wiederverwendet
+        erneut, _ = executor.run([p[:10] for p in params], st_fam, None)
+        assert erneut["restschuld"].shape == (10, MAX_JAHRE)
+
+        params_13 = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+        achsen = ("Zins Hausbank", "Anf. Tilgung Sie", [0.02, 0.04], [0.01, 0.03])
+        assert parameter_sweep(params_13, *achsen, executor=executor).equals(parameter_sweep(params_13, *achsen))
+
+    for feld in ("keine_finanzierung", "gesamtrate", "gesamte_zinskosten", "darlehen", "restschuld", "sondertilgung"):
+        assert np.array_equal(ergebnis[feld], ref[feld]), feld
+
+
+def test_chunk_slicing_of_sondertilgung_inputs():
+    plan = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM)
+    assert _st_teil(plan, 0, 5) is plan
+    modus, werte, quote = _st_teil(("Manuelle Eingabe", np.zeros((20, MAX_JAHRE, 3)), np.full(20, 0.05)), 5, 9)
+    assert werte.shape == (4, MAX_JAHRE, 3) and quote.shape == (4,)
+    assert _st_teil(("Automatische Verteilung", np.zeros(MAX_JAHRE)), 5, 9)[1].shape == (MAX_JAHRE,)
+
+
+def test_worker_imports_do_not_pull_in_streamlit():
+    code = "import sys, core.parallel; assert 'streamlit' not in sys.modules and 'plotly' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], check=True)
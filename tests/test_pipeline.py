@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario, get_restschuld_nach_jahren
+from core.helpers import CONFIG_FELDER, LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO
+from core.pipeline import FINANZIERUNG_KNOTEN, Knoten, Pipeline
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+CFG = {
+    **dict(zip(CONFIG_FELDER, PARAMS)),
+    "st_plan_fam": SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0)),
+    "st_plan_sie": SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_SIE, np.zeros(MAX_JAHRE)),
+    "monatlich": False,
+    "Zinsbindung_Jahre": 15,
+    "aufteilung": "wasserfall",
+    "max_monatsrate": 0.0,
+}
+ALLE = [k.name for k in FINANZIERUNG_KNOTEN]
+
+
+def _neu(pipeline: Pipeline, cfg: dict) -> list:
+    lauf = pipeline.lauf(cfg)
+    for name in ALLE:
+        lauf[name]
+    return [name for name, berechnet in pipeline.protokoll.items() if berechnet]
+
+
+def test_nodes_match_the_engine():
+    lauf = Pipeline(FINANZIERUNG_KNOTEN).lauf(CFG)
+    szenario = calculate_financing_scenario(PARAMS, CFG["st_plan_fam"], CFG["st_plan_sie"])
+    assert np.array_equal(lauf["tilgung"].plan, szenario.plan)
+    assert lauf["zuteilung"]["darlehen"] == szenario["darlehen"]
+    assert lauf["monatsraten"]["monatsraten"] == pytest.approx(szenario["monatsraten"])
+    assert lauf["monatsraten"]["gesamt"] == pytest.approx(szenario["gesamtrate"])
+    assert lauf["kennzahlen"]["restschuld"] == get_restschuld_nach_jahren(szenario, 15)
+    assert lauf["aggregate"]["jahresuebersicht"][None].equals(szenario.jahresuebersicht())
+
+
+def test_rerun_recomputes_only_downstream_of_changes():
+    pipeline = Pipeline(FINANZIERUNG_KNOTEN)
+    assert _neu(pipeline, CFG) == ALLE
+    assert _neu(pipeline, dict(CFG)) == []
+    assert _neu(pipeline, {**CFG, "Zinsbindung_Jahre": 10}) == ["kennzahlen"]
+    # Zins: Zuteilung bleibt, Raten und alles hinter dem Tilgungsplan laufen neu
+    assert _neu(pipeline, {**CFG, "Zinsbindung_Jahre": 10, "Zins_Hausbank": 0.04}) == [
+        "reihenfolge", "monatsraten", "tilgung", "aggregate", "kennzahlen"]
+    # EK -> Zuschuss umgeschichtet: Zuteilung neu gerechnet, aber unverändert -> Raten wiederverwendet
+    umgeschichtet = {**CFG, "Eigenkapital_Fam": 140_000, "Zuschuesse_Fam": 20_000}
+    assert _neu(pipeline, {**umgeschichtet, "Zinsbindung_Jahre": 10, "Zins_Hausbank": 0.04}) == [
+        "reihenfolge", "zuteilung", "tilgung", "aggregate", "kennzahlen"]
+
+
+def test_plans_use_upstream_allocation_and_resume_from_previous_plans():
+    pipeline = Pipeline(FINANZIERUNG_KNOTEN)
+    lauf = pipeline.lauf(CFG)
+    assert lauf["tilgung"]["darlehen"] == lauf["zuteilung"]["darlehen"]
+    # Sondertilgung ab Jahr 6 geändert: Zuteilung und Raten bleiben, Tilgungsplan ab Jahr 6
+    werte = np.full(MAX_JAHRE, 5_000.0)
+    werte[5:] = 8_000.0
+    cfg = {**CFG, "st_plan_fam": SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, werte)}
+    assert _neu(pipeline, cfg) == ["reihenfolge", "tilgung", "aggregate", "kennzahlen"]
+    szenario = pipeline.lauf(cfg)["tilgung"]
+    assert szenario["_verlauf"]["start_jahr"] == 6
+    neu = calculate_financing_scenario(PARAMS, cfg["st_plan_fam"], CFG["st_plan_sie"])
+    assert np.allclose(szenario.plan, neu.plan)
+
+
+def test_nodes_evaluate_lazily_and_reject_unkeyable_inputs():
+    aufrufe = []
+    pipeline = Pipeline([
+        Knoten("a", lambda x: aufrufe.append("a") or x * 2, ("x",)),
+        Knoten("b", lambda a, y: aufrufe.append("b") or a + y, ("a", "y")),
+    ])
+    assert pipeline.lauf({"x": 1, "y": 1})["a"] == 2 and aufrufe == ["a"]
+    assert pipeline.lauf({"x": 1, "y": 1})["b"] == 3 and aufrufe == ["a", "b"]
+    with pytest.raises(TypeError):
+        pipeline.lauf({"x": object(), "y": 1})["a"]
+    with pytest.raises(ValueError):
+        Pipeline([Knoten("a", abs), Knoten("a", abs)])
@@ -0,0 +1,57 @@
+import json
+import sys
+import threading
+from pathlib import Path
+import numpy as np
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import profiling
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, MAX_JAHRE
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+ST_FAM = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0))
+
+
+def test_disabled_timing_is_a_shared_no_op():
+    assert profiling.starte(False) is None and profiling.aktuell() is None
+    assert profiling.span("a") is profiling.span("b")
+    with profiling.span("a"):
+        pass
+
+
+def test_engine_stages_are_recorded_per_rerun():
+    ohne = calculate_financing_scenario(PARAMS, ST_FAM, None)
+    messung = profiling.starte()
+    try:
+        mit = calculate_financing_scenario(PARAMS, ST_FAM, None)
+        mit["tilgungsplaene"]["fam_kfw297"]
+    finally:
+        profiling.starte(False)
+    assert np.array_equal(mit.plan, ohne.plan)
+
+    stufen = {s["name"]: s for s in messung.zusammenfassung()}
+    assert {"engine: zuteilung", "engine: annuitäten (geschlossen)", "engine: tilgungsplan",
+            "engine: sondertilgung", "dataframe: tilgungsplan"} <= set(stufen)
+    # Sondertilgung: ein summierter Eintrag je Lauf, Aufrufe = gerechnete Jahre, innerhalb des Tilgungsplans
+    assert stufen["engine: sondertilgung"]["aufrufe"] == mit.laufzeit.max()
+    assert stufen["engine: sondertilgung"]["tiefe"] == stufen["engine: tilgungsplan"]["tiefe"] + 1
+    assert stufen["engine: sondertilgung"]["sekunden"] <= stufen["engine: tilgungsplan"]["sekunden"]
+
+    export = json.loads(messung.als_json())
+    assert export["gesamt_sekunden"] > 0 and len(export["spans"]) == len(messung.spans)
+
+
+def test_measurements_are_isolated_per_thread():
+    messung = profiling.starte()
+    try:
+        andere = []
+        t = threading.Thread(target=lambda: andere.append(profiling.aktuell()))
+        t.start()
+        t.join()
+        assert andere == [None] and profiling.aktuell() is messung
+    finally:
+        profiling.starte(False)
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.batch import calculate_scenarios_batch
+from core.calculations import calculate_scenario, get_restschuld_nach_jahren
+from core.helpers import LOAN_KEYS, LOAN_KEYS_FAM, LOAN_KEYS_SIE
+from core.registry import Kreditregister, Partei, Produkt, standard_parteien, standard_register
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+
+
+def drei_parteien(kosten_c=400_000.0) -> Kreditregister:
+    return Kreditregister(
+        parteien=[
+            Partei("a", "A", 500_000, 100_000, 0, 0.02),
+            Partei("b", "B", 300_000, 50_000, 5_000, 0.03),
+            Partei("c", "C", kosten_c, 0, 0, 0.015),
+        ],
+        produkte=[
+            Produkt("foerder", "Förderung", 0.01, 100_000),
+            Produkt("tranche1", "Tranche 1", 0.03, 150_000),
+            Produkt("tranche2", "Tranche 2", 0.035, 50_000),
+            Produkt("bank", "Bank", 0.04),
+        ],
+    )
+
+
+def test_standard_register_matches_waterfall():
+    register = standard_register(PARAMS)
+    assert register.loan_keys == LOAN_KEYS
+    summen = dict(zip(register.loan_keys, register.aufteilung().tolist()))
+    assert summen == {
+        "fam_kfw297": 300_000, "fam_kfw124": 100_000, "fam_hausbank": 40_000,
+        "sie_kfw297": 300_000, "sie_kfw124": 100_000, "sie_hausbank": 39_000,
+    }
+    assert standard_parteien() == {"fam": LOAN_KEYS_FAM, "sie": LOAN_KEYS_SIE}
+
+
+def test_register_rejects_ambiguous_keys():
+    with pytest.raises(ValueError):
+        Kreditregister([Partei("a_b", "A", 1, 0, 0, 0.02)], [Produkt("x", "X", 0.03)])
+    with pytest.raises(ValueError):
+        Kreditregister([Partei("a", "A", 1, 0, 0, 0.02)], [Produkt("x", "X", 0.03), Produkt("x", "X", 0.04)])
+
+
+def test_n_parties_n_products_scalar_and_batch_agree():
+    register = drei_parteien()
+    st_a = SondertilgungPlan("Automatische Verteilung", register.loan_keys_der_partei("a"), np.full(50, 8_000.0))
+    st_c = SondertilgungPlan("Manuelle Eingabe", register.loan_keys_der_partei("c"), np.tile([0, 0, 2_000.0, 5_000.0], (50, 1)))
+    s = calculate_scenario(register, {"a": st_a, "c": st_c})
+    assert len(s.loan_keys) == 12
+    assert s["darlehen"]["c_bank"] == 100_000
+    assert s["darlehen"]["b_tranche2"] == 0
+    assert set(s["monatsraten_partei"]) == {"a", "b", "c"}
+    assert s["parteien"] == {"a": "A", "b": "B", "c": "C"}
+    assert abs(sum(s["zinskosten_partei"].values()) - s["gesamte_zinskosten"]) < 1e-6
+
+    # Batch über das gleiche Register, Kosten von Partei c als Szenario-Achse
+    kosten_c = np.array([0.0, 200_000.0, 400_000.0])
+    batch = calculate_scenarios_batch(drei_parteien(kosten_c), {"a": st_a, "c": st_c})
+    assert batch["darlehen"].shape == (3, 12)
+    for i, k in enumerate(kosten_c):
+        s_i = calculate_scenario(drei_parteien(k), {"a": st_a, "c": st_c})
+        assert abs(batch["gesamte_zinskosten"][i] - s_i["gesamte_zinskosten"]) < 0.005
+        assert abs(batch["zinskosten_partei"]["c"][i] - s_i["zinskosten_partei"]["c"]) < 0.005
+        for jahr in (1, 10, 30):
+            assert abs(batch["restschuld"][i, jahr - 1] - get_restschuld_nach_jahren(s_i, jahr)) < 0.005
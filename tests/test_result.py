@@ -0,0 +1,102 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.result import PLAN_FELDER, ScenarioResult
+
+PARAMS = [
+    300_000, 50_000, 0,
+    200_000, 20_000, 0,
+    0.02, 0.03, 0.05,
+    0.02, 0.02,
+    100_000, 30_000,
+]
+
+
+def scenario() -> ScenarioResult:
+    st_fam = ("Automatische Verteilung", pd.DataFrame({"Jahr": [1, 2], "Betrag": [10_000, 5_000]}))
+    st_sie = ("Automatische Verteilung", pd.DataFrame({"Jahr": [1], "Betrag": [0]}))
+    return calculate_financing_scenario(PARAMS, st_fam, st_sie)
+
+
+def test_result_keeps_dict_interface():
+    s = scenario()
+    assert isinstance(s, ScenarioResult)
+    for key in ("gesamtrate", "gesamte_zinskosten", "darlehen", "monatsraten_partei", "tilgungsplaene",
+                "sondertilgungen", "zinskosten_partei", "inputs"):
+        assert key in s
+    assert "error" not in s
+    assert s.get("missing", 0) == 0
+    assert s["sondertilgungen"]["fam_hausbank"][1] == 10_000
+    assert s["sondertilgungen"]["sie_hausbank"] == {}
+
+
+def test_plans_are_built_lazily_from_arrays():
+    s = scenario()
+    assert s.plan.shape == (6, 50, len(PLAN_FELDER))
+    plan = s["tilgungsplaene"]["fam_kfw297"]
+    assert list(plan.columns) == ["Jahr", *PLAN_FELDER]
+    assert list(plan["Jahr"]) == list(range(1, len(plan) + 1))
+    assert plan["Restschuld Start"].iloc[0] == s["darlehen"]["fam_kfw297"]
+    assert np.array_equal(plan["Restschuld Ende"].to_numpy(), s.plan[0, :len(plan), 4])
+
+    # Loans without amount have an empty plan, as before
+    s0 = calculate_financing_scenario(
+        [100_000, 0, 0, 0, 0, 0, 0.02, 0.03, 0.05, 0.02, 0.02, 100_000, 30_000],
+        ("Automatische Verteilung", pd.DataFrame()), ("Automatische Verteilung", pd.DataFrame()),
+    )
+    assert s0["tilgungsplaene"]["fam_hausbank"].empty
+    assert len(s0["tilgungsplaene"]) == 6
+
+
+def test_result_arrays_are_read_only():
+    s = scenario()
+    with pytest.raises(ValueError):
+        s.plan[0, 0, 0] = 1.0
+    # Materialized frames are independent copies
+    df = s["tilgungsplaene"]["fam_kfw297"]
+    df.loc[0, "Restschuld Ende"] = -1.0
+    assert s.plan[0, 0, 4] >= 0.0
+
+
+def test_restschuld_curves_support_batch_lookups():
+    s = scenario()
+    plans = s["tilgungsplaene"]
+    kurve = s.restschuld_kurve()
+    assert kurve.shape == (51,)
+    assert kurve[0] == sum(s["darlehen"].values())
+
+    for jahr in (1, 7, 20):
+        expected = sum(
+            float(df.loc[df["Jahr"] == jahr, "Restschuld Ende"].iloc[0])
+            for df in plans.values() if not df.empty and jahr in df["Jahr"].values
+        )
+        assert abs(s.restschuld(jahr) - expected) < 1e-6
+
+    jahre = np.arange(1, 41)
+    curve = s.restschuld(jahre)
+    assert curve.shape == (40,)
+    assert np.allclose(curve, s.restschuld(jahre, "fam") + s.restschuld(jahre, "sie"))
+    assert np.all(np.diff(curve) <= 0)
+    assert s.restschuld(99) == 0.0
+
+    laufzeit = len(plans["fam_hausbank"])
+    assert s.restschuld(laufzeit, "fam_hausbank") == plans["fam_hausbank"]["Restschuld Ende"].iloc[-1]
+    assert s.restschuld(laufzeit + 1, "fam_hausbank") == 0.0
+
+
+def test_party_and_total_rollups_match_groupby_over_plans():
+    s = scenario()
+    plans = s["tilgungsplaene"]
+    for partei in ("fam", "sie", None):
+        frames = [df for k, df in plans.items() if not df.empty and (partei is None or k.startswith(partei + "_"))]
+        expected = pd.concat(frames, ignore_index=True).groupby("Jahr").sum(numeric_only=True).reset_index()
+        got = s.jahresuebersicht(partei)
+        pd.testing.assert_frame_equal(got, expected, check_dtype=False)
+        assert np.allclose(s.jahressummen(partei)[:, -1], s.restschuld(np.arange(1, len(got) + 1), partei))
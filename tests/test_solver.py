@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.batch import calculate_financing_scenarios_batch
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO
+from core.solver import loese
+from core.sondertilgung import SondertilgungPlan
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+ST_FAM = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0), max_quote=0.05)
+
+
+def _mit(feld: int, wert: float) -> list:
+    params = list(PARAMS)
+    params[feld] = wert
+    return params
+
+
+def test_tilgung_for_target_restschuld_matches_scalar_engine():
+    r = loese(PARAMS, "Anf. Tilgung Familie", "restschuld_zinsbindung", 200_000, ST_FAM, None,
+              partei="fam", zinsbindung_jahre=15)
+    assert r["erfolgreich"] and r["iterationen"] <= 5
+    # Gefundener Wert erfüllt das Ziel, eine Toleranz darunter nicht mehr
+    assert calculate_financing_scenario(_mit(9, r["wert"]), ST_FAM, None).restschuld(15, "fam") == pytest.approx(r["erreicht"])
+    assert r["erreicht"] <= 200_000 < calculate_financing_scenario(_mit(9, r["wert"] - r["toleranz"]), ST_FAM, None).restschuld(15, "fam")
+
+
+def test_sondertilgung_and_max_kosten():
+    r = loese(PARAMS, "Sondertilgung p.a. Sie", "restschuld_zinsbindung", 150_000, ST_FAM, None,
+              partei="sie", zinsbindung_jahre=15)
+    plan = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_SIE, np.full(MAX_JAHRE, r["wert"]))
+    assert r["erfolgreich"] and abs(r["abweichung"]) < 1.0
+    assert calculate_financing_scenario(PARAMS, ST_FAM, plan).restschuld(15, "sie") == pytest.approx(r["erreicht"])
+
+    # Höchste Kosten bei einer Monatsrate von 2.000 €: Rate linear in den Kosten (Hausbank-Anteil)
+    r = loese(PARAMS, "Kosten Familie", "gesamtrate", 2_000, partei="fam")
+    szenario = calculate_financing_scenario(_mit(0, r["wert"]), None, None)
+    assert szenario["monatsraten_partei"]["fam"] == pytest.approx(2_000, abs=0.01)
+    assert r["toleranz"] == 0.01 and r["sekunden"] < 1
+
+
+def test_goal_seek_uses_the_allocation_order():
+    reihenfolge = {"fam": ("hausbank", "kfw124", "kfw297")}
+    r = loese(PARAMS, "Anf. Tilgung Familie", "gesamte_zinskosten", 400_000, ST_FAM, None, partei="fam",
+              reihenfolge=reihenfolge)
+    szenario = calculate_financing_scenario(_mit(9, r["wert"]), ST_FAM, None, reihenfolge=reihenfolge)
+    assert r["erfolgreich"] and szenario["zinskosten_partei"]["fam"] == pytest.approx(r["erreicht"])
+    assert r["wert"] != loese(PARAMS, "Anf. Tilgung Familie", "gesamte_zinskosten", 400_000, ST_FAM, None,
+                              partei="fam")["wert"]
+
+
+def test_unreachable_targets_and_bad_names():
+    r = loese(PARAMS, "Anf. Tilgung Sie", "gesamtrate", 1.0, partei="sie")
+    assert not r["erfolgreich"] and r["wert"] == 0.0 and "nicht erreichbar" in r["meldung"]
+    # Ohne Obergrenze: Suche verdoppelt bis GRENZE_MAXIMAL, Ergebnis bleibt die Untergrenze
+    r = loese(PARAMS, "Sondertilgung p.a. Familie", "gesamte_zinskosten", 1_000, partei="fam")
+    assert not r["erfolgreich"] and r["wert"] == 0.0 and r["erreicht"] > 1_000
+    assert "nicht erreichbar" in r["meldung"] and "gesucht: 0 …" in r["meldung"]
+    # Schon ohne Sondertilgung erfüllt: kleinster Wert, nicht die Suchgrenze
+    r = loese(PARAMS, "Sondertilgung p.a. Familie", "gesamte_zinskosten", 1e9, partei="fam")
+    assert not r["erfolgreich"] and r["wert"] == 0.0 and "erfüllt" in r["meldung"]
+    with pytest.raises(ValueError):
+        loese(PARAMS, "Zins", "gesamtrate", 1.0)
+    with pytest.raises(ValueError):
+        loese(PARAMS, "Anf. Tilgung Sie", "gesamtrate", 1.0, partei="nachbar")
+
+
+def test_batch_horizon_stops_after_given_years():
+    voll = calculate_financing_scenarios_batch(PARAMS, ST_FAM, None)
+    kurz = calculate_financing_scenarios_batch(PARAMS, ST_FAM, None, jahre=15)
+    assert np.array_equal(kurz["restschuld"][:, :15], voll["restschuld"][:, :15])
+    assert not kurz["restschuld"][:, 15:].any()
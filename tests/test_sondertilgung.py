@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE
+from core.sondertilgung import SondertilgungPlan
+
+
+def test_auto_table_compiles_to_dense_years():
+    df = pd.DataFrame({"Jahr": [3, 1, 3, 60, 2], "Betrag": [5_000, 1_000, 9_999, 7_000, np.nan]})
+    plan = SondertilgungPlan.from_dataframe("Automatische Verteilung", df, LOAN_KEYS_FAM)
+    assert plan.werte.shape == (50,)
+    assert plan.werte[0] == 1_000
+    assert plan.werte[1] == 0.0      # NaN -> 0
+    assert plan.werte[2] == 5_000    # first row of a year wins
+    assert plan.werte[3:].sum() == 0  # year 60 is outside the horizon
+    assert plan.beruehrte_kredite() == set(LOAN_KEYS_FAM)
+
+
+def test_manual_table_compiles_per_loan_and_ignores_missing_columns():
+    df = pd.DataFrame({"Jahr": [1, 2], "sie_kfw124": [0, 2_500], "sie_hausbank": [-5, 1_000]})
+    plan = SondertilgungPlan.from_dataframe("Manuelle Eingabe", df, LOAN_KEYS_SIE)
+    assert plan.werte.shape == (50, 3)
+    assert list(plan.werte[1]) == [0.0, 2_500, 1_000]
+    assert plan.werte[0, 2] == 0.0   # negative -> 0
+    assert plan.beruehrte_kredite() == {"sie_kfw124", "sie_hausbank"}
+
+
+def test_plan_is_immutable_and_validated():
+    plan = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM)
+    with pytest.raises(ValueError):
+        plan.werte[0] = 1.0
+    with pytest.raises(ValueError):
+        SondertilgungPlan.from_dataframe("Automatische Verteilung", pd.DataFrame({"Betrag": [1]}), LOAN_KEYS_FAM)
+    with pytest.raises(ValueError):
+        SondertilgungPlan("Manuelle Eingabe", LOAN_KEYS_FAM, np.zeros(50))
+
+
+def test_first_differing_year():
+    werte = np.full(50, 1_000.0)
+    a = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, werte)
+    werte[33] = 0.0
+    b = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, werte)
+    assert a.erstes_abweichendes_jahr(a) == 51
+    assert a.erstes_abweichendes_jahr(b) == 34
+    assert a.erstes_abweichendes_jahr(SondertilgungPlan("Manuelle Eingabe", LOAN_KEYS_FAM)) == 1
+    assert a.erstes_abweichendes_jahr(SondertilgungPlan(a.modus, a.loan_keys, a.werte, max_quote=0.05)) == 1
+
+
+def test_engine_accepts_compiled_plans_and_tables_alike():
+    params = [300_000, 50_000, 0, 200_000, 20_000, 0, 0.02, 0.03, 0.05, 0.02, 0.02, 100_000, 30_000]
+    auto = pd.DataFrame({"Jahr": range(1, 51), "Betrag": 4_000})
+    manual = pd.DataFrame({"Jahr": range(1, 51), "sie_kfw297": 0, "sie_kfw124": 1_000, "sie_hausbank": 0})
+    st_fam = ("Automatische Verteilung", auto)
+    st_sie = ("Manuelle Eingabe", manual)
+
+    via_tables = calculate_financing_scenario(params, st_fam, st_sie)
+    via_plans = calculate_financing_scenario(
+        params,
+        SondertilgungPlan.from_dataframe(*st_fam, LOAN_KEYS_FAM),
+        SondertilgungPlan.from_dataframe(*st_sie, LOAN_KEYS_SIE),
+    )
+    assert via_plans["gesamte_zinskosten"] == via_tables["gesamte_zinskosten"]
+    assert via_plans["sondertilgungen"] == via_tables["sondertilgungen"]
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from core.sondertilgung import SondertilgungPlan
+from core import store
+from core.store import SzenarioAblage, inhalt_hash
+from core.vergleich import GespeichertesSzenario
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+ST_AUTO = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0), max_quote=0.05)
+ST_MANUELL = SondertilgungPlan(ST_MODUS_MANUELL, LOAN_KEYS_SIE, np.full((MAX_JAHRE, 3), 2_000.0))
+SZENARIO = GespeichertesSzenario(PARAMS, ST_AUTO, ST_MANUELL, monatlich=True, reihenfolge={"sie": ("kfw124", "kfw297", "hausbank")})
+
+
+def test_roundtrip_reads_arrays_instead_of_recomputing(tmp_path):
+    ablage = SzenarioAblage(tmp_path)
+    hash_ = ablage.speichere("Variante", SZENARIO)
+    assert hash_ == inhalt_hash(SZENARIO) != inhalt_hash(SZENARIO, "0.0") and "Variante" in ablage
+
+    # Neue Instanz (z. B. neuer Prozess): gleiche Eingaben, gleicher Inhalt
+    ablage = SzenarioAblage(tmp_path)
+    geladen = ablage.lade("Variante")
+    assert inhalt_hash(geladen) == hash_ and geladen.st_sie == ST_MANUELL and geladen.reihenfolge == SZENARIO.reihenfolge
+    ergebnis = ablage.ergebnis("Variante")
+    assert isinstance(ergebnis.plan, np.memmap) and not ergebnis.plan.flags.writeable
+    neu = calculate_financing_scenario(PARAMS, ST_AUTO, ST_MANUELL, monatlich=True, reihenfolge=SZENARIO.reihenfolge)
+    assert np.array_equal(ergebnis.plan, neu.plan) and ergebnis["gesamte_zinskosten"] == neu["gesamte_zinskosten"]
+    assert ergebnis.restschuld(15, "sie") == neu.restschuld(15, "sie")
+    assert ergebnis["tilgungsplaene"]["sie_kfw124"].equals(neu["tilgungsplaene"]["sie_kfw124"])
+    with pytest.raises(KeyError):
+        ablage.lade("fehlt")
+
+
+def test_dedup_listing_and_garbage_collection(tmp_path):
+    ablage = SzenarioAblage(tmp_path)
+    ohne = GespeichertesSzenario([0.0] * 6 + PARAMS[6:])  # keine Finanzierung: nur Eingaben + Meldung
+    ablage.speichere("a", SZENARIO)
+    ablage.speichere("b", GespeichertesSzenario(PARAMS, ST_AUTO, ST_MANUELL, True, {"sie": ("kfw124", "kfw297", "hausbank")}))
+    ablage.speichere("c", ohne)
+    assert "error" in ablage.ergebnis("c")
+    assert ablage.statistik()["inhalte"] == 2 and [z["geteilt"] for z in ablage.liste() if z["name"] in "ab"] == [2, 2]
+    assert {z["name"] for z in ablage.liste()} == {"a", "b", "c"}
+
+    # Inhalte bleiben, solange ein Name sie nutzt
+    assert ablage.entferne("a") and not ablage.entferne("a")
+    assert ablage.aufraeumen()["inhalte"] == 0 and ablage.lade("b").fingerprint() == SZENARIO.fingerprint()
+    ablage.entferne("b")
+    (tmp_path / "arrays" / "verwaist").mkdir()
+    assert ablage.aufraeumen()["inhalte"] == 1
+    assert sorted(p.name for p in (tmp_path / "arrays").iterdir()) == [inhalt_hash(ohne)]
+    assert ablage.statistik() == {"namen": 1, "inhalte": 1, "bytes": ablage.liste()[0]["nbytes"]}
+
+
+def test_contents_of_other_versions_are_ignored_and_cleaned_up(tmp_path, monkeypatch):
+    import sqlite3
+
+    # Index aus der Zeit vor der Versionierung: Spalte wird ergänzt, alte Inhalte gelten als fremd
+    (tmp_path / "arrays").mkdir()
+    with sqlite3.connect(tmp_path / "index.sqlite") as db:
+        db.executescript(
+            "CREATE TABLE inhalte (hash TEXT PRIMARY KEY, eingaben TEXT NOT NULL, kennzahlen TEXT NOT NULL, "
+            "nbytes INTEGER NOT NULL, erstellt REAL NOT NULL);"
+            "CREATE TABLE namen (name TEXT PRIMARY KEY, hash TEXT NOT NULL, gespeichert REAL NOT NULL);"
+            "INSERT INTO inhalte VALUES ('uralt', '{}', '{}', 10, 0); INSERT INTO namen VALUES ('uralt', 'uralt', 0);"
+        )
+    (tmp_path / "arrays" / "uralt").mkdir()
+    monkeypatch.setattr(store, "VERSION", "0.0")
+    alt = SzenarioAblage(tmp_path)
+    alt.speichere("alt", SZENARIO)
+    assert "alt" in alt and "uralt" not in alt
+    monkeypatch.undo()
+
+    ablage = SzenarioAblage(tmp_path)
+    assert "alt" not in ablage and ablage.liste() == [] and ablage.statistik()["inhalte"] == 0
+    with pytest.raises(KeyError):
+        ablage.lade("alt")
+    ablage.speichere("neu", SZENARIO)
+    assert ablage.aufraeumen()["inhalte"] == 2
+    assert [z["name"] for z in ablage.liste()] == ["neu"]
+    assert sorted(p.name for p in (tmp_path / "arrays").iterdir()) == [inhalt_hash(SZENARIO)]
@@ -0,0 +1,63 @@
+import sys
+import time
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario, get_restschuld_nach_jahren
+from core.helpers import LOAN_KEYS_FAM
+from core.sondertilgung import SondertilgungPlan
+from core.sweep import achsen_werte, parameter_sweep, sweep_grid, sweep_matrix
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+
+
+def test_axes_cover_slider_ranges():
+    assert len(achsen_werte("Zins (alle Darlehen)")) == 50
+    assert len(achsen_werte("Anf. Tilgung (beide)")) == 46
+    assert achsen_werte("Zins Hausbank")[-1] == pytest.approx(0.06)
+    with pytest.raises(ValueError):
+        sweep_grid(PARAMS, "Zins (alle Darlehen)", [0.01], "Zins Hausbank", [0.02])
+
+
+def test_sweep_points_match_scalar_engine():
+    st_fam = SondertilgungPlan("Automatische Verteilung", LOAN_KEYS_FAM, np.full(50, 5_000.0))
+    df = parameter_sweep(PARAMS, "Zins (alle Darlehen)", "Anf. Tilgung Sie", [0.01, 0.03], [0.01, 0.02, 0.04],
+                         st_fam=st_fam, zinsbindung_jahre=15)
+    assert len(df) == 6
+    for row in df.itertuples(index=False):
+        zins, tilgung_sie = row[0], row[1]
+        params = list(PARAMS)
+        params[6:9] = [zins] * 3
+        params[10] = tilgung_sie
+        s = calculate_financing_scenario(params, st_fam, ("Automatische Verteilung", None))
+        assert abs(row.gesamte_zinskosten - s["gesamte_zinskosten"]) < 0.005
+        assert abs(row.restschuld_zinsbindung - get_restschuld_nach_jahren(s, 15)) < 0.005
+        assert abs(row.gesamtrate - s["gesamtrate"]) < 0.005
+
+    matrix = sweep_matrix(df, "Zins (alle Darlehen)", "Anf. Tilgung Sie", "gesamte_zinskosten")
+    assert matrix.shape == (3, 2)
+    assert (matrix[0.03] > matrix[0.01]).all()  # höherer Zins -> höhere Zinskosten
+
+
+def test_sweep_keeps_the_allocation_order():
+    reihenfolge = {"fam": ("hausbank", "kfw124", "kfw297")}
+    df = parameter_sweep(PARAMS, "Zins Hausbank", "Anf. Tilgung Familie", [0.03, 0.05], [0.02], reihenfolge=reihenfolge)
+    for row in df.itertuples(index=False):
+        params = list(PARAMS)
+        params[8], params[9] = row[0], row[1]
+        s = calculate_financing_scenario(params, None, None, reihenfolge=reihenfolge)
+        assert abs(row.gesamte_zinskosten - s["gesamte_zinskosten"]) < 0.005
+    wasserfall = parameter_sweep(PARAMS, "Zins Hausbank", "Anf. Tilgung Familie", [0.03, 0.05], [0.02])
+    assert not np.allclose(df["gesamte_zinskosten"], wasserfall["gesamte_zinskosten"])
+
+
+def test_full_grid_is_fast():
+    start = time.perf_counter()
+    df = parameter_sweep(PARAMS, "Zins (alle Darlehen)", "Anf. Tilgung (beide)", zinsbindung_jahre=15)
+    dauer = time.perf_counter() - start
+    assert len(df) == 50 * 46
+    assert dauer < 1.0
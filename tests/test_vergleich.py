@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# Ensure repository root is on sys.path for package imports
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.calculations import calculate_financing_scenario, get_restschuld_nach_jahren, sum_sondertilgung_for_year
+from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE, MAX_JAHRE, ST_MODUS_AUTO, ST_MODUS_MANUELL
+from core.memory import SzenarioSpeicher, messe_bytes
+from core.sondertilgung import SondertilgungPlan
+from core.vergleich import VERGLEICH_KENNZAHLEN, GespeichertesSzenario, mit_differenzen, vergleichskennzahlen
+
+PARAMS = [600_000, 150_000, 10_000, 600_000, 150_000, 11_000, 0.028, 0.035, 0.038, 0.02, 0.02, 150_000, 100_000]
+INVERTIERT = PARAMS[:8] + [0.03] + PARAMS[9:]
+ST_AUTO = SondertilgungPlan(ST_MODUS_AUTO, LOAN_KEYS_FAM, np.full(MAX_JAHRE, 5_000.0), max_quote=0.05)
+ST_MANUELL = SondertilgungPlan(ST_MODUS_MANUELL, LOAN_KEYS_SIE, np.full((MAX_JAHRE, 3), 2_000.0))
+
+SZENARIEN = {
+    "basis": GespeichertesSzenario(PARAMS),
+    "auto": GespeichertesSzenario(PARAMS, ST_AUTO),
+    "gemischt": GespeichertesSzenario(INVERTIERT, ST_AUTO, ST_MANUELL, monatlich=True,
+                                      reihenfolge={"fam": ("kfw297", "hausbank", "kfw124")}),
+    "ohne_kredit": GespeichertesSzenario([0.0] * 6 + PARAMS[6:]),
+}
+
+
+def test_batched_kennzahlen_match_scalar_engine():
+    df = vergleichskennzahlen(SZENARIEN, zinsbindung_jahre=15)
+    assert list(df["Szenario"]) == list(SZENARIEN) and set(VERGLEICH_KENNZAHLEN) <= set(df.columns)
+    for zeile, s in zip(df.itertuples(), SZENARIEN.values()):
+        szenario = calculate_financing_scenario(list(s.params), s.st_fam, s.st_sie, monatlich=s.monatlich,
+                                                reihenfolge=s.reihenfolge)
+        if "error" in szenario:
+            assert zeile.keine_finanzierung and zeile.gesamtrate == 0
+            continue
+        assert zeile.gesamtrate == pytest.approx(szenario["gesamtrate"])
+        assert zeile.restschuld_zinsbindung == pytest.approx(get_restschuld_nach_jahren(szenario, 15))
+        assert zeile.gesamte_zinskosten == pytest.approx(szenario["gesamte_zinskosten"])
+        assert zeile.sondertilgung_j1 == pytest.approx(sum_sondertilgung_for_year(szenario["sondertilgungen"], 1))
+        assert zeile.sondertilgung_gesamt == pytest.approx(float(szenario.sondertilgung.sum()))
+
+
+def test_deltas_against_baseline():
+    df = mit_differenzen(vergleichskennzahlen(SZENARIEN, 15), "auto")
+    zeilen = df.set_index("Szenario")
+    assert (zeilen.loc["auto", [f"Δ {k}" for k in VERGLEICH_KENNZAHLEN]] == 0).all()
+    delta = zeilen.at["basis", "Δ gesamte_zinskosten"]
+    assert delta == pytest.approx(zeilen.at["basis", "gesamte_zinskosten"] - zeilen.at["auto", "gesamte_zinskosten"])
+    assert delta > 0  # ohne Sondertilgung mehr Zinsen
+    with pytest.raises(KeyError):
+        mit_differenzen(df, "fehlt")
+
+
+def test_compact_form_and_lazy_plans():
+    s = SZENARIEN["gemischt"]
+    szenario = s.szenario()
+    assert s.szenario() is szenario  # aus dem Ergebnis-Cache
+    # Eingaben statt Ergebnis: ein Bruchteil des Speichers
+    assert s.nbytes < 4 * 1024 and messe_bytes(s) < messe_bytes(szenario) / 4
+    assert s.fingerprint() != GespeichertesSzenario(INVERTIERT, ST_AUTO, ST_MANUELL, monatlich=True).fingerprint()
+    with pytest.raises(ValueError):
+        GespeichertesSzenario(PARAMS[:12])
+
+    speicher = SzenarioSpeicher()
+    speicher.speichere("a", s)
+    assert speicher.entferne("a") and not speicher.entferne("a") and speicher.nbytes == 0
@@ -1,199 +1,504 @@
 import streamlit as st
-from charts.pies import make_pie, make_cost_coverage_pie
-from charts.areas import make_stacked_area
-from core.calculations import get_restschuld_nach_jahren, sum_sondertilgung_for_year
-from core.helpers import GROUPS, LOAN_KEYS_FAM, LOAN_KEYS_SIE, loans_by_prefix, safe_concat_plans
+from core.batch import PARAM_FIELDS
+from core.cache import DEFAULT_CACHE, scenario_fingerprint
+from core.helpers import GROUPS, MAX_JAHRE, PRODUCT_LABELS
+from core.memory import BUDGET_STANDARD, Groessen, SzenarioSpeicher, speicherbericht
+from core.montecarlo import ZinsModell, simulate_anschlussfinanzierung
+from core.pipeline import FINANZIERUNG_KNOTEN, Knoten, Pipeline
+from core.profiling import span
+from core.sweep import SWEEP_ACHSEN, SWEEP_KENNZAHLEN, parameter_sweep, sweep_matrix
+from core.vergleich import VERGLEICH_KENNZAHLEN, GespeichertesSzenario, mit_differenzen, vergleichskennzahlen
 import pandas as pd
+import time
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from core.store import SzenarioAblage
 
-def render_comparison_tab(szenario_b: dict, zinsbindung_jahre: int, precomputed_restschuld: float | None = None, precomputed_sonder_j1: float | None = None):
+AKTUELL = "Aktuell"  # Name der Live-Konfiguration im Szenario-Vergleich
+
+# Session-Einträge für den Speicherbericht: Kategorie -> Schlüssel in st.session_state
+SESSION_EINTRAEGE = {
+    "Sidebar-Tabellen": (
+        "sondertilgung_df_fam", "manual_sondertilgung_df_fam", "sondertilgung_df_sie", "manual_sondertilgung_df_sie",
+        "st_plan_fam", "st_plan_sie",
+    ),
+    "Diagrammdaten": ("sweep_ergebnis", "mc_ergebnis", "vergleich_ergebnis"),
+}
+
+
+def _szenario_speicher() -> SzenarioSpeicher:
+    if "szenario_speicher" not in st.session_state:
+        st.session_state.szenario_speicher = SzenarioSpeicher()
+    return st.session_state.szenario_speicher
+
+
+def _session_gruppen() -> dict:
+    """Session state entries (besides saved scenarios) grouped for the memory report."""
+    gruppen = {
+        kategorie: {k: st.session_state[k] for k in schluessel if k in st.session_state}
+        for kategorie, schluessel in SESSION_EINTRAEGE.items()
+    }
+    if "pipeline" in st.session_state:
+        gruppen["Pipeline-Knoten"] = st.session_state.pipeline.werte()
+    return gruppen
+
+
+def _session_bericht(gruppen: dict) -> list:
+    """Memory report of this session; sizes are cached per object, results of the shared cache are not charged."""
+    if "speicher_groessen" not in st.session_state:
+        st.session_state.speicher_groessen = Groessen()
+    return speicherbericht(gruppen, st.session_state.speicher_groessen, DEFAULT_CACHE.objekt_ids())
+
+
+def _weitere_bytes() -> int:
+    return sum(z["bytes"] for z in _session_bericht(_session_gruppen()))
+
+
+def speichere_szenario(szenario: GespeichertesSzenario, name: str = "") -> None:
+    """Save the scenario inputs for comparison; the oldest saved ones go when the session budget is exceeded."""
+    speicher = _szenario_speicher()
+    name = name.strip() or f"Szenario ({time.strftime('%H:%M:%S')})"
+    if name == AKTUELL:
+        name = f"{name} ({time.strftime('%H:%M:%S')})"
+    entfernt = speicher.speichere(name, szenario, _weitere_bytes())
+    st.session_state.vergleich_basis = name
+    ablage = _ablage() if st.session_state.get("ablage_dauerhaft") else None
+    if ablage is not None:
+        with span("ablage: speichern"):
+            ablage.speichere(name, szenario)
+    st.success(f"{name} gespeichert{' (auch auf Festplatte)' if ablage is not None else ''}!")
+    if entfernt:
+        st.warning(f"Speicherbudget der Session erreicht – entfernt: {', '.join(entfernt)}")
+
+
+def _figur(name: str, fabrik, *args, **kwargs):
+    with span(f"chart: {name}"):
+        return fabrik(*args, **kwargs)
+
+
+def _zeige(name: str, fig) -> None:
+    with span(f"st.plotly_chart: {name}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def _zeichne(name: str, fabrik, *args, **kwargs) -> None:
+    """Build a plotly figure and hand it to Streamlit, timing both stages separately."""
+    _zeige(name, _figur(name, fabrik, *args, **kwargs))
+
+
+def _deckungs_figuren(zuteilung: dict, ek_fam, zus_fam, ek_sie, zus_sie) -> dict:
+    """Coverage pie (EK + Zuschüsse + loans) per party, None where nothing is covered."""
+    from charts.pies import make_cost_coverage_pie
+
+    eigen = {"fam": (ek_fam, zus_fam), "sie": (ek_sie, zus_sie)}
+    figuren = {}
+    for partei, label in GROUPS.items():
+        segments = dict(zip(("Eigenkapital", "Zuschüsse"), eigen[partei]))
+        segments.update({produkt_label: zuteilung["darlehen"][f"{partei}_{produkt}"] for produkt, produkt_label in PRODUCT_LABELS.items()})
+        titel = f"Kosten & Deckung – {label}"
+        figuren[partei] = _figur(titel, make_cost_coverage_pie, segments, titel, cluster_mode="adjacent") if sum(segments.values()) > 0 else None
+    return figuren
+
+
+def _verlaufs_figuren(aggregate: dict | None) -> dict:
+    """Stacked-area charts {(spalte, partei) -> figure} of Restschuld and Tilgung p.a., None without loans."""
+    if aggregate is None:
+        return {}
+    from charts.areas import make_stacked_area
+
+    figuren = {}
+    for partei, serien in aggregate["serien"].items():
+        label = GROUPS.get(partei, partei)
+        for spalte, titel, achse in (
+            ("Restschuld Ende", f"Restschuld (Stacked) – {label}", "Restschuld in €"),
+            ("Tilgung p.a.", f"Tilgung p.a. (Stacked) – {label}", "Tilgung p.a. in €"),
+        ):
+            figuren[spalte, partei] = _figur(titel, make_stacked_area, serien, titel, spalte, achse, labels=PRODUCT_LABELS) if serien else None
+    return figuren
+
+
+# Rechenstufen plus Diagramme; ein Rerun rechnet nur Knoten neu, deren Eingaben sich geändert haben
+APP_KNOTEN = FINANZIERUNG_KNOTEN + (
+    Knoten("figuren: deckung", _deckungs_figuren,
+           ("zuteilung", "Eigenkapital_Fam", "Zuschuesse_Fam", "Eigenkapital_Sie", "Zuschuesse_Sie")),
+    Knoten("figuren: verläufe", _verlaufs_figuren, ("aggregate",)),
+)
+
+
+def app_pipeline() -> Pipeline:
+    """Memoized computation stages of this session."""
+    if "pipeline" not in st.session_state:
+        st.session_state.pipeline = Pipeline(APP_KNOTEN)
+    return st.session_state.pipeline
+
+
+def _ablage() -> "SzenarioAblage | None":
+    """On-disk scenario store (None if the folder cannot be created, e.g. read-only home, or without sqlite3)."""
+    try:
+        from core.store import SzenarioAblage  # erst bei Bedarf: sqlite3 fehlt z. B. unter Pyodide
+
+        return SzenarioAblage()
+    except (ImportError, OSError) as e:
+        st.warning(f"Szenario-Ablage nicht verfügbar: {e}")
+        return None
+
+
+def _lade_aus_ablage(name: str) -> None:
+    """Button callback: put a stored scenario into the comparison; its result seeds the result cache."""
+    ablage = _ablage()
+    if ablage is None:
+        return
+    with span("ablage: laden"):
+        szenario = ablage.lade(name)
+        DEFAULT_CACHE.put(szenario.fingerprint(), ablage.ergebnis(name), szenario.params)
+    _szenario_speicher().speichere(name, szenario, _weitere_bytes())
+
+
+def _render_ablage() -> None:
+    """Scenarios saved on disk: list, load into the comparison, delete, clean up."""
+    with st.expander("💾 Gespeicherte Szenarien (Festplatte)"):
+        ablage = _ablage()
+        if ablage is None:
+            return
+        zeilen = ablage.liste()
+        statistik = ablage.statistik()
+        st.caption(
+            f"{ablage.pfad} · {statistik['namen']} Namen, {statistik['inhalte']} Inhalte, "
+            f"{statistik['bytes'] / 1024:,.1f} KiB (gleiche Eingaben werden nur einmal gespeichert)."
+        )
+        if zeilen:
+            df = pd.DataFrame(zeilen)
+            df["gespeichert"] = pd.to_datetime(df["gespeichert"], unit="s")
+            df["KiB"] = df.pop("nbytes") / 1024
+            df["hash"] = df["hash"].str[:12]
+            st.dataframe(df.style.format({"KiB": "{:,.1f}"}), use_container_width=True, hide_index=True)
+            name = st.selectbox("Szenario", [z["name"] for z in zeilen], key="ablage_auswahl")
+            c1, c2 = st.columns(2)
+            c1.button("In Vergleich laden", use_container_width=True, on_click=_lade_aus_ablage, args=(name,))
+            if c2.button("Löschen", use_container_width=True, key="ablage_loeschen"):
+                ablage.entferne(name)
+                st.rerun()
+        if st.button("Aufräumen (nicht mehr benutzte Inhalte löschen)", use_container_width=True, key="ablage_aufraeumen"):
+            ergebnis = ablage.aufraeumen()
+            st.success(f"{ergebnis['inhalte']} Inhalte entfernt ({ergebnis['bytes'] / 1024:,.1f} KiB).")
+
+
+def _entferne_szenario(name: str) -> None:
+    _szenario_speicher().entferne(name)
+    st.session_state.vergleich_entfernen = None
+
+
+def render_comparison_tab(aktuell: GespeichertesSzenario, zinsbindung_jahre: int):
+    """Kennzahlen of all saved scenarios and the current one (one batched pass), deltas against a chosen baseline."""
     st.header("Vergleich der wichtigsten Kennzahlen")
 
-    if "scenario_a" in st.session_state and st.session_state.scenario_a:
-        szenario_a = st.session_state.scenario_a
-        restschuld_a = get_restschuld_nach_jahren(szenario_a, zinsbindung_jahre)
-        sonder_j1_a = sum_sondertilgung_for_year(szenario_a["sondertilgungen"], 1)
-
-        restschuld_b = precomputed_restschuld if precomputed_restschuld is not None else get_restschuld_nach_jahren(szenario_b, zinsbindung_jahre)
-        sonder_j1_b = precomputed_sonder_j1 if precomputed_sonder_j1 is not None else sum_sondertilgung_for_year(szenario_b["sondertilgungen"], 1)
-
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("Szenario A (Gespeichert)")
-            if "error" in szenario_a:
-                st.error(szenario_a["error"])
-            else:
-                st.metric("Gesamte Monatsrate", f"€ {szenario_a['gesamtrate']:,.2f}")
-                st.metric(f"Restschuld nach {zinsbindung_jahre} J.", f"€ {restschuld_a:,.2f}")
-                st.metric("Gesamte Zinskosten", f"€ {szenario_a['gesamte_zinskosten']:,.2f}")
-                st.metric("Sondertilgung (J1)", f"€ {sonder_j1_a:,.2f}")
-        with col2:
-            st.subheader("Szenario B (Aktuell)")
-            st.metric("Gesamte Monatsrate", f"€ {szenario_b['gesamtrate']:,.2f}",
-                      delta=f"€ {szenario_b['gesamtrate'] - szenario_a.get('gesamtrate', 0):,.2f}")
-            st.metric(f"Restschuld nach {zinsbindung_jahre} J.", f"€ {restschuld_b:,.2f}",
-                      delta=f"€ {restschuld_b - restschuld_a:,.2f}")
-            st.metric("Gesamte Zinskosten", f"€ {szenario_b['gesamte_zinskosten']:,.2f}",
-                      delta=f"€ {szenario_b['gesamte_zinskosten'] - szenario_a.get('gesamte_zinskosten', 0):,.2f}")
-            st.metric("Sondertilgung (J1)", f"€ {sonder_j1_b:,.2f}",
-                      delta=f"€ {sonder_j1_b - sonder_j1_a:,.2f}")
-    else:
-        st.info("Speichern Sie eine Konfiguration als 'Szenario A', um den Vergleich zu aktivieren.")
-
-
-def render_analysis_tab(szenario_b: dict, zinsbindung_jahre: int):
+    speicher = _szenario_speicher()
+    _render_ablage()
+    if not len(speicher):
+        st.info("Speichern Sie eine Konfiguration, um den Vergleich zu aktivieren.")
+        return
+    szenarien = {AKTUELL: aktuell, **{name: speicher.get(name) for name in speicher.namen()[::-1]}}  # neueste zuerst
+    namen = list(szenarien)
+
+    # Kennzahlen nur neu rechnen, wenn sich ein Szenario oder die Zinsbindung geändert hat
+    schluessel = (tuple((name, s.fingerprint()) for name, s in szenarien.items()), zinsbindung_jahre)
+    gespeichert = st.session_state.get("vergleich_ergebnis")
+    if gespeichert is None or gespeichert[0] != schluessel:
+        st.session_state.vergleich_ergebnis = gespeichert = (schluessel, vergleichskennzahlen(szenarien, zinsbindung_jahre))
+    kennzahlen = gespeichert[1]
+
+    c1, c2 = st.columns([3, 1])
+    if st.session_state.get("vergleich_basis") not in namen:
+        st.session_state.vergleich_basis = namen[1]
+    basis = c1.selectbox("Basis (Differenzen gegenüber)", namen, key="vergleich_basis")
+    entfernen = c2.selectbox("Entfernen", [None, *namen[1:]], key="vergleich_entfernen",
+                             format_func=lambda n: "–" if n is None else n)
+    if entfernen is not None:
+        c2.button("Szenario entfernen", use_container_width=True, on_click=_entferne_szenario, args=(entfernen,))
+
+    df = mit_differenzen(kennzahlen, basis)
+    b = df.set_index("Szenario")
+    labels = dict(VERGLEICH_KENNZAHLEN, restschuld_zinsbindung=f"Restschuld nach {zinsbindung_jahre} J.")
+    for col, k in zip(st.columns(4), ("gesamtrate", "restschuld_zinsbindung", "gesamte_zinskosten", "sondertilgung_j1")):
+        col.metric(f"{labels[k]} (Aktuell)", f"€ {b.at[AKTUELL, k]:,.2f}",
+                   delta=None if basis == AKTUELL else f"€ {b.at[AKTUELL, f'Δ {k}']:,.2f}", delta_color="inverse")
+
+    spalten = [c for k in VERGLEICH_KENNZAHLEN for c in (k, f"Δ {k}")]
+    tabelle = df.set_index("Szenario")[spalten].rename(
+        columns={**labels, **{f"Δ {k}": f"Δ {v}" for k, v in labels.items()}}
+    )
+    with span("st.dataframe: Szenario-Vergleich"):
+        st.dataframe(tabelle.style.format("€ {:,.2f}"), use_container_width=True)
+    st.caption(f"{len(df)} Szenarien; Spaltenköpfe anklicken zum Sortieren. Δ = Wert minus Basis „{basis}“.")
+    if kennzahlen["keine_finanzierung"].any():
+        st.caption("Ohne Finanzierungsbedarf: " + ", ".join(kennzahlen.loc[kennzahlen["keine_finanzierung"], "Szenario"]))
+
+    # Tilgungspläne nur für ausgewählte Szenarien berechnen
+    auswahl = st.multiselect("Tilgungsplan anzeigen für", namen, key="vergleich_plaene")
+    for name in auswahl:
+        with st.expander(f"Tilgungsplan – {name}", expanded=True):
+            szenario = szenarien[name].szenario()
+            if "error" in szenario:
+                st.info(szenario["error"])
+                continue
+            agg = szenario.jahresuebersicht()
+            with span(f"st.dataframe: Tilgungsplan {name}"):
+                st.dataframe(agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, agg.columns[1:]]), use_container_width=True)
+
+
+def render_analysis_tab(lauf, zinsbindung_jahre: int):
+    """Detail tab of the current scenario; values and figures come from the session's pipeline run."""
     st.header("Analyse des aktuellen Szenarios (B)")
+    szenario_b = lauf["tilgung"]
+    zuteilung = lauf["zuteilung"]
+    raten = lauf["monatsraten"]
 
     st.metric("Gesamtkosten Bauvorhaben (berechnet)", f"€ {szenario_b['gesamtkosten']:,.2f}")
 
     # Top metrics
     m_col1, m_col2, m_col3, m_col4 = st.columns(4)
     m_col1.metric("Finanzierungsbedarf (gesamt)", f"€ {szenario_b['finanzierungsbedarf']:,.2f}")
-    m_col2.metric("Gesamte Monatsrate", f"€ {szenario_b['gesamtrate']:,.2f}")
-    m_col3.metric(f"Restschuld n. {zinsbindung_jahre} J.", f"€ {get_restschuld_nach_jahren(szenario_b, zinsbindung_jahre):,.2f}")
+    m_col2.metric("Gesamte Monatsrate", f"€ {raten['gesamt']:,.2f}")
+    m_col3.metric(f"Restschuld n. {zinsbindung_jahre} J.", f"€ {lauf['kennzahlen']['restschuld']:,.2f}")
     m_col4.metric("Gesamte Zinskosten", f"€ {szenario_b['gesamte_zinskosten']:,.2f}")
 
+    # Parteien laut Kreditregister des Ergebnisses
+    parteien = szenario_b.get("parteien", GROUPS)
+
     # Per-party monthly rates
-    r_col1, r_col2 = st.columns(2)
-    r_col1.metric(f"Monatsrate – {GROUPS['fam']}", f"€ {szenario_b['monatsraten_partei']['fam']:,.2f}")
-    r_col2.metric(f"Monatsrate – {GROUPS['sie']}", f"€ {szenario_b['monatsraten_partei']['sie']:,.2f}")
+    for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+        col.metric(f"Monatsrate – {label}", f"€ {raten['partei'][partei]:,.2f}")
 
     # NEW: per-party total interest costs
-    z_col1, z_col2 = st.columns(2)
-    z_col1.metric(f"Gesamte Zinskosten – {GROUPS['fam']}", f"€ {szenario_b['zinskosten_partei']['fam']:,.2f}")
-    z_col2.metric(f"Gesamte Zinskosten – {GROUPS['sie']}", f"€ {szenario_b['zinskosten_partei']['sie']:,.2f}")
-
+    for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+        col.metric(f"Gesamte Zinskosten – {label}", f"€ {szenario_b['zinskosten_partei'][partei]:,.2f}")
 
     # Per-party Finanzierungsbedarf
-    k1, k2 = st.columns(2)
-    with k1:
-        st.caption(GROUPS["fam"])
-        st.metric("Finanzierungsbedarf (Familie)", f"€ {szenario_b['finanzierungsbedarf_fam']:,.2f}")
-    with k2:
-        st.caption(GROUPS["sie"])
-        st.metric("Finanzierungsbedarf (Sie)", f"€ {szenario_b['finanzierungsbedarf_sie']:,.2f}")
+    for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+        with col:
+            st.caption(label)
+            st.metric(f"Finanzierungsbedarf ({label})", f"€ {zuteilung['bedarf'][partei]:,.2f}")
+
+    reihenfolge = lauf["reihenfolge"]
+    if reihenfolge:
+        st.caption("Optimierte Kreditaufteilung: " + " · ".join(
+            f"{parteien[p]}: {' → '.join(PRODUCT_LABELS.get(k, k) for k in keys)}" for p, keys in reihenfolge.items()
+        ))
 
     st.markdown("---")
     sub_tab1, sub_tab2 = st.tabs(["Kreditaufteilung & Verläufe", "Detaillierter Tilgungsplan"])
 
     with sub_tab1:
-        # Pies in two horizontal columns
-        # Coverage pies (EK + Zuschüsse + loans) with explicit colors
-        p_col1, p_col2 = st.columns(2)
-        with p_col1:
-            fin = szenario_b["inputs"]["fam"]
-            loans = szenario_b["darlehen"]
-            segments_fam = {
-                "Eigenkapital": fin["ek"],
-                "Zuschüsse":    fin["zusch"],
-                "KfW 297":      loans["fam_kfw297"],
-                "KfW 124":      loans["fam_kfw124"],
-                "Hausbank":     loans["fam_hausbank"],
-            }
-            if sum(segments_fam.values()) > 0:
-                st.plotly_chart(make_cost_coverage_pie(segments_fam, f"Kosten & Deckung – {GROUPS['fam']}", cluster_mode="adjacent"), use_container_width=True)
-            else:
-                st.info(f"Keine Daten für '{GROUPS['fam']}'.")
-        with p_col2:
-            fin = szenario_b["inputs"]["sie"]
-            loans = szenario_b["darlehen"]
-            segments_sie = {
-                "Eigenkapital": fin["ek"],
-                "Zuschüsse":    fin["zusch"],
-                "KfW 297":      loans["sie_kfw297"],
-                "KfW 124":      loans["sie_kfw124"],
-                "Hausbank":     loans["sie_hausbank"],
-            }
-            if sum(segments_sie.values()) > 0:
-                st.plotly_chart(make_cost_coverage_pie(segments_sie, f"Kosten & Deckung – {GROUPS['sie']}", cluster_mode="adjacent"), use_container_width=True)
-
-            else:
-                st.info(f"Keine Daten für '{GROUPS['sie']}'.")
+        # Coverage pies (EK + Zuschüsse + loans) with explicit colors, one column per party
+        deckung = lauf["figuren: deckung"]
+        for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+            with col:
+                if deckung.get(partei) is not None:
+                    _zeige(f"Kosten & Deckung – {label}", deckung[partei])
+                else:
+                    st.info(f"Keine Daten für '{label}'.")
 
+        verlaeufe = lauf["figuren: verläufe"]
 
         # Stacked Area: Restschuld
         st.markdown("### Restschuld – Zusammensetzung als Flächenchart")
-        rs_col1, rs_col2 = st.columns(2)
-        with rs_col1:
-            fam_series = loans_by_prefix(szenario_b["tilgungsplaene"], "fam_")
-            if fam_series:
-                st.plotly_chart(
-                    make_stacked_area(fam_series, f"Restschuld (Stacked) – {GROUPS['fam']}", "Restschuld Ende", "Restschuld in €"),
-                    use_container_width=True,
-                )
-            else:
-                st.info(f"Keine Darlehen für '{GROUPS['fam']}' in diesem Szenario.")
-        with rs_col2:
-            sie_series = loans_by_prefix(szenario_b["tilgungsplaene"], "sie_")
-            if sie_series:
-                st.plotly_chart(
-                    make_stacked_area(sie_series, f"Restschuld (Stacked) – {GROUPS['sie']}", "Restschuld Ende", "Restschuld in €"),
-                    use_container_width=True,
-                )
-            else:
-                st.info(f"Keine Darlehen für '{GROUPS['sie']}' in diesem Szenario.")
+        for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+            with col:
+                if verlaeufe.get(("Restschuld Ende", partei)) is not None:
+                    _zeige(f"Restschuld (Stacked) – {label}", verlaeufe["Restschuld Ende", partei])
+                else:
+                    st.info(f"Keine Darlehen für '{label}' in diesem Szenario.")
 
         # Stacked Area: Tilgungsrate (Tilgung p.a.)
         st.markdown("### Tilgungsrate (Tilgung p.a.) – Flächenchart")
-        tr_col1, tr_col2 = st.columns(2)
-        with tr_col1:
-            fam_series = loans_by_prefix(szenario_b["tilgungsplaene"], "fam_")
-            if fam_series:
-                st.plotly_chart(
-                    make_stacked_area(fam_series, f"Tilgung p.a. (Stacked) – {GROUPS['fam']}", "Tilgung p.a.", "Tilgung p.a. in €"),
-                    use_container_width=True,
-                )
-            else:
-                st.info(f"Keine Tilgungsdaten für '{GROUPS['fam']}'.")
-        with tr_col2:
-            sie_series = loans_by_prefix(szenario_b["tilgungsplaene"], "sie_")
-            if sie_series:
-                st.plotly_chart(
-                    make_stacked_area(sie_series, f"Tilgung p.a. (Stacked) – {GROUPS['sie']}", "Tilgung p.a.", "Tilgung p.a. in €"),
-                    use_container_width=True,
-                )
-            else:
-                st.info(f"Keine Tilgungsdaten für '{GROUPS['sie']}'.")
+        for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+            with col:
+                if verlaeufe.get(("Tilgung p.a.", partei)) is not None:
+                    _zeige(f"Tilgung p.a. (Stacked) – {label}", verlaeufe["Tilgung p.a.", partei])
+                else:
+                    st.info(f"Keine Tilgungsdaten für '{label}'.")
 
     with sub_tab2:
         st.subheader("Jahresweiser Tilgungsplan – pro Partei")
 
-        # Familie
-        fam_plan = safe_concat_plans({k: v for k, v in szenario_b["tilgungsplaene"].items() if k.startswith("fam_")})
-        # Sie
-        sie_plan = safe_concat_plans({k: v for k, v in szenario_b["tilgungsplaene"].items() if k.startswith("sie_")})
-
-        c1, c2 = st.columns(2)
+        # Jahressummen aus dem Aggregat-Knoten (nur neu, wenn sich das Szenario geändert hat)
+        uebersicht = lauf["aggregate"]["jahresuebersicht"]
+        for col, (partei, label) in zip(st.columns(len(parteien)), parteien.items()):
+            agg = uebersicht[partei]
+            with col:
+                st.caption(label)
+                if not agg.empty:
+                    with span(f"st.dataframe: Tilgungsplan {label}"):
+                        st.dataframe(
+                            agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, agg.columns[1:]]),
+                            use_container_width=True,
+                        )
+                else:
+                    st.info(f"Keine Tilgungsdaten ({label}).")
 
-        with c1:
-            st.caption(GROUPS["fam"])
-            if not fam_plan.empty:
-                fam_agg = fam_plan.groupby("Jahr").sum(numeric_only=True).reset_index()
+        st.markdown("---")
+        st.subheader("Jahresweiser Tilgungsplan – gesamt")
+        total_agg = uebersicht[None]
+        if not total_agg.empty:
+            with span("st.dataframe: Tilgungsplan gesamt"):
                 st.dataframe(
-                    fam_agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, fam_agg.columns[1:]]),
+                    total_agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, total_agg.columns[1:]]),
                     use_container_width=True,
                 )
-            else:
-                st.info("Keine Tilgungsdaten (Familie).")
+        else:
+            st.info("Es liegen keine Tilgungsdaten vor.")
 
-        with c2:
-            st.caption(GROUPS["sie"])
-            if not sie_plan.empty:
-                sie_agg = sie_plan.groupby("Jahr").sum(numeric_only=True).reset_index()
-                st.dataframe(
-                    sie_agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, sie_agg.columns[1:]]),
-                    use_container_width=True,
-                )
-            else:
-                st.info("Keine Tilgungsdaten (Sie).")
 
-        st.markdown("---")
-        st.subheader("Jahresweiser Tilgungsplan – gesamt")
-        total_agg = safe_concat_plans(szenario_b["tilgungsplaene"]).groupby("Jahr").sum(numeric_only=True).reset_index()
-        if not total_agg.empty:
-            st.dataframe(
-                total_agg.style.format("€ {:,.2f}", subset=pd.IndexSlice[:, total_agg.columns[1:]]),
-                use_container_width=True,
+def render_sensitivity_tab(params: list, st_params_fam, st_params_sie, zinsbindung_jahre: int, monatlich: bool = False,
+                           reihenfolge: dict | None = None):
+    st.header("Sensitivität: Parameter-Sweep")
+    st.caption("Alle übrigen Eingaben (auch die Kreditaufteilung) bleiben wie in der Sidebar; jede Achse läuft über den "
+               "vollen Sliderbereich in 0,1 %-Schritten.")
+
+    achsen = list(SWEEP_ACHSEN)
+    c1, c2, c3, c4 = st.columns([2, 2, 2, 1])
+    x_achse = c1.selectbox("X-Achse", achsen, index=achsen.index("Zins (alle Darlehen)"), key="sweep_x")
+    y_achse = c2.selectbox("Y-Achse", achsen, index=achsen.index("Anf. Tilgung (beide)"), key="sweep_y")
+    kennzahl = c3.selectbox("Kennzahl", list(SWEEP_KENNZAHLEN), format_func=SWEEP_KENNZAHLEN.get, key="sweep_kennzahl")
+    kontur = c4.toggle("Konturen", key="sweep_kontur")
+
+    if set(SWEEP_ACHSEN[x_achse][0]) & set(SWEEP_ACHSEN[y_achse][0]):
+        st.warning("X- und Y-Achse verändern dieselben Parameter – bitte zwei verschiedene Achsen wählen.")
+        return
+
+    # Sweep nur neu rechnen, wenn sich Eingaben oder Achsen geändert haben
+    schluessel = (
+        scenario_fingerprint(params, st_params_fam, st_params_sie, monatlich, reihenfolge), x_achse, y_achse, zinsbindung_jahre,
+    )
+    gespeichert = st.session_state.get("sweep_ergebnis")
+    if gespeichert is None or gespeichert[0] != schluessel:
+        with span("sweep: parameter_sweep"):
+            df = parameter_sweep(
+                params, x_achse, y_achse, st_fam=st_params_fam, st_sie=st_params_sie,
+                zinsbindung_jahre=zinsbindung_jahre, monatlich=monatlich, reihenfolge=reihenfolge,
+            )
+        st.session_state.sweep_ergebnis = gespeichert = (schluessel, df)
+    df = gespeichert[1]
+
+    if df["keine_finanzierung"].all():
+        st.info("Keine Finanzierung notwendig – nichts zu variieren.")
+        return
+
+    punkt = tuple(float(params[PARAM_FIELDS.index(SWEEP_ACHSEN[a][0][0])]) for a in (x_achse, y_achse))
+    from charts.heatmaps import make_sensitivity_heatmap
+
+    titel = SWEEP_KENNZAHLEN[kennzahl]
+    if kennzahl == "restschuld_zinsbindung":
+        titel = f"Restschuld nach {zinsbindung_jahre} J."
+    with span("aggregation: sweep_matrix"):
+        matrix = sweep_matrix(df, x_achse, y_achse, kennzahl)
+    _zeichne("Sensitivität", make_sensitivity_heatmap, matrix, titel, x_achse, y_achse, titel, kontur=kontur, punkt=punkt)
+    with st.expander(f"Daten ({len(df):,} Kombinationen)"):
+        st.dataframe(df, use_container_width=True)
+
+
+def render_montecarlo_tab(params: list, st_params_fam, st_params_sie, zinsbindung_jahre: int, monatlich: bool = False,
+                          reihenfolge: dict | None = None):
+    st.header("Anschlussfinanzierung nach der Zinsbindung (Monte Carlo)")
+    st.caption(
+        "Ab Ende der Zinsbindung folgt jedes Darlehen einem simulierten Kurzfristzins (mean reverting) plus "
+        "seinem heutigen Aufschlag; bei jeder Anschlussbindung wird die Rate aus Restschuld, Zins und Anfangstilgung neu berechnet."
+    )
+
+    c1, c2, c3 = st.columns(3)
+    start = c1.number_input("Zinsniveau heute (%)", 0.0, 15.0, 3.5, 0.1, key="mc_start") / 100
+    mittel = c1.number_input("Langfristiges Mittel (%)", 0.0, 15.0, 4.0, 0.1, key="mc_mittel") / 100
+    volatilitaet = c2.number_input("Volatilität p.a. (%-Punkte)", 0.0, 5.0, 1.0, 0.1, key="mc_vol") / 100
+    geschwindigkeit = c2.number_input("Rückkehrgeschwindigkeit", 0.01, 2.0, 0.15, 0.01, key="mc_speed")
+    bindung = c3.number_input("Anschluss-Zinsbindung (Jahre)", 1, 30, 10, 1, key="mc_bindung")
+    pfade = c3.number_input("Pfade", 100, 50_000, 2_000, 100, key="mc_pfade")
+
+    # Simulation nur neu rechnen, wenn sich Eingaben oder Modell geändert haben
+    schluessel = (
+        scenario_fingerprint(params, st_params_fam, st_params_sie, monatlich, reihenfolge), zinsbindung_jahre,
+        start, mittel, volatilitaet, geschwindigkeit, bindung, pfade,
+    )
+    gespeichert = st.session_state.get("mc_ergebnis")
+    if gespeichert is None or gespeichert[0] != schluessel:
+        with span("monte carlo: simulation"):
+            ergebnis = simulate_anschlussfinanzierung(
+                params, st_params_fam, st_params_sie, zinsbindung_jahre,
+                modell=ZinsModell(start, mittel, geschwindigkeit, volatilitaet),
+                pfade=int(pfade), anschluss_bindung=int(bindung), seed=0, monatlich=monatlich, reihenfolge=reihenfolge,
             )
+        st.session_state.mc_ergebnis = gespeichert = (schluessel, ergebnis)
+    ergebnis = gespeichert[1]
+
+    quantile = ergebnis["quantile"]
+    jahr_spalten = [c for c in quantile.columns if c.startswith("Tilgungsjahr")]
+    st.dataframe(
+        quantile.style.format("€ {:,.0f}", subset=[c for c in quantile.columns if c not in jahr_spalten])
+        .format(lambda j: f"> {MAX_JAHRE}" if j > MAX_JAHRE else f"{j:.0f}", subset=jahr_spalten),
+        use_container_width=True,
+    )
+
+    from charts.distributions import make_histogram, make_rate_fan
+
+    g1, g2 = st.columns(2)
+    with g1:
+        _zeichne("Simulierte Zinspfade", make_rate_fan, ergebnis["zinspfade"], "Simulierte Zinspfade", zinsbindung_jahre)
+    with g2:
+        verteilung = {GROUPS.get(p, p): v for p, v in ergebnis["zinskosten"].items() if p != "gesamt"}
+        _zeichne("Verteilung der Zinskosten", make_histogram, verteilung, "Verteilung der Zinskosten", "Zinskosten")
+
+
+def render_performance_panel(messung) -> None:
+    """Debug expander with the timing spans of this rerun (table + JSON download)."""
+    if messung is None:
+        return
+    with st.expander(f"⏱️ Performance (Rerun: {messung.gesamt * 1000:,.1f} ms)"):
+        zeilen = [
+            {
+                "Stufe": "  " * s["tiefe"] + s["name"],
+                "Aufrufe": s["aufrufe"],
+                "Summe (ms)": s["sekunden"] * 1000,
+                "Max. je Aufruf (ms)": s["max"] * 1000,
+            }
+            for s in messung.zusammenfassung()
+        ]
+        if zeilen:
+            st.dataframe(pd.DataFrame(zeilen).style.format(precision=2), use_container_width=True, hide_index=True)
         else:
-            st.info("Es liegen keine Tilgungsdaten vor.")
+            st.info("Keine Messpunkte in diesem Rerun (Ergebnis aus dem Cache).")
+        protokoll = st.session_state.pipeline.protokoll if "pipeline" in st.session_state else {}
+        if protokoll:
+            neu = [name for name, berechnet in protokoll.items() if berechnet]
+            alt = [name for name, berechnet in protokoll.items() if not berechnet]
+            st.caption(f"Pipeline – neu berechnet: {', '.join(neu) or '–'} · wiederverwendet: {', '.join(alt) or '–'}")
+        st.download_button(
+            "Messung als JSON herunterladen", messung.als_json(), file_name="loan_dolphin_timing.json",
+            mime="application/json", use_container_width=True,
+        )
+    _render_speicher()
+
+
+def _render_speicher() -> None:
+    """Memory report of this session and the per-session budget."""
+    speicher = _szenario_speicher()
+    gruppen = {"Gespeicherte Szenarien": speicher.groessen(), **_session_gruppen()}
+    zeilen = _session_bericht(gruppen)
+    gesamt = sum(z["bytes"] for z in zeilen)
+    with st.expander(f"🧠 Speicher (Session: {gesamt / 1024:,.0f} KiB von {speicher.budget / 1024 ** 2:,.0f} MiB)"):
+        budget_mb = st.number_input(
+            "Speicherbudget je Session (MiB)", min_value=1, max_value=1024,
+            value=max(1, round(BUDGET_STANDARD / 1024 ** 2)), step=1, key="speicher_budget_mb",
+            help="Bei Überschreitung werden die ältesten gespeicherten Szenarien entfernt (das neueste bleibt).",
+        )
+        if budget_mb * 1024 ** 2 != speicher.budget:
+            speicher.budget = int(budget_mb * 1024 ** 2)
+            entfernt = speicher.kuerze(gesamt - speicher.nbytes)
+            if entfernt:
+                st.warning(f"Entfernt: {', '.join(entfernt)}")
+                zeilen = [z for z in zeilen if z["name"] not in entfernt]
+        if zeilen:
+            df = pd.DataFrame(zeilen).rename(columns={"kategorie": "Kategorie", "name": "Eintrag", "bytes": "KiB"})
+            df["KiB"] = df["KiB"] / 1024
+            st.dataframe(df.style.format({"KiB": "{:,.1f}"}), use_container_width=True, hide_index=True)
+        st.caption(f"Geschätzt aus Array-/Tabellengrößen und sys.getsizeof, je Objekt einmal gemessen; Ergebnisse "
+                   f"des gemeinsamen Caches zählen nicht zur Session. Entfernte Szenarien bisher: {speicher.evictions}.")
@@ -1,28 +1,150 @@
 import streamlit as st
 import pandas as pd
-from core.helpers import LOAN_KEYS_FAM, LOAN_KEYS_SIE
-
-
-def _init_session_state_tables(default_st_fam: int, default_st_sie: int):
-    # Familie
-    if "sondertilgung_df_fam" not in st.session_state:
-        st.session_state.sondertilgung_df_fam = pd.DataFrame({"Jahr": range(1, 51), "Betrag": default_st_fam})
-    if "manual_sondertilgung_df_fam" not in st.session_state:
-        df_f = pd.DataFrame(columns=["Jahr"] + LOAN_KEYS_FAM)
-        df_f["Jahr"] = range(1, 51)
-        for k in LOAN_KEYS_FAM:
-            df_f[k] = 0
-        st.session_state.manual_sondertilgung_df_fam = df_f
-
-    # Sie
-    if "sondertilgung_df_sie" not in st.session_state:
-        st.session_state.sondertilgung_df_sie = pd.DataFrame({"Jahr": range(1, 51), "Betrag": default_st_sie})
-    if "manual_sondertilgung_df_sie" not in st.session_state:
-        df_s = pd.DataFrame(columns=["Jahr"] + LOAN_KEYS_SIE)
-        df_s["Jahr"] = range(1, 51)
-        for k in LOAN_KEYS_SIE:
-            df_s[k] = 0
-        st.session_state.manual_sondertilgung_df_sie = df_s
+from core.helpers import ST_MODUS_AUTO, ST_MODUS_MANUELL
+from core.optimizer import AUFTEILUNG_MODI, SONDERTILGUNG_ZIELE, reihenfolge_fuer, sondertilgung_fuer
+from core.profiling import span
+from core.registry import standard_register
+from core.solver import STELLGROESSEN, ZIEL_KENNZAHLEN, loese
+from core.sondertilgung import SondertilgungPlan
+
+# Kurznamen der Parteien in Widget-Beschriftungen (sonst der Name aus dem Register)
+KURZNAMEN = {"fam": "Familie", "sie": "Sie"}
+
+
+def _init_session_state_tables(partei: str, loan_keys: list, default_st: int):
+    if f"sondertilgung_df_{partei}" not in st.session_state:
+        st.session_state[f"sondertilgung_df_{partei}"] = pd.DataFrame({"Jahr": range(1, 51), "Betrag": default_st})
+    if f"manual_sondertilgung_df_{partei}" not in st.session_state:
+        df = pd.DataFrame(columns=["Jahr"] + loan_keys)
+        df["Jahr"] = range(1, 51)
+        for k in loan_keys:
+            df[k] = 0
+        st.session_state[f"manual_sondertilgung_df_{partei}"] = df
+
+
+def _compile_st_plan(partei: str, modus: str, st_df: pd.DataFrame, loan_keys: list, max_quote: float | None = None) -> SondertilgungPlan:
+    """Compile the Sondertilgung table only when it (or the mode / cap) was edited; reruns reuse the plan."""
+    state_key = f"st_plan_{partei}"
+    cached = st.session_state.get(state_key)
+    if cached is not None and cached[0] == (modus, max_quote) and cached[1].equals(st_df):
+        return cached[2]
+    plan = SondertilgungPlan.from_dataframe(modus, st_df, loan_keys, max_quote=max_quote)
+    st.session_state[state_key] = ((modus, max_quote), st_df.copy(), plan)
+    return plan
+
+
+def _uebernehme_optimierung(partei: str, loan_keys: list, kontext: dict, max_quote: float) -> None:
+    """Button callback: optimize the party's Sondertilgung and write it into the manual table."""
+    ziel = st.session_state[f"st_opt_ziel_{partei}"]
+    budget_jahr = st.session_state[f"st_opt_jahr_{partei}"] or None
+    budget_gesamt = st.session_state[f"st_opt_gesamt_{partei}"] or None
+    if budget_jahr is None and budget_gesamt is None:
+        st.session_state[f"st_opt_ergebnis_{partei}"] = None
+        return
+    params, monatlich = kontext["params"], kontext["monatlich"]
+    # Zuteilung wie in der App: mit den aktuellen Sondertilgungsplänen beider Parteien (letzter Lauf)
+    plaene = [(st.session_state.get(f"st_plan_{p}") or (None, None, None))[2] for p in kontext["parteien"]]
+    reihenfolge = reihenfolge_fuer(params, *plaene, kontext["aufteilung"], kontext["max_monatsrate"] or None, monatlich)
+    with span(f"optimierung: sondertilgung {partei}"):
+        ergebnis = sondertilgung_fuer(
+            params, partei, ziel, budget_jahr, budget_gesamt, max_quote=max_quote or None,
+            zinsbindung_jahre=kontext["zinsbindung_jahre"], monatlich=monatlich, reihenfolge=reihenfolge,
+        )
+    df = pd.DataFrame(ergebnis["werte"].round(2), columns=loan_keys)
+    df.insert(0, "Jahr", range(1, len(df) + 1))
+    st.session_state[f"manual_sondertilgung_df_{partei}"] = df
+    st.session_state.pop(f"st_editor_{partei}_manual", None)  # alte Editor-Änderungen verwerfen
+    st.session_state[f"st_radio_{partei}"] = ST_MODUS_MANUELL
+    st.session_state[f"st_opt_ergebnis_{partei}"] = ergebnis
+
+
+def _render_st_optimierung(partei: str, kurz: str, loan_keys: list, kontext: dict, max_quote: float) -> None:
+    """Budget inputs and button of the Sondertilgung optimizer; the result lands in the manual table."""
+    st.markdown(f"**Sondertilgung optimieren – {kurz}**")
+    st.selectbox("Ziel", list(SONDERTILGUNG_ZIELE), format_func=SONDERTILGUNG_ZIELE.get, key=f"st_opt_ziel_{partei}")
+    st.number_input("Budget pro Jahr (€, 0 = ohne)", min_value=0.0, value=10_000.0, step=1_000.0, key=f"st_opt_jahr_{partei}")
+    st.number_input("Budget gesamt (€, 0 = ohne)", min_value=0.0, value=0.0, step=5_000.0, key=f"st_opt_gesamt_{partei}")
+    st.button(
+        f"Optimieren & in Tabelle übernehmen ({kurz})", use_container_width=True, key=f"st_opt_{partei}",
+        on_click=_uebernehme_optimierung, args=(partei, loan_keys, kontext, max_quote),
+        help="Verteilt das Budget auf Jahre und Darlehen (Obergrenze: max. Sondertilgung p.a.) und schaltet auf Manuelle Eingabe.",
+    )
+    if f"st_opt_ergebnis_{partei}" not in st.session_state:
+        return
+    ergebnis = st.session_state[f"st_opt_ergebnis_{partei}"]
+    if ergebnis is None:
+        st.warning("Budget pro Jahr oder gesamt angeben.")
+        return
+    st.caption(
+        f"{SONDERTILGUNG_ZIELE[ergebnis['ziel']]}: € {ergebnis['wert']:,.2f} statt € {ergebnis['ohne']:,.2f} "
+        f"ohne Sondertilgung; eingesetzt € {ergebnis['eingesetzt']:,.2f} "
+        f"({ergebnis['auswertungen']:,} Auswertungen, {ergebnis['sekunden'] * 1000:,.0f} ms)."
+    )
+
+
+def _render_sondertilgung(partei: str, label: str, kurz: str, loan_keys: list, kontext: dict | None = None) -> tuple:
+    """Sondertilgung inputs of one party (mode, cap, table, optimizer); returns (modus, table, compiled plan)."""
+    with st.expander(label):
+        modus = st.radio(f"Sondertilgungs-Modus ({kurz})", [ST_MODUS_AUTO, ST_MODUS_MANUELL], key=f"st_radio_{partei}")
+        default_st = st.number_input(f"Jährlicher Sondertilgungsbetrag (Standard) – {kurz}", value=0, min_value=0, step=1000, key=f"st_default_{partei}")
+        max_quote = st.number_input(
+            f"Max. Sondertilgung p.a. je Darlehen (% der Darlehenssumme, 0 = unbegrenzt) – {kurz}",
+            min_value=0.0, max_value=100.0, value=0.0, step=1.0, key=f"st_quote_{partei}",
+        ) / 100
+        _init_session_state_tables(partei, loan_keys, default_st)
+        if modus == ST_MODUS_AUTO:
+            tabelle = f"sondertilgung_df_{partei}"
+            if st.button(f"Standardwert anwenden ({kurz})", use_container_width=True):
+                st.session_state[tabelle]["Betrag"] = default_st
+            editor_key = f"st_editor_{partei}_auto"
+        else:
+            tabelle = f"manual_sondertilgung_df_{partei}"
+            editor_key = f"st_editor_{partei}_manual"
+        with span(f"st.data_editor: Sondertilgung {kurz}"):
+            st.session_state[tabelle] = st.data_editor(st.session_state[tabelle], use_container_width=True, key=editor_key)
+        st_df = st.session_state[tabelle]
+        with span(f"sondertilgung: Plan {kurz}"):
+            plan = _compile_st_plan(partei, modus, st_df, loan_keys, max_quote)
+        if kontext is not None:
+            _render_st_optimierung(partei, kurz, loan_keys, kontext, max_quote)
+        return modus, st_df, plan
+
+
+def _render_zielwertsuche(params: list, st_plaene: dict, kontext: dict) -> None:
+    """Goal seek panel: which Tilgung / Sondertilgung / Kosten reaches a target Kennzahl (plans per party)."""
+    parteien = kontext["parteien"]
+    with st.expander("🎯 Zielwertsuche"):
+        stellgroesse = st.selectbox("Gesucht", list(STELLGROESSEN), key="ziel_stellgroesse")
+        kennzahl = st.selectbox("Kennzahl", list(ZIEL_KENNZAHLEN), format_func=ZIEL_KENNZAHLEN.get, key="ziel_kennzahl")
+        partei = st.selectbox(
+            "Bezogen auf", [None, *parteien], format_func=lambda p: "Gesamt" if p is None else parteien[p], key="ziel_partei",
+        )
+        ziel = st.number_input("Zielwert (€, höchstens)", min_value=0.0, value=200_000.0, step=1_000.0, key="ziel_wert")
+        if not st.button("Zielwert suchen", use_container_width=True, key="ziel_suchen"):
+            return
+        monatlich = kontext["monatlich"]
+        with span("solver: zielwertsuche"):
+            # Zuteilung wie in der App (gewählte Aufteilung mit den aktuellen Sondertilgungsplänen)
+            reihenfolge = reihenfolge_fuer(params, *st_plaene.values(), kontext["aufteilung"],
+                                           kontext["max_monatsrate"] or None, monatlich)
+            ergebnis = loese(
+                params, stellgroesse, kennzahl, ziel, *st_plaene.values(), partei=partei,
+                zinsbindung_jahre=kontext["zinsbindung_jahre"], monatlich=monatlich, reihenfolge=reihenfolge,
+            )
+        if stellgroesse.startswith("Anf. Tilgung"):
+            wert, toleranz = f"{ergebnis['wert'] * 100:.4f} %", f"± {ergebnis['toleranz'] * 100:.4f} %-Punkte"
+        else:
+            wert, toleranz = f"€ {ergebnis['wert']:,.2f}", f"± € {ergebnis['toleranz']:,.2f}"
+        if ergebnis["erfolgreich"]:
+            st.success(f"{stellgroesse}: {wert}")
+        elif ergebnis["erreicht"] <= ergebnis["ziel"]:
+            st.warning(f"{ergebnis['meldung']} {stellgroesse}: {wert}")
+        else:  # nicht erreichbar: kein Wert vorschlagen
+            st.warning(ergebnis["meldung"])
+        st.caption(
+            f"{ZIEL_KENNZAHLEN[kennzahl]} damit: € {ergebnis['erreicht']:,.2f} (Ziel € {ergebnis['ziel']:,.2f}); "
+            f"Toleranz {toleranz}, {ergebnis['iterationen']} Schritte, {ergebnis['sekunden'] * 1000:,.1f} ms."
+        )
 
 
 def render_sidebar() -> dict:
@@ -42,6 +164,10 @@ def render_sidebar() -> dict:
     # Konditionen
     st.subheader("3. Konditionen")
     Zinsbindung_Jahre = st.number_input("Zinsbindungsdauer (Jahre)", 1, 40, 15, 1)
+    Zinsverrechnung = st.radio(
+        "Zinsverrechnung", ["jährlich", "monatlich"], horizontal=True, key="zinsverrechnung",
+        help="Monatlich: Zinsen auf die laufende Restschuld, 12 Monatsraten p.a. (wie bei Banken üblich).",
+    )
     with st.expander("Zinssätze"):
         Zins_KfW_297 = st.slider("Zins KfW 297 (%)", 0.1, 5.0, 2.8, 0.1) / 100
         Zins_KfW_124 = st.slider("Zins KfW 124 (%)", 0.1, 5.0, 3.5, 0.1) / 100
@@ -56,42 +182,48 @@ def render_sidebar() -> dict:
     st.subheader("5. Förderkredite (Maximalbeträge)")
     Kredit_KfW_297_pro_WE = st.number_input("Max. KfW 297 / WE (€)", 0, value=150_000, step=5_000)
     Kredit_KfW_124_max = st.number_input("Max. KfW 124 (€)", 0, value=100_000, step=5_000)
+    aufteilung = st.selectbox(
+        "Kreditaufteilung", list(AUFTEILUNG_MODI), format_func=AUFTEILUNG_MODI.get, key="aufteilung",
+        help="Beste Reihenfolge: die Produkte je Partei in der Reihenfolge (bis zur Obergrenze) füllen, "
+             "mit der Zinskosten bzw. Monatsrate minimal sind.",
+    )
+    max_monatsrate = 0.0
+    if aufteilung == "zinskosten":
+        max_monatsrate = st.number_input(
+            "Max. Monatsrate gesamt (€, 0 = ohne Budget)", min_value=0.0, value=0.0, step=100.0, key="max_monatsrate",
+        )
+        if max_monatsrate > 0:
+            st.caption("Heuristik: verglichen werden nur Produktreihenfolgen. Begrenzt das Budget die Rate, kann "
+                       "eine zwischen zwei Produkten geteilte Aufteilung etwas günstiger sein.")
 
-    # Sondertilgungen per Partei
+    # Parameter in der Reihenfolge von batch.PARAM_FIELDS (Optimierung und Zielwertsuche)
+    params = [
+        Kosten_Fam, Eigenkapital_Fam, Zuschuesse_Fam, Kosten_Sie, Eigenkapital_Sie, Zuschuesse_Sie,
+        Zins_KfW_297, Zins_KfW_124, Zins_Hausbank, Tilgung_Fam, Tilgung_Sie, Kredit_KfW_297_pro_WE, Kredit_KfW_124_max,
+    ]
+    register = standard_register(params)
+    kontext = {
+        "params": params, "zinsbindung_jahre": Zinsbindung_Jahre, "monatlich": Zinsverrechnung == "monatlich",
+        "aufteilung": aufteilung, "max_monatsrate": max_monatsrate, "parteien": register.labels["parteien"],
+    }
+
+    # Sondertilgungen per Partei (Parteien und Kredite aus dem Register)
     st.subheader("6. Sondertilgungen (pro Partei)")
-    with st.expander("Schwester & Familie"):
-        st_modus_fam = st.radio("Sondertilgungs-Modus (Familie)", ["Automatische Verteilung", "Manuelle Eingabe"], key="st_radio_fam")
-        default_st_fam = st.number_input("Jährlicher Sondertilgungsbetrag (Standard) – Familie", value=0, min_value=0, step=1000, key="st_default_fam")
-        _init_session_state_tables(default_st_fam, default_st_sie=0)  # init fam immediately; sie below
-        if st_modus_fam == "Automatische Verteilung":
-            if st.button("Standardwert anwenden (Familie)", use_container_width=True):
-                st.session_state.sondertilgung_df_fam["Betrag"] = default_st_fam
-            st.session_state.sondertilgung_df_fam = st.data_editor(
-                st.session_state.sondertilgung_df_fam, use_container_width=True, key="st_editor_fam_auto"
-            )
-            st_df_fam = st.session_state.sondertilgung_df_fam
-        else:
-            st.session_state.manual_sondertilgung_df_fam = st.data_editor(
-                st.session_state.manual_sondertilgung_df_fam, use_container_width=True, key="st_editor_fam_manual"
-            )
-            st_df_fam = st.session_state.manual_sondertilgung_df_fam
-
-    with st.expander("Ihr Anteil"):
-        st_modus_sie = st.radio("Sondertilgungs-Modus (Sie)", ["Automatische Verteilung", "Manuelle Eingabe"], key="st_radio_sie")
-        default_st_sie = st.number_input("Jährlicher Sondertilgungsbetrag (Standard) – Sie", value=0, min_value=0, step=1000, key="st_default_sie")
-        _init_session_state_tables(default_st_fam=0, default_st_sie=default_st_sie)  # ensure sie inited
-        if st_modus_sie == "Automatische Verteilung":
-            if st.button("Standardwert anwenden (Sie)", use_container_width=True):
-                st.session_state.sondertilgung_df_sie["Betrag"] = default_st_sie
-            st.session_state.sondertilgung_df_sie = st.data_editor(
-                st.session_state.sondertilgung_df_sie, use_container_width=True, key="st_editor_sie_auto"
-            )
-            st_df_sie = st.session_state.sondertilgung_df_sie
-        else:
-            st.session_state.manual_sondertilgung_df_sie = st.data_editor(
-                st.session_state.manual_sondertilgung_df_sie, use_container_width=True, key="st_editor_sie_manual"
-            )
-            st_df_sie = st.session_state.manual_sondertilgung_df_sie
+    sondertilgung = {
+        p.key: _render_sondertilgung(p.key, p.label, KURZNAMEN.get(p.key, p.label), register.loan_keys_der_partei(p.key),
+                                     kontext)
+        for p in register.parteien
+    }
+
+    # Zielwertsuche über die übrigen Eingaben
+    st.subheader("7. Zielwertsuche")
+    _render_zielwertsuche(params, {p: plan for p, (_, _, plan) in sondertilgung.items()}, kontext)
+
+    st.divider()
+    perf_debug = st.toggle(
+        "⏱️ Performance-Messung", key="perf_debug",
+        help="Misst Engine, Aggregation, Tabellen und Diagramme pro Rerun und zeigt sie unten auf der Seite.",
+    )
 
     return {
         "Kosten_Fam": Kosten_Fam,
@@ -108,8 +240,11 @@ def render_sidebar() -> dict:
         "Kredit_KfW_297_pro_WE": Kredit_KfW_297_pro_WE,
         "Kredit_KfW_124_max": Kredit_KfW_124_max,
         "Zinsbindung_Jahre": Zinsbindung_Jahre,
-        "st_modus_fam": st_modus_fam,
-        "st_modus_sie": st_modus_sie,
-        "st_df_fam": st_df_fam,
-        "st_df_sie": st_df_sie,
+        "monatlich": Zinsverrechnung == "monatlich",
+        "aufteilung": aufteilung,
+        "max_monatsrate": max_monatsrate,
+        **{f"st_modus_{p}": modus for p, (modus, _, _) in sondertilgung.items()},
+        **{f"st_df_{p}": st_df for p, (_, st_df, _) in sondertilgung.items()},
+        **{f"st_plan_{p}": plan for p, (_, _, plan) in sondertilgung.items()},
+        "perf_debug": perf_debug,
     }
\ No newline at end of file